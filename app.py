@@ -1,19 +1,37 @@
 import sys
 import os
+import threading
 from dotenv import load_dotenv
+
+# Load environment variables before any module reads its settings:
+# a .env file in the working directory, if any (see .env.example)
+load_dotenv()
+
 from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
 from modules.auth import LoginWindow
-from modules.dashboard import Dashboard
 from utils.session import SessionManager
+from utils.warmup import Warmup, WARMUP_DELAY_MS
 
-# Load environment variables
-load_dotenv()
+# The dashboard, its screens and the retrain scheduler are imported after
+# login: they pull in sklearn, matplotlib, pdfplumber and friends, which
+# would otherwise delay the login window by seconds.
+
+def ensure_indexes_in_background():
+    from utils.indexes import ensure_indexes
+    from utils.data_handler import normalize_stored_numbers
+    ensure_indexes()
+    # Amounts saved as text by older versions escape the numeric amount
+    # filter and sort of the loan list (a no-op once converted)
+    normalize_stored_numbers()
 
 class App:
     def __init__(self):
         self.dashboard = None
         self.login = None
         self.session = SessionManager()
+        self.retrain_scheduler = None
+        self.warmup = None
     
     def start(self):
         if self.session.is_authenticated():
@@ -33,12 +51,27 @@ class App:
         self.show_dashboard()
     
     def show_dashboard(self):
+        from modules.dashboard import Dashboard
         self.dashboard = Dashboard()
         self.dashboard.show()
         
+        # Import the screens in the background once the dashboard is up,
+        # then start the retrain scheduler (its imports are warm by then)
+        if self.warmup is None:
+            self.warmup = Warmup()
+            self.warmup.finished.connect(self.start_retrain_scheduler)
+            QTimer.singleShot(WARMUP_DELAY_MS, self.warmup.start)
+        
         # Close login window if it exists
         if self.login:
             self.login.close()
+    
+    def start_retrain_scheduler(self):
+        # Keep the risk model learning from new loans in the background
+        if self.retrain_scheduler is None:
+            from utils.retrain import RetrainScheduler
+            self.retrain_scheduler = RetrainScheduler()
+            self.retrain_scheduler.start()
 
 def main():
     app = QApplication(sys.argv)
@@ -47,6 +80,9 @@ def main():
     with open("ui/styles.qss", "r") as f:
         app.setStyleSheet(f.read())
 
+    # Make sure indexes exist without holding up the login window
+    threading.Thread(target=ensure_indexes_in_background, daemon=True).start()
+
     # Create and start app
     main_app = App()
     main_app.start()
@@ -54,4 +90,4 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
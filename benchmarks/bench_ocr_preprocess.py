@@ -0,0 +1,130 @@
+# benchmarks/bench_ocr_preprocess.py
+#
+# Preprocessing time and output size, then OCR latency and field accuracy
+# of DocumentParser.extract_from_image with the raw image against the
+# preprocessing stage, on synthetic loan application scans (600 dpi,
+# tinted paper, noise, wide margins). The OCR part needs the tesseract
+# binary on PATH; without it only preprocessing is measured.
+#
+#   python -m benchmarks.bench_ocr_preprocess [documents]
+
+import os
+import random
+import sys
+import tempfile
+import time
+import pytesseract
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from utils.image_preprocess import ImagePreprocessor
+from utils.ocr_parser import DocumentParser
+
+FIRST_NAMES = ["Ravi", "Meera", "Anil", "Sunita", "Karan", "Priya", "Vikram", "Asha"]
+LAST_NAMES = ["Kumar", "Nair", "Rao", "Sharma", "Iyer", "Gupta", "Menon", "Das"]
+
+# A4 at 600 dpi
+PAGE_SIZE = (4960, 7016)
+SCAN_DPI = 600
+
+
+def make_fields(rng):
+    return {
+        "borrower_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "loan_amount": str(rng.randrange(50, 5000) * 1000),
+        "pan": "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(5))
+               + f"{rng.randrange(10000):04d}" + rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ"),
+        "annual_income": str(rng.randrange(200, 9000) * 1000),
+        "credit_score": str(rng.randrange(300, 900)),
+    }
+
+
+def render_document(fields, path, rng):
+    """Write a noisy 600 dpi scan of an application form"""
+    page = Image.new("RGB", PAGE_SIZE, (238, 232, 215))
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=72)
+
+    lines = [
+        "LOAN APPLICATION FORM",
+        "",
+        f"Borrower: {fields['borrower_name']}",
+        f"Loan Amount: {int(fields['loan_amount']):,}",
+        f"PAN: {fields['pan']}",
+        f"Annual Income: {int(fields['annual_income']):,}",
+        f"Credit Score: {fields['credit_score']}",
+    ]
+    x, y = 700, 1400 + rng.randrange(400)
+    for line in lines:
+        draw.text((x, y), line, fill=(40, 40, 60), font=font)
+        y += 140
+
+    # Scanner speckle and a slight blur
+    for _ in range(4000):
+        px, py = rng.randrange(PAGE_SIZE[0]), rng.randrange(PAGE_SIZE[1])
+        draw.point((px, py), fill=(120, 120, 120))
+    page = page.filter(ImageFilter.GaussianBlur(1))
+    page.save(path, dpi=(SCAN_DPI, SCAN_DPI))
+
+
+def run(parser, documents):
+    latencies = []
+    correct = 0
+    total = 0
+    for path, expected in documents:
+        start = time.perf_counter()
+        result = parser.extract_from_image(path, use_cache=False)
+        latencies.append(time.perf_counter() - start)
+        for field, value in expected.items():
+            total += 1
+            if result.get(field) == value:
+                correct += 1
+    latencies.sort()
+    return latencies[len(latencies) // 2], sum(latencies) / len(latencies), correct / total
+
+
+def preprocess_timings(documents):
+    """Returns: (median seconds, output sizes) of ImagePreprocessor.process"""
+    preprocessor = ImagePreprocessor()
+    timings, sizes = [], []
+    for path, _ in documents:
+        with Image.open(path) as img:
+            start = time.perf_counter()
+            processed = preprocessor.process(img)
+            timings.append(time.perf_counter() - start)
+        sizes.append(processed.size)
+    timings.sort()
+    return timings[len(timings) // 2], sizes
+
+
+def main(count=10, seed=0):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        documents = []
+        for index in range(count):
+            fields = make_fields(rng)
+            path = os.path.join(workdir, f"application_{index}.png")
+            render_document(fields, path, rng)
+            documents.append((path, fields))
+
+        print(f"{count} synthetic scans, {PAGE_SIZE[0]}x{PAGE_SIZE[1]} px at {SCAN_DPI} dpi")
+        median, sizes = preprocess_timings(documents)
+        print(f"preprocessing: median {median:.2f} s, output {min(sizes)} to {max(sizes)} px")
+
+        try:
+            pytesseract.get_tesseract_version()
+        except pytesseract.TesseractNotFoundError:
+            print("tesseract is not installed: OCR latency and accuracy not measured")
+            sys.exit(1)
+
+        variants = [
+            ("raw image", DocumentParser(preprocessor=False)),
+            ("preprocessed", DocumentParser()),
+            ("preprocessed, psm 6", DocumentParser(psm=6)),
+        ]
+        print(f"{'variant':>22} {'median s':>9} {'mean s':>8} {'field accuracy':>15}")
+        for name, parser in variants:
+            median, mean, accuracy = run(parser, documents)
+            print(f"{name:>22} {median:>9.2f} {mean:>8.2f} {accuracy:>14.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
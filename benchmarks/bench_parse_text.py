@@ -0,0 +1,83 @@
+# benchmarks/bench_parse_text.py
+#
+# DocumentParser.parse_text (patterns searched from the first keyword of
+# their field, fields without one skipped) against one plain re.search
+# per field pattern, on large synthetic OCR outputs.
+#
+#   python -m benchmarks.bench_parse_text
+
+import random
+import re
+import time
+from utils.ocr_parser import DocumentParser, _clean_value
+
+FILLER_WORDS = (
+    "the facility shall be repaid in equal monthly installments interest "
+    "accrues daily on the outstanding principal clause schedule lender "
+    "security guarantee covenant default notice"
+).split()
+
+FIELDS_TEXT = {
+    "start": "Borrower: Ravi Kumar\nLoan Amount: 3,50,000\nPAN: ABCDE1234F\n"
+             "Annual Income: 9,00,000\nCIBIL: 742\n",
+    "end": None,
+    "missing": "",
+}
+
+
+def legacy_parse_text(patterns, text):
+    """One re.search per pattern over the whole text"""
+    extracted_data = {}
+    for field, field_patterns in patterns.items():
+        for pattern in field_patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                extracted_data[field] = _clean_value(field, match.group(1))
+                break
+    return extracted_data
+
+
+def make_document(size_kb, layout, seed=0):
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size_kb * 1024:
+        word = rng.choice(FILLER_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    filler = " ".join(words)
+
+    fields = FIELDS_TEXT["start"]
+    if layout == "start":
+        return fields + filler
+    if layout == "end":
+        return filler + "\n" + fields
+    return filler
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(sizes=(64, 512, 2048), repeat=5):
+    parser = DocumentParser()
+    print(f"{'size':>8} {'fields at':>10} {'legacy ms':>10} {'parser ms':>11} {'speedup':>8}")
+    for size_kb in sizes:
+        for layout in ("start", "end", "missing"):
+            text = make_document(size_kb, layout)
+            legacy_time, legacy = best_of(lambda: legacy_parse_text(parser.patterns, text), repeat)
+            new_time, new = best_of(lambda: parser.parse_text(text), repeat)
+            assert legacy == new, (legacy, new)
+            print(
+                f"{size_kb:>6}KB {layout:>10} {legacy_time * 1000:>10.2f} "
+                f"{new_time * 1000:>11.2f} {legacy_time / new_time:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
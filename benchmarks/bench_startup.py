@@ -0,0 +1,102 @@
+# benchmarks/bench_startup.py
+#
+# Cold start cost of the desktop app:
+# - import time of `app`, per top-level package (python -X importtime)
+# - wall time from process launch until the login window is visible
+#
+# Every measurement runs in a fresh interpreter. Run from the project
+# root (config.py, ui/styles.qss); QT_QPA_PLATFORM=offscreen works on
+# machines without a display.
+#
+#   python -m benchmarks.bench_startup [runs]
+
+import collections
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+# Mirrors app.main() up to the first shown window, then exits
+LOGIN_WINDOW_SCRIPT = """
+import sys, threading
+import app
+from PyQt5.QtWidgets import QApplication
+qt = QApplication(sys.argv)
+with open("ui/styles.qss", "r") as f:
+    qt.setStyleSheet(f.read())
+threading.Thread(target=app.ensure_indexes_in_background, daemon=True).start()
+main_app = app.App()
+main_app.start()
+while main_app.login is None or not main_app.login.isVisible():
+    qt.processEvents()
+qt.processEvents()
+print("shown", flush=True)
+"""
+
+
+def importtime_breakdown(module="app", top=12):
+    """
+    Returns: (total ms, [(package, self ms)], [(module, cumulative ms)])
+    packages sorted by self time; modules are the direct imports of module
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    packages = collections.Counter()
+    direct = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), len(match[3]), match[4]
+        packages[name.split(".")[0]] += self_us
+        # One space of indent: imported directly by `module`
+        if indent == 3:
+            direct.append((name, cumulative_us / 1000))
+    total = sum(packages.values()) / 1000
+    packages = [(name, us / 1000) for name, us in packages.most_common(top)]
+    direct = sorted(direct, key=lambda item: item[1], reverse=True)[:top]
+    return total, packages, direct
+
+
+def time_to_login_window():
+    """Seconds from process launch until the login window is shown"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", LOGIN_WINDOW_SCRIPT],
+        stdout=subprocess.PIPE, text=True
+    )
+    for line in process.stdout:
+        if line.strip() == "shown":
+            elapsed = time.perf_counter() - start
+            break
+    else:
+        raise RuntimeError("Login window never appeared")
+    process.kill()
+    process.wait()
+    return elapsed
+
+
+def main(runs=5):
+    total, packages, direct = importtime_breakdown()
+    print(f"import app: {total:.0f} ms of imports")
+    print(f"  {'package':<22}{'self ms':>10}")
+    for name, ms in packages:
+        print(f"  {name:<22}{ms:>10.1f}")
+    print(f"  {'imported by app':<22}{'cum. ms':>10}")
+    for name, ms in direct:
+        print(f"  {name:<22}{ms:>10.1f}")
+
+    timings = [time_to_login_window() for _ in range(runs)]
+    print(
+        f"time to login window: median {statistics.median(timings) * 1000:.0f} ms, "
+        f"best {min(timings) * 1000:.0f} ms ({runs} runs)"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,82 @@
+# benchmarks/bench_training.py
+#
+# Full training wall time and peak RSS against dataset size for:
+# - baseline: whole history loaded as a list, float64 features, 1 worker
+# - parallel: cursor-like stream in chunks, float32, all cores
+# - budget:   as parallel, plus max_samples=0.5 and a 64 MB memory budget
+#
+# Each run happens in a fresh process so peak RSS is not shared.
+#
+#   python -m benchmarks.bench_training [sizes...]
+
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+VARIANTS = {
+    "baseline": dict(n_jobs=1, float32=False, stream=False),
+    "parallel": dict(n_jobs=-1, float32=True, stream=True),
+    "budget": dict(n_jobs=-1, float32=True, stream=True, max_samples=0.5, memory_budget_mb=64),
+}
+
+
+def synthetic_loans(count, seed=0):
+    """Loan documents as a Mongo cursor would yield them"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        amount = rng.randint(10_000, 2_000_000)
+        income = rng.choice([None, rng.randint(100_000, 5_000_000)])
+        ratio = amount / income if income else 5
+        label = "High" if ratio > 2 else "Medium" if ratio > 0.5 else "Low"
+        if rng.random() < 0.1:
+            label = rng.choice(["Low", "Medium", "High"])
+        loan = {"amount": amount, "risk_label": label}
+        if income:
+            loan["annual_income"] = income
+        if rng.random() < 0.7:
+            loan["pan"] = "ABCDE1234F"
+        yield loan
+
+
+def _run(variant, size, results):
+    from utils.ml_risk_model import LoanRiskMLModel, TrainingConfig
+    from utils.model_store import ModelStore
+
+    options = dict(VARIANTS[variant])
+    stream = options.pop("stream")
+    config = TrainingConfig(**options)
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        model = LoanRiskMLModel(store=ModelStore(store_dir), config=config)
+        start = time.perf_counter()
+        loans = synthetic_loans(size)
+        if not stream:
+            loans = list(loans)
+        model.train(loans)
+        elapsed = time.perf_counter() - start
+        rows = model.metadata().get("training_size")
+
+    # ru_maxrss is in KB on Linux
+    results.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, rows))
+
+
+def main(sizes=(20_000, 100_000, 400_000)):
+    context = multiprocessing.get_context("spawn")
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'loans':>9} {'variant':>9} {'wall s':>8} {'peak RSS MB':>12} {'rows fitted':>12}")
+    for size in sizes:
+        for variant in VARIANTS:
+            results = context.Queue()
+            process = context.Process(target=_run, args=(variant, size, results))
+            process.start()
+            elapsed, peak_mb, rows = results.get()
+            process.join()
+            print(f"{size:>9} {variant:>9} {elapsed:>8.2f} {peak_mb:>12.0f} {rows:>12}")
+
+
+if __name__ == "__main__":
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (20_000, 100_000, 400_000))
@@ -1,10 +1,20 @@
 # modules/analytics.py
 
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
-from utils.data_handler import load_loans
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel
+from PyQt5.QtCore import QTimer
+from utils.qt_async import run_async
+from utils.async_db import get_portfolio_summary
+from utils.change_feed import get_loan_feed
+from modules.charts import ChartLabel, PieChart, StackedBarChart
 
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+# Coalesce bursts of loan changes into one statistics read
+LIVE_REFRESH_DELAY_MS = 500
+
+RISK_LABELS = ["High", "Medium", "Low"]
+RISK_COLORS = {"High": "#d62728", "Medium": "#ff7f0e", "Low": "#2ca02c"}
+
+# Months shown on the trend charts
+TREND_MONTHS = 12
 
 
 class Analytics(QWidget):
@@ -22,22 +32,51 @@ class Analytics(QWidget):
         self.summary_label = QLabel()
         layout.addWidget(self.summary_label)
 
-        # Chart area
-        self.figure = Figure(figsize=(5, 4))
-        self.canvas = FigureCanvas(self.figure)
-        layout.addWidget(self.canvas)
+        # Chart area: redrawn only when the numbers change
+        self.pie = ChartLabel(PieChart("Risk Distribution", empty_text="No loan data available"))
+        layout.addWidget(self.pie, 3)
+
+        trends = QHBoxLayout()
+        self.exposure = ChartLabel(StackedBarChart(
+            "Exposure by Month Added", colors=RISK_COLORS, ylabel="₹"
+        ))
+        trends.addWidget(self.exposure)
+        self.migration = ChartLabel(StackedBarChart(
+            "Risk Migration", colors={"Worsened": "#d62728", "Improved": "#2ca02c"},
+            ylabel="Loans", empty_text="No risk label changes yet"
+        ))
+        trends.addWidget(self.migration)
+        layout.addLayout(trends, 2)
+
+        # The aggregates are kept up to date on every write, so a loan
+        # change only needs a re-read of the one statistics document
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(LIVE_REFRESH_DELAY_MS)
+        self.live_timer.timeout.connect(self.reload_stats)
+        get_loan_feed().changed.connect(self.loans_changed)
 
         self.refresh_stats()
 
     def refresh_stats(self):
-        loans = load_loans()
+        # Fetch in the background; show_stats runs when the data arrives
+        self.summary_label.setText("Loading portfolio statistics...")
+        self.reload_stats()
+
+    def loans_changed(self, changes):
+        self.live_timer.start()
+
+    def reload_stats(self):
+        run_async(get_portfolio_summary(), on_result=self.show_stats)
+
+    def show_stats(self, summary):
 
-        total_loans = len(loans)
-        total_amount = sum(l["amount"] for l in loans) if loans else 0
+        total_loans = summary.total_loans
+        total_amount = summary.total_amount
 
-        high = len([l for l in loans if l["risk_label"] == "High"])
-        medium = len([l for l in loans if l["risk_label"] == "Medium"])
-        low = len([l for l in loans if l["risk_label"] == "Low"])
+        high = summary.count("High")
+        medium = summary.count("Medium")
+        low = summary.count("Low")
 
         self.summary_label.setText(
             f"Total Loans: {total_loans}\n"
@@ -45,22 +84,21 @@ class Analytics(QWidget):
             f"High Risk: {high} | Medium Risk: {medium} | Low Risk: {low}"
         )
 
-        # ---- PIE CHART ----
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-
-        labels = ["High Risk", "Medium Risk", "Low Risk"]
-        values = [high, medium, low]
-
-        if sum(values) == 0:
-            ax.text(0.5, 0.5, "No loan data available", ha="center", va="center")
-        else:
-            ax.pie(
-                values,
-                labels=labels,
-                autopct="%1.1f%%",
-                startangle=90
-            )
-            ax.set_title("Risk Distribution")
-
-        self.canvas.draw()
+        # ---- CHARTS (pre-aggregated series only) ----
+        self.pie.set_data((
+            ("High Risk", high),
+            ("Medium Risk", medium),
+            ("Low Risk", low),
+        ))
+
+        months, exposure = summary.exposure_by_month(RISK_LABELS, last=TREND_MONTHS)
+        self.exposure.set_data((
+            tuple(months),
+            tuple((label, tuple(exposure[label])) for label in RISK_LABELS)
+        ))
+
+        months, worsened, improved = summary.migration_by_month(last=TREND_MONTHS)
+        self.migration.set_data((
+            tuple(months),
+            (("Worsened", tuple(worsened)), ("Improved", tuple(improved)))
+        ))
@@ -5,7 +5,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, pyqtSignal
 from utils.security import hash_password, verify_password
 from utils.session import SessionManager
-from utils.user_db import UserDatabase
+from utils.qt_async import run_async
 
 class LoginWindow(QWidget):
     # Signal emitted when login succeeds
@@ -16,7 +16,9 @@ class LoginWindow(QWidget):
         self.setWindowTitle("LoanOps Copilot - Login")
         self.setFixedSize(400, 500)
         
-        self.db = UserDatabase()
+        # The database layer (pymongo, motor) is imported on first use,
+        # so it does not delay the window
+        self.db = None
         self.session = SessionManager()
         
         self.init_ui()
@@ -56,9 +58,9 @@ class LoginWindow(QWidget):
         layout.addWidget(self.password_input)
         
         # Login Button
-        login_btn = QPushButton("Login")
-        login_btn.clicked.connect(self.login)
-        layout.addWidget(login_btn)
+        self.login_btn = QPushButton("Login")
+        self.login_btn.clicked.connect(self.login)
+        layout.addWidget(self.login_btn)
         
         # Register link
         register_layout = QHBoxLayout()
@@ -74,6 +76,9 @@ class LoginWindow(QWidget):
         layout.addStretch()
     
     def login(self):
+        if not self.login_btn.isEnabled():
+            return  # lookup already in flight
+        
         username = self.username_input.text().strip()
         password = self.password_input.text()
         
@@ -81,7 +86,19 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, "Error", "Please enter both username and password")
             return
         
-        user = self.db.get_user(username)
+        # Look the user up off the GUI thread
+        from utils import async_db
+        self.login_btn.setEnabled(False)
+        self.login_btn.setText("Signing in...")
+        run_async(
+            async_db.get_user(username),
+            on_result=lambda user: self.finish_login(username, password, user),
+            on_error=self.on_login_error
+        )
+    
+    def finish_login(self, username, password, user):
+        self.login_btn.setEnabled(True)
+        self.login_btn.setText("Login")
         
         if user and verify_password(password, user['password_hash']):
             self.session.create_session(user['username'], user['role'])
@@ -92,7 +109,15 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, "Login Failed", "Invalid username or password")
             self.password_input.clear()
     
+    def on_login_error(self, error):
+        self.login_btn.setEnabled(True)
+        self.login_btn.setText("Login")
+        QMessageBox.critical(self, "Error", f"Could not reach the user database: {error}")
+    
     def show_register(self):
+        if self.db is None:
+            from utils.user_db import UserDatabase
+            self.db = UserDatabase()
         self.register_window = RegisterWindow(self.db)
         self.register_window.registration_successful.connect(self.on_registration_success)
         self.register_window.show()
@@ -0,0 +1,255 @@
+# modules/charts.py
+#
+# Offscreen chart rendering for Analytics. Each chart keeps its
+# matplotlib figure and artists between refreshes:
+# - unchanged inputs and size: the cached pixmap is returned, no drawing
+# - changed values: wedges / bars are updated in place, then re-rendered
+# - changed categories (e.g. a new month): the axes are rebuilt
+#
+# Rendering goes through the Agg canvas straight into a QPixmap, so the
+# matplotlib Qt backend is never needed.
+
+import math
+from collections import OrderedDict
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QLabel, QSizePolicy
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+# Rendered pixmaps kept per chart (e.g. a few window sizes)
+PIXMAP_CACHE_SIZE = 8
+
+# Matplotlib pie defaults, needed to re-place labels after an update
+LABEL_DISTANCE = 1.1
+PCT_DISTANCE = 0.6
+
+# Headroom above the tallest bar (matplotlib's default axis margin)
+BAR_MARGIN = 1.05
+
+
+def nice_ceiling(value):
+    """Smallest 1, 2, 2.5 or 5 x 10^n at or above value"""
+    if value <= 0:
+        return 1
+    scale = 10 ** math.floor(math.log10(value))
+    for step in (1, 2, 2.5, 5, 10):
+        if step * scale >= value:
+            return step * scale
+
+
+def compact_number(value, _position=None):
+    """Tick label: 1500 -> 1.5K, 2500000 -> 2.5M"""
+    for threshold, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= threshold:
+            return f"{value / threshold:g}{suffix}"
+    return f"{value:g}"
+
+
+class Chart:
+    """
+    Base class. data passed to render() must be hashable (tuples).
+    Subclasses implement build(data) and update(data); update returns
+    False when the chart has to be rebuilt instead.
+    """
+
+    def __init__(self, title, dpi=100):
+        self.title = title
+        self.dpi = dpi
+        self.figure = Figure(dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = None
+        self.data = None
+        self.renders = 0
+        # Set by update() when tick labels may have changed width
+        self.stale_layout = False
+        self._size = None
+        self._pixmaps = OrderedDict()
+
+    def render(self, data, width, height, pixel_ratio=1.0):
+        """QPixmap of the chart for data at width x height logical pixels"""
+        key = (data, width, height, pixel_ratio)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            return pixmap
+
+        relayout = False
+        if data != self.data:
+            if self.ax is None or not self.update(data):
+                self.figure.clear()
+                self.ax = self.figure.add_subplot(111)
+                self.build(data)
+                self.ax.set_title(self.title)
+                relayout = True
+            self.data = data
+
+        if (width, height, pixel_ratio) != self._size:
+            dpi = self.dpi * pixel_ratio
+            self.figure.set_dpi(dpi)
+            self.figure.set_size_inches(width * pixel_ratio / dpi, height * pixel_ratio / dpi)
+            self._size = (width, height, pixel_ratio)
+            relayout = True
+        if relayout or self.stale_layout:
+            # Margins only change with new artists, labels or a new size
+            self.figure.tight_layout()
+            self.stale_layout = False
+        self.canvas.draw()
+        self.renders += 1
+
+        buffer = self.canvas.buffer_rgba()
+        image = QImage(buffer, buffer.shape[1], buffer.shape[0], QImage.Format_RGBA8888)
+        # copy(): the image must not point into the canvas buffer
+        pixmap = QPixmap.fromImage(image.copy())
+        pixmap.setDevicePixelRatio(pixel_ratio)
+
+        self._pixmaps[key] = pixmap
+        while len(self._pixmaps) > PIXMAP_CACHE_SIZE:
+            self._pixmaps.popitem(last=False)
+        return pixmap
+
+    def build(self, data):
+        raise NotImplementedError
+
+    def update(self, data):
+        return False
+
+
+class PieChart(Chart):
+    """data: ((label, value), ...)"""
+
+    def __init__(self, title, empty_text="No data available", **kwargs):
+        super().__init__(title, **kwargs)
+        self.empty_text = empty_text
+        self.wedges = None
+
+    def build(self, data):
+        labels = [label for label, _ in data]
+        values = [value for _, value in data]
+        if sum(values) == 0:
+            self.wedges = None
+            self.ax.text(0.5, 0.5, self.empty_text, ha="center", va="center")
+            self.ax.set_axis_off()
+            return
+        self.wedges, self.texts, self.autotexts = self.ax.pie(
+            values,
+            labels=labels,
+            autopct="%1.1f%%",
+            startangle=90,
+            labeldistance=LABEL_DISTANCE,
+            pctdistance=PCT_DISTANCE
+        )
+
+    def update(self, data):
+        values = [value for _, value in data]
+        total = sum(values)
+        if self.wedges is None or total == 0 or [l for l, _ in data] != [l for l, _ in self.data]:
+            return False
+
+        # Same geometry ax.pie uses: counter-clockwise from 90 degrees
+        theta = 90.0
+        for wedge, text, autotext, value in zip(self.wedges, self.texts, self.autotexts, values):
+            span = 360.0 * value / total
+            wedge.set_theta1(theta)
+            wedge.set_theta2(theta + span)
+            middle = math.radians(theta + span / 2)
+            x, y = math.cos(middle), math.sin(middle)
+            text.set_position((LABEL_DISTANCE * x, LABEL_DISTANCE * y))
+            text.set_horizontalalignment("left" if x > 0 else "right")
+            autotext.set_position((PCT_DISTANCE * x, PCT_DISTANCE * y))
+            autotext.set_text(f"{100.0 * value / total:.1f}%")
+            theta += span
+        return True
+
+
+class StackedBarChart(Chart):
+    """data: (categories, ((series name, values), ...))"""
+
+    def __init__(self, title, colors=None, ylabel=None, empty_text="No data available", **kwargs):
+        super().__init__(title, **kwargs)
+        self.colors = colors or {}
+        self.ylabel = ylabel
+        self.empty_text = empty_text
+        self.containers = None
+
+    def build(self, data):
+        categories, series = data
+        if not categories:
+            self.containers = None
+            self.ax.text(0.5, 0.5, self.empty_text, ha="center", va="center")
+            self.ax.set_axis_off()
+            return
+        positions = range(len(categories))
+        bottoms = [0] * len(categories)
+        self.containers = []
+        for name, values in series:
+            container = self.ax.bar(
+                positions, values, bottom=bottoms, label=name, color=self.colors.get(name)
+            )
+            self.containers.append(container)
+            bottoms = [bottom + value for bottom, value in zip(bottoms, values)]
+        self.ax.set_xticks(list(positions))
+        self.ax.set_xticklabels(categories, rotation=45, ha="right", fontsize=8)
+        self.ax.yaxis.set_major_formatter(FuncFormatter(compact_number))
+        self._set_top(bottoms)
+        if self.ylabel:
+            self.ax.set_ylabel(self.ylabel)
+        self.ax.legend(fontsize=8)
+
+    def update(self, data):
+        categories, series = data
+        old_categories, old_series = self.data
+        if (
+            self.containers is None
+            or categories != old_categories
+            or [name for name, _ in series] != [name for name, _ in old_series]
+        ):
+            return False
+
+        bottoms = [0] * len(categories)
+        for container, (_, values) in zip(self.containers, series):
+            for bar, bottom, value in zip(container.patches, bottoms, values):
+                bar.set_y(bottom)
+                bar.set_height(value)
+            bottoms = [bottom + value for bottom, value in zip(bottoms, values)]
+        limits = self.ax.get_ylim()
+        self._set_top(bottoms)
+        self.stale_layout = self.ax.get_ylim() != limits
+        return True
+
+    def _set_top(self, totals):
+        # Cheaper than relim() over every bar; a rounded top keeps the
+        # axis (and layout) unchanged across small updates
+        self.ax.set_ylim(0, nice_ceiling(max(totals) * BAR_MARGIN))
+
+
+class ChartLabel(QLabel):
+    """Shows a Chart, re-rendered (or taken from its cache) on data or size changes"""
+
+    def __init__(self, chart, parent=None):
+        super().__init__(parent)
+        self.chart = chart
+        self.data = None
+        # Ignored: the pixmap must not drive the label's size
+        self.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.setMinimumSize(200, 150)
+
+    def set_data(self, data):
+        if data != self.data:
+            self.data = data
+            self._render()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._render()
+
+    def _render(self):
+        if self.data is None or not self.isVisible():
+            return
+        self.setPixmap(self.chart.render(
+            self.data, self.width(), self.height(), self.devicePixelRatioF()
+        ))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._render()
@@ -9,12 +9,11 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 
-from modules.origination import Origination
-from modules.monitoring import Monitoring
-from modules.analytics import Analytics
-from modules.executive_summary import ExecutiveSummary
 from utils.session import SessionManager
 
+# Screens are imported when their card is opened (or by utils.warmup in
+# the background): they pull in sklearn, matplotlib, pdfplumber, ...
+
 
 class Dashboard(QWidget):
     def __init__(self):
@@ -133,18 +132,22 @@ class Dashboard(QWidget):
 
     # ---------- NAVIGATION ----------
     def open_origination(self):
+        from modules.origination import Origination
         self.o = Origination()
         self.o.show()
 
     def open_monitoring(self):
+        from modules.monitoring import Monitoring
         self.m = Monitoring()
         self.m.show()
 
     def open_analytics(self):
+        from modules.analytics import Analytics
         self.a = Analytics()
         self.a.show()
 
     def open_executive_summary(self):
+        from modules.executive_summary import ExecutiveSummary
         self.e = ExecutiveSummary()
         self.e.show()
     
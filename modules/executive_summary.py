@@ -1,7 +1,8 @@
 # modules/executive_summary.py
 
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
-from utils.data_handler import load_loans
+from utils.qt_async import run_async
+from utils.async_db import get_portfolio_summary
 
 
 class ExecutiveSummary(QWidget):
@@ -21,16 +22,19 @@ class ExecutiveSummary(QWidget):
         self.refresh_summary()
 
     def refresh_summary(self):
-        loans = load_loans()
+        self.summary_label.setText("Loading portfolio summary...")
+        run_async(get_portfolio_summary(), on_result=self.show_summary)
 
-        total_loans = len(loans)
-        total_amount = sum(l["amount"] for l in loans) if loans else 0
+    def show_summary(self, summary):
 
-        high_risk_loans = [l for l in loans if l["risk_label"] == "High"]
-        medium_risk_loans = [l for l in loans if l["risk_label"] == "Medium"]
+        total_loans = summary.total_loans
+        total_amount = summary.total_amount
 
-        high_risk_amount = sum(l["amount"] for l in high_risk_loans)
-        medium_risk_amount = sum(l["amount"] for l in medium_risk_loans)
+        high_risk_count = summary.count("High")
+        medium_risk_count = summary.count("Medium")
+
+        high_risk_amount = summary.amount("High")
+        medium_risk_amount = summary.amount("Medium")
 
         if high_risk_amount > 0:
             recommendation = "Immediate monitoring required for high-risk loans."
@@ -40,8 +44,8 @@ class ExecutiveSummary(QWidget):
         self.summary_label.setText(
             f"Total Loans: {total_loans}\n"
             f"Total Portfolio Value: ₹{total_amount}\n\n"
-            f"High Risk Loans: {len(high_risk_loans)}\n"
-            f"Medium Risk Loans: {len(medium_risk_loans)}\n\n"
+            f"High Risk Loans: {high_risk_count}\n"
+            f"Medium Risk Loans: {medium_risk_count}\n\n"
             f"₹ At Risk (High): ₹{high_risk_amount}\n"
             f"₹ Under Watch (Medium): ₹{medium_risk_amount}\n\n"
             f"Recommendation:\n{recommendation}"
@@ -0,0 +1,343 @@
+# modules/loan_table.py
+#
+# Table model for the loan list. Rows are fetched from MongoDB one keyset
+# page at a time as the view scrolls (canFetchMore / fetchMore), and
+# sorting and filtering run on the server, so opening and scrolling cost
+# the same for 500 loans or 500k.
+
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor
+from utils.qt_async import run_async
+from utils.data_handler import matches_filter, sort_key
+from utils import async_db
+
+# (field, header)
+COLUMNS = [
+    ("borrower", "Borrower"),
+    ("amount", "Amount"),
+    ("risk_label", "Risk"),
+    ("risk_score", "Score"),
+]
+
+# loan_id identifies a row independently of its position; _id places
+# live changes (change stream deletes carry only the _id)
+ROW_FIELDS = ["_id", "loan_id"] + [field for field, _ in COLUMNS]
+
+PAGE_SIZE = 200
+
+# Full loan documents kept for the details panel
+DETAIL_CACHE_SIZE = 256
+
+# Rows above and below the selection whose details are fetched ahead
+PREFETCH_NEIGHBOURS = 5
+
+# Recount matching loans at most this often while changes stream in
+RECOUNT_DELAY_MS = 1000
+
+# Newest loans first until a column header is clicked
+DEFAULT_SORT = ("_id", -1)
+
+RISK_COLORS = {
+    "High": QColor(Qt.red),
+    "Medium": QColor(Qt.darkYellow),
+    "Low": QColor(Qt.darkGreen),
+}
+
+
+class LoanTableModel(QAbstractTableModel):
+    """
+    Lazily paged loan rows. Qt.UserRole returns the row's loan dict.
+
+    Call refresh() to (re)load from the first page; set_filter() and
+    sort() reload with the new query.
+    """
+
+    # rows loaded so far, total matching loans (None until counted)
+    loaded = pyqtSignal(int, object)
+
+    def __init__(self, page_size=PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.filter = {}
+        self.sort_spec = DEFAULT_SORT
+        self.total = None
+        self._rows = []
+        self._after = None
+        self._exhausted = True
+        self._loading = False
+        self._ids = set()
+        # Bumped on every reload so pages of an older query are dropped
+        self._generation = 0
+        self._recount_timer = QTimer(self)
+        self._recount_timer.setSingleShot(True)
+        self._recount_timer.setInterval(RECOUNT_DELAY_MS)
+        self._recount_timer.timeout.connect(self._recount)
+
+    # ---------- QUERY ----------
+    def refresh(self):
+        self._generation += 1
+        self.beginResetModel()
+        self._rows = []
+        self._ids = set()
+        self._after = None
+        self._exhausted = False
+        self._loading = False
+        self.total = None
+        self.endResetModel()
+
+        self._recount()
+        self.fetchMore(QModelIndex())
+
+    def _recount(self):
+        generation = self._generation
+        run_async(
+            async_db.count_loans(self.filter),
+            on_result=lambda total: self._counted(generation, total)
+        )
+
+    def set_filter(self, filter):
+        self.filter = filter
+        self.refresh()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0:
+            spec = DEFAULT_SORT
+        else:
+            spec = (COLUMNS[column][0], 1 if order == Qt.AscendingOrder else -1)
+        if spec != self.sort_spec:
+            self.sort_spec = spec
+            self.refresh()
+
+    # ---------- LAZY FETCH ----------
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._loading = True
+        generation = self._generation
+        run_async(
+            async_db.page_loans(
+                after=self._after,
+                limit=self.page_size,
+                fields=ROW_FIELDS,
+                filter=self.filter,
+                sort=self.sort_spec
+            ),
+            on_result=lambda page: self._page_loaded(generation, page),
+            on_error=lambda e: self._page_failed(generation, e)
+        )
+
+    def _page_loaded(self, generation, page):
+        if generation != self._generation:
+            return
+        loans, next_after = page
+        self._loading = False
+        self._after = next_after
+        self._exhausted = next_after is None
+        # A live insert may already have placed a loan of this page
+        loans = [loan for loan in loans if loan["_id"] not in self._ids]
+        if loans:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(loans) - 1)
+            self._rows.extend(loans)
+            self._ids.update(loan["_id"] for loan in loans)
+            self.endInsertRows()
+        self.loaded.emit(len(self._rows), self.total)
+
+    def _page_failed(self, generation, error):
+        if generation != self._generation:
+            return
+        print(f"Loading loans failed: {error}")
+        # Stop paging; refresh() retries
+        self._loading = False
+        self._exhausted = True
+
+    def _counted(self, generation, total):
+        if generation == self._generation:
+            self.total = total
+            self.loaded.emit(len(self._rows), total)
+
+    # ---------- LIVE CHANGES ----------
+    def apply_changes(self, changes):
+        """
+        Apply a utils.change_feed batch: rows are inserted, moved, updated
+        or removed in place, without reloading the list. The feed turns
+        bursts too large for that into a reset, which reloads.
+        """
+        if any(c["op"] == "reset" for c in changes):
+            self.refresh()
+            return
+        for change in changes:
+            if change["op"] == "delete":
+                self._remove(change["_id"])
+            else:
+                self._upsert(change["loan"])
+        self._recount_timer.start()
+
+    def _row_of(self, _id):
+        if _id not in self._ids:
+            return None
+        for row, loan in enumerate(self._rows):
+            if loan["_id"] == _id:
+                return row
+        return None
+
+    def loan_id_of(self, _id):
+        """loan_id of a loaded row by _id (change stream deletes carry only the _id)"""
+        row = self._row_of(_id)
+        return None if row is None else self._rows[row].get("loan_id")
+
+    def _remove(self, _id):
+        row = self._row_of(_id)
+        if row is not None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._rows[row]
+            self._ids.discard(_id)
+            self.endRemoveRows()
+
+    def _position(self, loan):
+        """Row the loan belongs at among the loaded rows (binary search)"""
+        field, direction = self.sort_spec
+        key = sort_key(loan, field)
+        low, high = 0, len(self._rows)
+        while low < high:
+            middle = (low + high) // 2
+            other = sort_key(self._rows[middle], field)
+            before = other < key if direction > 0 else other > key
+            if before:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _upsert(self, loan):
+        row_loan = {field: loan[field] for field in ROW_FIELDS if field in loan}
+        row = self._row_of(loan["_id"])
+        if not matches_filter(loan, self.filter):
+            if row is not None:
+                self._remove(loan["_id"])
+            return
+
+        if row is not None:
+            field = self.sort_spec[0]
+            if sort_key(self._rows[row], field) == sort_key(row_loan, field):
+                # Same place in the order: repaint the row in place
+                self._rows[row] = row_loan
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+                return
+            self._remove(loan["_id"])
+
+        position = self._position(row_loan)
+        # Past the loaded rows: the loan arrives with a later page
+        if position == len(self._rows) and not self._exhausted:
+            return
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._rows.insert(position, row_loan)
+        self._ids.add(row_loan["_id"])
+        self.endInsertRows()
+
+    # ---------- MODEL ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def loan(self, row):
+        return self._rows[row]
+
+    def neighbour_ids(self, row, distance=PREFETCH_NEIGHBOURS):
+        """loan_ids of the loaded rows around row (excluding row itself)"""
+        rows = self._rows[max(row - distance, 0):row] + self._rows[row + 1:row + distance + 1]
+        return [loan["loan_id"] for loan in rows if "loan_id" in loan]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        loan = self._rows[index.row()]
+        field = COLUMNS[index.column()][0]
+
+        if role == Qt.DisplayRole:
+            value = loan.get(field)
+            if value is None:
+                return ""
+            return f"₹{value}" if field == "amount" else str(value)
+        if role == Qt.ForegroundRole:
+            return RISK_COLORS.get(loan.get("risk_label"), RISK_COLORS["Low"])
+        if role == Qt.TextAlignmentRole and field in ("amount", "risk_score"):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.UserRole:
+            return loan
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section][1]
+        return None
+
+
+class LoanDetailCache:
+    """
+    Full loan documents by loan_id for the details panel: a small LRU,
+    filled by point lookups and by prefetching the rows around the
+    selection in one $in query.
+    """
+
+    def __init__(self, max_entries=DETAIL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._loans = OrderedDict()
+        self._pending = set()
+
+    def get(self, loan_id):
+        loan = self._loans.get(loan_id)
+        if loan is not None:
+            self._loans.move_to_end(loan_id)
+        return loan
+
+    def put_many(self, loans):
+        for loan_id, loan in loans.items():
+            self._loans[loan_id] = loan
+            self._loans.move_to_end(loan_id)
+        while len(self._loans) > self.max_entries:
+            self._loans.popitem(last=False)
+
+    def invalidate(self, loan_id):
+        self._loans.pop(loan_id, None)
+
+    def clear(self):
+        self._loans.clear()
+
+    def fetch(self, loan_id, on_result):
+        """on_result(loan or None), immediately when cached"""
+        loan = self.get(loan_id)
+        if loan is not None:
+            on_result(loan)
+            return
+
+        def loaded(loan):
+            if loan is not None:
+                self.put_many({loan_id: loan})
+            on_result(loan)
+        run_async(async_db.get_loan(loan_id), on_result=loaded)
+
+    def prefetch(self, loan_ids):
+        """Load the uncached ones among loan_ids with a single query"""
+        missing = [
+            loan_id for loan_id in loan_ids
+            if loan_id not in self._loans and loan_id not in self._pending
+        ]
+        if not missing:
+            return
+        self._pending.update(missing)
+
+        def loaded(loans):
+            self._pending.difference_update(missing)
+            self.put_many(loans)
+
+        def failed(error):
+            self._pending.difference_update(missing)
+            print(f"Prefetching loan details failed: {error}")
+        run_async(async_db.get_loans(missing), on_result=loaded, on_error=failed)
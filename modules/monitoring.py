@@ -1,48 +1,43 @@
 
 # modules/monitoring.py
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QListWidget
-from utils.data_handler import load_loans
-
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QListWidget, 
-    QListWidgetItem, QPushButton, QLabel, QFrame, QMessageBox, QTextEdit
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView, QHeaderView, QAbstractItemView,
+    QPushButton, QLabel, QFrame, QMessageBox, QTextEdit, QProgressBar,
+    QComboBox, QLineEdit
 )
-from PyQt5.QtCore import Qt
-from utils.data_handler import load_loans, save_loan
-from utils.ml_risk_model import LoanRiskMLModel
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QDoubleValidator
+from collections import Counter
+from itertools import islice
+from utils.data_handler import iter_loans, count_loans, bulk_update_loans, backfill_loan_ids, loan_filter
+from utils.ml_risk_model import get_model
+from utils.portfolio_stats import rebuild_portfolio_stats, record_migrations
+from utils.tasks import get_task_runner
+from utils.retrain import train_full, train_new_loans
+from utils.change_feed import get_loan_feed
+from modules.loan_table import LoanTableModel, LoanDetailCache
 import json
 
+TRAINING_FIELDS = ["amount", "annual_income", "pan", "risk_label"]
 
-class Monitoring(QWidget):
-    def __init__(self):
-        super().__init__()
+# Loans scored and written back per re-prediction step
+REPREDICT_CHUNK_SIZE = 5000
 
-        self.setWindowTitle("Loan Monitoring")
+# Wait for typing to pause before querying the server
+FILTER_DELAY_MS = 300
 
-        layout = QVBoxLayout()
-        title = QLabel("Loan Risk Monitoring")
-        title.setObjectName("title")
-        layout.addWidget(title)
 
-        self.loan_list = QListWidget()
-        layout.addWidget(self.loan_list)
-
-        self.setLayout(layout)
-        self.refresh_loans()
-
-    def refresh_loans(self):
-        self.loan_list.clear()
-        loans = load_loans()
-        for loan in loans:
-            self.loan_list.addItem(
-                f"{loan['borrower']}: ₹{loan['amount']} | Risk: {loan['risk_label']} ({loan['risk_score']})"
-            )
+class Monitoring(QWidget):
+    def __init__(self):
+        super().__init__()
 
         self.setWindowTitle("Loan Monitoring with ML Risk Analytics")
         self.setMinimumSize(1000, 650)
         
-        # Initialize ML model
-        self.ml_model = LoanRiskMLModel()
+        # Shared ML model (loaded on first prediction)
+        self.ml_model = get_model()
+        self.runner = get_task_runner()
+        self.active_task = None
         
         self.init_ui()
         self.load_loans()
@@ -58,15 +53,20 @@ class Monitoring(QWidget):
         # Top controls
         controls = QHBoxLayout()
         
-        train_btn = QPushButton("🧠 Train ML Model")
-        train_btn.setToolTip("Train model on existing loan data")
-        train_btn.clicked.connect(self.train_model)
-        controls.addWidget(train_btn)
+        self.train_btn = QPushButton("🧠 Train ML Model")
+        self.train_btn.setToolTip("Train model on existing loan data")
+        self.train_btn.clicked.connect(self.train_model)
+        controls.addWidget(self.train_btn)
+        
+        self.update_btn = QPushButton("➕ Learn New Loans")
+        self.update_btn.setToolTip("Update the model with loans added since it was last trained")
+        self.update_btn.clicked.connect(self.update_model)
+        controls.addWidget(self.update_btn)
         
-        repredict_btn = QPushButton("🔄 Re-predict All Loans")
-        repredict_btn.setToolTip("Use trained model to re-assess all loans")
-        repredict_btn.clicked.connect(self.repredict_all)
-        controls.addWidget(repredict_btn)
+        self.repredict_btn = QPushButton("🔄 Re-predict All Loans")
+        self.repredict_btn.setToolTip("Use trained model to re-assess all loans")
+        self.repredict_btn.clicked.connect(self.repredict_all)
+        controls.addWidget(self.repredict_btn)
         
         controls.addStretch()
         
@@ -77,6 +77,21 @@ class Monitoring(QWidget):
         
         main_layout.addLayout(controls)
         
+        # Background task progress
+        progress_row = QHBoxLayout()
+        self.progress = QProgressBar()
+        self.progress.setVisible(False)
+        progress_row.addWidget(self.progress)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setVisible(False)
+        self.cancel_btn.clicked.connect(self.cancel_task)
+        progress_row.addWidget(self.cancel_btn)
+        self.queue_label = QLabel("")
+        self.queue_label.setObjectName("subtitle")
+        progress_row.addWidget(self.queue_label)
+        main_layout.addLayout(progress_row)
+        self.runner.queue_changed.connect(self.update_queue_depth)
+        
         # Content area
         content = QHBoxLayout()
         
@@ -84,9 +99,58 @@ class Monitoring(QWidget):
         left_panel = QVBoxLayout()
         left_panel.addWidget(QLabel("Active Loans:"))
         
-        self.list = QListWidget()
-        self.list.itemClicked.connect(self.show_loan_details)
-        left_panel.addWidget(self.list)
+        # Filters (evaluated on the server)
+        filters = QHBoxLayout()
+        self.risk_filter = QComboBox()
+        self.risk_filter.addItems(["All risks", "High", "Medium", "Low"])
+        self.risk_filter.currentIndexChanged.connect(self.apply_filter)
+        filters.addWidget(self.risk_filter)
+        
+        self.min_amount = QLineEdit()
+        self.min_amount.setPlaceholderText("Min amount")
+        self.max_amount = QLineEdit()
+        self.max_amount.setPlaceholderText("Max amount")
+        self.borrower_filter = QLineEdit()
+        self.borrower_filter.setPlaceholderText("Borrower starts with...")
+        
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        for field in (self.min_amount, self.max_amount):
+            field.setValidator(QDoubleValidator(0, 1e15, 2))
+        for field in (self.min_amount, self.max_amount, self.borrower_filter):
+            field.textChanged.connect(self.filter_timer.start)
+            filters.addWidget(field)
+        left_panel.addLayout(filters)
+        
+        # Only the visible rows are rendered; pages load while scrolling
+        self.loan_model = LoanTableModel(parent=self)
+        self.loan_model.loaded.connect(self.update_loan_count)
+        self.table = QTableView()
+        self.table.setModel(self.loan_model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setWordWrap(False)
+        # Fixed row heights: no per-row size hints while scrolling
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.table.selectionModel().currentRowChanged.connect(
+            lambda current, previous: self.show_loan_details(current)
+        )
+        self.details = LoanDetailCache()
+        self.selected_loan_id = None
+        # Inserts, updates and deletes by anyone arrive as deltas
+        get_loan_feed().changed.connect(self.loans_changed)
+        left_panel.addWidget(self.table)
+        
+        self.loan_count = QLabel("")
+        self.loan_count.setObjectName("subtitle")
+        left_panel.addWidget(self.loan_count)
         
         left_frame = QFrame()
         left_frame.setLayout(left_panel)
@@ -116,40 +180,86 @@ class Monitoring(QWidget):
         self.update_model_status()
 
     def load_loans(self):
-        """Load and display all loans"""
-        self.list.clear()
-        loans = load_loans()
-        
-        for idx, loan in enumerate(loans):
-            risk_label = loan.get('risk_label', 'Unknown')
-            risk_score = loan.get('risk_score', 0)
-            
-            item_text = (
-                f"{loan['borrower']} | "
-                f"₹{loan['amount']} | "
-                f"Risk: {risk_label} ({risk_score})"
-            )
-            
-            item = QListWidgetItem(item_text)
-            
-            # Color code by risk
-            if risk_label == "High":
-                item.setForeground(Qt.red)
-            elif risk_label == "Medium":
-                item.setForeground(Qt.darkYellow)
-            else:
-                item.setForeground(Qt.darkGreen)
-            
-            # Store loan data in item
-            item.setData(Qt.UserRole, idx)
-            self.list.addItem(item)
+        """Reload the loan list from its first page"""
+        self.details.clear()
+        self.loan_model.refresh()
+    
+    def apply_filter(self):
+        self.filter_timer.stop()
+        risk = self.risk_filter.currentText()
+        self.loan_model.set_filter(loan_filter(
+            risk_label=None if risk == "All risks" else risk,
+            min_amount=self._amount(self.min_amount),
+            max_amount=self._amount(self.max_amount),
+            borrower=self.borrower_filter.text().strip()
+        ))
+    
+    @staticmethod
+    def _amount(field):
+        try:
+            return float(field.text())
+        except ValueError:
+            return None
+    
+    def loans_changed(self, changes):
+        # Deleted rows are gone after apply_changes: look their loan_ids up first
+        deleted = set()
+        for change in changes:
+            if change["op"] == "delete":
+                deleted.add(change.get("loan_id") or self.loan_model.loan_id_of(change["_id"]))
+        self.loan_model.apply_changes(changes)
 
-    def show_loan_details(self, item):
+        if any(change["op"] == "reset" for change in changes) or None in deleted:
+            # A loan_id could not be resolved: any cached loan may be stale
+            self.details.clear()
+        for loan_id in deleted:
+            self.details.invalidate(loan_id)
+        changed = {change["loan"].get("loan_id") for change in changes if change["op"] == "upsert"}
+        for loan_id in changed:
+            self.details.invalidate(loan_id)
+
+        loan_id = self.selected_loan_id
+        if loan_id is None:
+            return
+        if loan_id in deleted:
+            self.selected_loan_id = None
+            self.details_text.clear()
+        elif loan_id in changed:
+            # Feed loans may hold the list columns only: fetch the document
+            def loaded(loan):
+                if loan is not None and loan_id == self.selected_loan_id:
+                    self.render_loan_details(loan)
+            self.details.fetch(loan_id, loaded)
+    
+    def update_loan_count(self, loaded, total):
+        if total is None:
+            self.loan_count.setText(f"{loaded} loans loaded")
+        else:
+            self.loan_count.setText(f"Showing {loaded} of {total} loans")
+
+    def show_loan_details(self, index):
         """Show detailed info for selected loan"""
-        loans = load_loans()
-        idx = item.data(Qt.UserRole)
-        loan = loans[idx]
+        if not index.isValid():
+            return
+        row = self.loan_model.loan(index.row())
+        loan_id = row.get("loan_id")
+        self.selected_loan_id = loan_id
         
+        if loan_id is None:
+            # Saved before loan_ids existed: only the list columns are known
+            self.render_loan_details(row)
+        else:
+            def loaded(loan):
+                # Ignore answers for a row that is no longer selected
+                if loan_id == self.selected_loan_id:
+                    self.render_loan_details(loan or row)
+            self.details.fetch(loan_id, loaded)
+        
+        # Arrow keys usually move to a neighbour next
+        self.details.prefetch(self.loan_model.neighbour_ids(index.row()))
+    
+    def render_loan_details(self, loan):
+        """Show one loan document in the details panel"""
         # Format details
         details = f"""
 
@@ -169,27 +279,97 @@ ML Confidence: {loan.get('ml_confidence', 'N/A')}
         
         self.details_text.setText(details.strip())
 
+    # ---------- BACKGROUND TASKS ----------
+    def start_task(self, fn, on_result):
+        """Run fn(task) on the task runner with the progress bar shown"""
+        self.train_btn.setEnabled(False)
+        self.update_btn.setEnabled(False)
+        self.repredict_btn.setEnabled(False)
+        self.progress.setValue(0)
+        self.progress.setVisible(True)
+        self.cancel_btn.setVisible(True)
+        
+        self.active_task = self.runner.submit(
+            fn,
+            on_result=on_result,
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Task failed: {str(e)}"),
+            on_progress=self.update_progress,
+            on_cancelled=lambda: QMessageBox.information(self, "Cancelled", "Task cancelled"),
+            on_finished=self.task_finished
+        )
+    
+    def update_progress(self, percent, message):
+        self.progress.setValue(percent)
+        self.progress.setFormat(f"{message} %p%")
+    
+    def update_queue_depth(self, pending):
+        self.queue_label.setText(f"Background tasks: {pending}" if pending else "")
+    
+    def cancel_task(self):
+        if self.active_task:
+            self.active_task.cancel()
+    
+    def task_finished(self):
+        self.active_task = None
+        self.train_btn.setEnabled(True)
+        self.update_btn.setEnabled(True)
+        self.repredict_btn.setEnabled(True)
+        self.progress.setVisible(False)
+        self.cancel_btn.setVisible(False)
+
     def train_model(self):
         """Train ML model on existing loans"""
-        loans = load_loans()
+        self.start_task(train_full, self.training_done)
+    
+    def update_model(self):
+        """Train on loans added since the last training only"""
+        self.start_task(train_new_loans, self.training_done)
+    
+    def training_done(self, outcome):
+        success, loan_count = outcome["trained"], outcome["loans"]
+        
+        if outcome["mode"] == "skipped":
+            QMessageBox.information(
+                self,
+                "Model Up to Date",
+                f"Only {loan_count} new loans since the last training - nothing to update yet."
+            )
+            return
         
-        if len(loans) < 5:
+        if outcome["mode"] == "seeded":
+            QMessageBox.information(
+                self,
+                "Model Up to Date",
+                "The current model predates incremental training. Loans added from now on "
+                "will be used by the next update; use 'Train ML Model' to refit on every loan."
+            )
+            return
+        
+        if outcome["mode"] == "needs_full":
+            QMessageBox.information(
+                self,
+                "Full Training Needed",
+                "The model cannot be updated with the new loans alone "
+                "(no model yet, or a risk label it has never seen).\n\n"
+                "Use 'Train ML Model' to refit on every loan."
+            )
+            return
+        
+        if outcome["mode"] == "full" and loan_count < 5:
             QMessageBox.warning(
                 self,
                 "Insufficient Data",
-                f"Need at least 5 loans to train model. Currently have {len(loans)} loans.\n\n"
+                f"Need at least 5 loans to train model. Currently have {loan_count} loans.\n\n"
                 "Add more loans through Loan Origination first."
             )
             return
         
-        # Train model
-        success = self.ml_model.train(loans)
-        
         if success:
             QMessageBox.information(
                 self,
                 "Training Complete",
-                f"ML model trained successfully on {len(loans)} loans!\n\n"
+                f"ML model trained successfully on {loan_count} "
+                f"{'new ' if outcome['mode'] == 'incremental' else ''}loans!\n\n"
                 "You can now use 'Re-predict All Loans' to apply the model."
             )
             self.update_model_status()
@@ -207,25 +387,72 @@ ML Confidence: {loan.get('ml_confidence', 'N/A')}
             )
             return
         
-        loans = load_loans()
+        self.start_task(self._run_repredict, self.repredict_done)
+    
+    def _run_repredict(self, task):
+        """Runs on a worker thread: scores and saves loans chunk by chunk"""
+        task.report(0, "Loading loans...")
+        
+        # Loans saved before loan_id existed need one for keyed updates
+        backfill_loan_ids()
+        total = count_loans()
+        # Streamed in _id order (updates never move a loan), one chunk in memory
+        loans = iter_loans(
+            fields=["loan_id"] + TRAINING_FIELDS, batch_size=REPREDICT_CHUNK_SIZE, sort=[("_id", 1)]
+        )
         updated_count = 0
+        # (label before, label after) -> loans, for the risk migration chart
+        transitions = Counter()
         
-        for loan in loans:
-            # Get ML prediction
-            risk_score, risk_label, confidence = self.ml_model.predict(loan)
-            
-            # Update loan data
-            loan['risk_score'] = risk_score
-            loan['risk_label'] = risk_label
-            loan['ml_confidence'] = f"{confidence:.2%}"
-            loan['prediction_method'] = 'ML Model (Random Forest)'
-            updated_count += 1
+        # One model version for the whole run, even if another is promoted
+        model = self.ml_model.frozen()
+        method = model.prediction_method()
         
-        # Save updated loans
-        save_loan(loans)
+        try:
+            while True:
+                chunk = list(islice(loans, REPREDICT_CHUNK_SIZE))
+                if not chunk:
+                    break
+                
+                # Get ML predictions for the chunk in one pass
+                predictions = model.predict_batch(chunk)
+                
+                updates = (
+                    (loan['loan_id'], {
+                        'risk_score': risk_score,
+                        'risk_label': risk_label,
+                        'ml_confidence': f"{confidence:.2%}",
+                        'prediction_method': method,
+                        'model_version': model.version
+                    })
+                    for loan, (risk_score, risk_label, confidence) in zip(chunk, predictions)
+                )
+                
+                # Save updated loans in bulk batches
+                bulk_update_loans(updates, reconcile_stats=False)
+                transitions.update(
+                    (loan.get('risk_label'), risk_label)
+                    for loan, (_, risk_label, _) in zip(chunk, predictions)
+                )
+                updated_count += len(chunk)
+                task.report(
+                    min(100 * updated_count / max(total, 1), 100),
+                    f"Re-assessed {updated_count}/{total} loans"
+                )
+        finally:
+            loans.close()
+            # Labels changed: reconcile the portfolio aggregates once,
+            # even if the task was cancelled part way
+            if updated_count:
+                rebuild_portfolio_stats()
+                record_migrations(transitions)
         
-        # Refresh display
+        return updated_count
+    
+    def repredict_done(self, updated_count):
+        # Every row changed: one reload instead of waiting for the change feed
         self.load_loans()
+        self.update_model_status()
         
         QMessageBox.information(
             self,
@@ -242,6 +469,12 @@ ML Confidence: {loan.get('ml_confidence', 'N/A')}
         else:
             self.model_status.setText("❌ Model Status: Not Trained")
             self.model_status.setStyleSheet("color: red;")
+        
+        cache = self.ml_model.prediction_cache.stats()
+        self.model_status.setToolTip(
+            f"Prediction cache: {cache['entries']} entries, "
+            f"{cache['hits']} hits / {cache['misses']} misses ({cache['hit_rate']:.0%})"
+        )
 
     def show_feature_importance(self):
         """Display which features matter most"""
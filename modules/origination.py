@@ -6,12 +6,13 @@ from utils.data_handler import save_loan
 
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, 
-    QMessageBox, QFileDialog, QHBoxLayout, QTextEdit
+    QMessageBox, QFileDialog, QHBoxLayout, QTextEdit, QProgressBar
 )
 from PyQt5.QtCore import Qt
-from utils.data_handler import load_loans, save_loan
-from utils.ml_risk_model import LoanRiskMLModel
-from utils.ocr_parser import DocumentParser
+from utils.data_handler import save_loan
+from utils.ml_risk_model import get_model
+from utils.ocr_parser import DocumentParser, ParseCancelled
+from utils.tasks import get_task_runner, TaskCancelled
 from utils.ai_model import risk_score as calculate_risk_score,risk_label as calculate_risk_label
 
 
@@ -22,10 +23,13 @@ class Origination(QWidget):
         self.setMinimumWidth(600)
         
         self.parser = DocumentParser()
-        self.ml_model = LoanRiskMLModel()
+        self.ml_model = get_model()
         self.extracted_data = {}
+        self.parse_task = None
+        self.runner = get_task_runner()
         
         self.init_ui()
+        self.runner.queue_changed.connect(self.update_queue_depth)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -49,9 +53,23 @@ class Origination(QWidget):
         layout.addWidget(self.file_label)
         
         # Parse button
-        parse_btn = QPushButton("Extract Details from Document")
-        parse_btn.clicked.connect(self.parse_document)
-        layout.addWidget(parse_btn)
+        self.parse_btn = QPushButton("Extract Details from Document")
+        self.parse_btn.clicked.connect(self.parse_document)
+        layout.addWidget(self.parse_btn)
+        
+        # Background parsing progress
+        progress_row = QHBoxLayout()
+        self.progress = QProgressBar()
+        self.progress.setVisible(False)
+        progress_row.addWidget(self.progress)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setVisible(False)
+        self.cancel_btn.clicked.connect(self.cancel_parse)
+        progress_row.addWidget(self.cancel_btn)
+        self.queue_label = QLabel("")
+        self.queue_label.setObjectName("subtitle")
+        progress_row.addWidget(self.queue_label)
+        layout.addLayout(progress_row)
         
         # Extracted data display
         layout.addWidget(QLabel("Extracted Information:"))
@@ -98,54 +116,94 @@ class Origination(QWidget):
             self.file_label.setText(f"Selected: {file_path.split('/')[-1]}")
     
     def parse_document(self):
-        """Parse uploaded document"""
+        """Parse uploaded document on a background thread"""
         if not hasattr(self, 'current_file'):
             QMessageBox.warning(self, "No File", "Please upload a document first")
             return
         
-        try:
-            # Determine file type and parse
-            if self.current_file.lower().endswith('.pdf'):
-                result = self.parser.extract_from_pdf(self.current_file)
-            else:
-                result = self.parser.extract_from_image(self.current_file)
-            
-            if 'error' in result:
-                QMessageBox.critical(self, "Parsing Error", result['error'])
-                return
-            
-            # Validate extraction
-            validation = self.parser.validate_extraction(result)
-            self.extracted_data = validation['extracted_data']
-            
-            # Display extracted data
-            display_text = "Extracted Fields:\n"
-            for key, value in self.extracted_data.items():
-                display_text += f"• {key.replace('_', ' ').title()}: {value}\n"
-            
-            if validation['missing_fields']:
-                display_text += f"\n⚠️ Missing: {', '.join(validation['missing_fields'])}"
-            
-            self.extracted_text.setText(display_text)
-            
-            # Auto-fill form fields
-            if 'borrower_name' in self.extracted_data:
-                self.name.setText(self.extracted_data['borrower_name'])
-            if 'loan_amount' in self.extracted_data:
-                self.amount.setText(self.extracted_data['loan_amount'])
-            if 'pan' in self.extracted_data:
-                self.pan.setText(self.extracted_data['pan'])
-            if 'annual_income' in self.extracted_data:
-                self.income.setText(self.extracted_data['annual_income'])
-            
-            QMessageBox.information(
-                self,
-                "Success",
-                f"Extracted {len(self.extracted_data)} fields. Please verify and submit."
-            )
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Parsing failed: {str(e)}")
+        self.parse_btn.setEnabled(False)
+        self.progress.setRange(0, 100)
+        self.progress.setValue(0)
+        self.progress.setVisible(True)
+        self.cancel_btn.setVisible(True)
+        
+        self.parse_task = self.runner.submit(
+            self._run_parse,
+            self.current_file,
+            on_result=self.show_parse_result,
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Parsing failed: {str(e)}"),
+            on_progress=self.update_progress,
+            on_finished=self.parse_finished
+        )
+    
+    def _run_parse(self, task, file_path):
+        """Runs on a worker thread: OCR / PDF extraction only, no widgets"""
+        task.report(10, "Reading document...")
+        
+        # Determine file type and parse
+        if file_path.lower().endswith('.pdf'):
+            try:
+                result = self.parser.extract_from_pdf(file_path, cancelled=lambda: task.is_cancelled)
+            except ParseCancelled:
+                raise TaskCancelled()
+        else:
+            result = self.parser.extract_from_image(file_path)
+        
+        task.report(100, "Done")
+        return result
+    
+    def update_progress(self, percent, message):
+        self.progress.setValue(percent)
+        self.progress.setFormat(f"{message} %p%")
+    
+    def update_queue_depth(self, pending):
+        self.queue_label.setText(f"Background tasks: {pending}" if pending else "")
+    
+    def cancel_parse(self):
+        if self.parse_task:
+            self.parse_task.cancel()
+    
+    def parse_finished(self):
+        self.parse_task = None
+        self.parse_btn.setEnabled(True)
+        self.progress.setVisible(False)
+        self.cancel_btn.setVisible(False)
+    
+    def show_parse_result(self, result):
+        """Show extracted fields once background parsing completes"""
+        if 'error' in result:
+            QMessageBox.critical(self, "Parsing Error", result['error'])
+            return
+        
+        # Validate extraction
+        validation = self.parser.validate_extraction(result)
+        self.extracted_data = validation['extracted_data']
+        
+        # Display extracted data
+        display_text = "Extracted Fields:\n"
+        for key, value in self.extracted_data.items():
+            display_text += f"• {key.replace('_', ' ').title()}: {value}\n"
+        
+        if validation['missing_fields']:
+            display_text += f"\n⚠️ Missing: {', '.join(validation['missing_fields'])}"
+        
+        self.extracted_text.setText(display_text)
+        
+        # Auto-fill form fields
+        if 'borrower_name' in self.extracted_data:
+            self.name.setText(self.extracted_data['borrower_name'])
+        if 'loan_amount' in self.extracted_data:
+            self.amount.setText(self.extracted_data['loan_amount'])
+        if 'pan' in self.extracted_data:
+            self.pan.setText(self.extracted_data['pan'])
+        if 'annual_income' in self.extracted_data:
+            self.income.setText(self.extracted_data['annual_income'])
+        
+        QMessageBox.information(
+            self,
+            "Success",
+            f"Extracted {len(self.extracted_data)} fields. Please verify and submit."
+        )
 
     def submit(self):
 
@@ -205,17 +263,15 @@ class Origination(QWidget):
             loan_data['risk_label'] = risk_label
             loan_data['ml_confidence'] = f"{confidence:.2%}"
             
+            loan_data['prediction_method'] = self.ml_model.prediction_method()
             if self.ml_model.is_trained:
-                loan_data['prediction_method'] = 'ML Model (Random Forest)'
-                method_text = "using trained ML model"
+                loan_data['model_version'] = self.ml_model.version
+                method_text = f"using trained ML model {self.ml_model.version}"
             else:
-                loan_data['prediction_method'] = 'Rule-based (fallback)'
                 method_text = "using rule-based system (train ML model for better accuracy)"
 
             # Save loan
-            loans = load_loans()
-            loans.append(loan_data)
-            save_loan(loans)
+            save_loan(loan_data)
 
             # Show result
             QMessageBox.information(
@@ -0,0 +1,37 @@
+# tests/conftest.py
+#
+#   pip install -r requirements-dev.txt
+#   python -m pytest tests
+
+import os
+import sys
+import types
+import mongomock
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# config.py holds the local connection settings and is not committed;
+# the tests never connect (MongoDB is replaced by mongomock)
+try:
+    import config  # noqa: F401
+except ImportError:
+    config = types.ModuleType("config")
+    config.MONGO_URI = "mongodb://localhost:27017"
+    config.DB_NAME = "loanops_test"
+    sys.modules["config"] = config
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """mongomock database behind every utils.db.get_collection import"""
+    db = mongomock.MongoClient().db
+    import utils.db
+    import utils.data_handler
+    import utils.portfolio_stats
+    import utils.change_feed
+    for module in (utils.db, utils.data_handler, utils.portfolio_stats, utils.change_feed):
+        monkeypatch.setattr(module, "get_collection", lambda name: db[name])
+    return db
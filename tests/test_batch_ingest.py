@@ -0,0 +1,120 @@
+# tests/test_batch_ingest.py
+#
+# Batch ingestion checkpoints: a run stopped part way resumes without
+# losing or re-parsing the documents whose loans were written.
+# Parsing is faked (documents hold the parser's JSON output) and runs in
+# threads instead of worker processes.
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from utils import batch_ingest, ml_risk_model, portfolio_stats
+from utils.ml_risk_model import LoanRiskMLModel
+from utils.model_store import ModelStore
+from utils.ocr_cache import file_digest
+
+INVALID, BROKEN = 3, 6
+
+
+class Interrupted(Exception):
+    pass
+
+
+def write_document(path, i):
+    if i == BROKEN:
+        path.write_text("broken")
+    elif i == INVALID:
+        path.write_text(json.dumps({"borrower_name": "No Amount"}))
+    else:
+        path.write_text(json.dumps({"borrower_name": f"Borrower {i}", "loan_amount": str(10000 * (i + 1))}))
+
+
+@pytest.fixture
+def documents(tmp_path):
+    folder = tmp_path / "scans"
+    folder.mkdir()
+    for i in range(10):
+        write_document(folder / f"doc-{i:02}.png", i)
+    (folder / "notes.txt").write_text("not a document")
+    return folder
+
+
+@pytest.fixture
+def parsed(mongo, tmp_path, monkeypatch):
+    """Paths handed to the (fake) parser"""
+    paths = []
+
+    def parse(path):
+        paths.append(path)
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+        if content == "broken":
+            return path, None, {"error": "unreadable scan"}
+        return path, file_digest(path), json.loads(content)
+
+    model = LoanRiskMLModel(store=ModelStore(root=str(tmp_path / "models")))
+    model.model_path = str(tmp_path / "risk_model.pkl")
+    model.scaler_path = str(tmp_path / "scaler.pkl")
+    monkeypatch.setattr(batch_ingest, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(batch_ingest, "_parse_document", parse)
+    monkeypatch.setattr(ml_risk_model, "get_model", lambda: model)
+    monkeypatch.setattr(portfolio_stats, "rebuild_portfolio_stats", lambda: None)
+    return paths
+
+
+def interrupt_after(count):
+    def progress(processed, total):
+        if processed == count:
+            raise Interrupted
+    return progress
+
+
+def statuses(checkpoint_path):
+    with open(checkpoint_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    return {record["path"].rsplit("/", 1)[-1]: record["status"] for record in records}
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(mongo, documents, parsed, tmp_path):
+    checkpoint = str(tmp_path / "ingest.ckpt")
+    with pytest.raises(Interrupted):
+        batch_ingest.ingest_documents(
+            str(documents), checkpoint_path=checkpoint, workers=2, chunk_size=2, progress=interrupt_after(6)
+        )
+
+    # doc-05 was parsed but its batch never written: not checkpointed
+    assert statuses(checkpoint) == {
+        "doc-00.png": "ok", "doc-01.png": "ok", "doc-02.png": "ok", "doc-03.png": "invalid", "doc-04.png": "ok",
+    }
+    assert mongo.loans.count_documents({}) == 4
+
+    parsed.clear()
+    result = batch_ingest.ingest_documents(str(documents), checkpoint_path=checkpoint, workers=2, chunk_size=2)
+    assert result == {"processed": 5, "saved": 4, "invalid": 0, "errors": 1, "skipped": 5}
+    assert sorted(path.rsplit("/", 1)[-1] for path in parsed) == [f"doc-{i:02}.png" for i in range(5, 10)]
+
+    loans = list(mongo.loans.find())
+    assert sorted(loan["borrower"] for loan in loans) == sorted(
+        f"Borrower {i}" for i in range(10) if i not in (INVALID, BROKEN)
+    )
+    assert all(loan["risk_label"] and loan["prediction_method"] for loan in loans)
+    assert statuses(checkpoint)["doc-06.png"] == "error"
+
+
+def test_finished_run_skips_everything_but_retried_failures(mongo, documents, parsed, tmp_path):
+    checkpoint = str(tmp_path / "ingest.ckpt")
+    batch_ingest.ingest_documents(str(documents), checkpoint_path=checkpoint, workers=2)
+    assert mongo.loans.count_documents({}) == 8
+
+    parsed.clear()
+    result = batch_ingest.ingest_documents(str(documents), checkpoint_path=checkpoint, workers=2)
+    assert result == {"processed": 0, "saved": 0, "invalid": 0, "errors": 0, "skipped": 10}
+    assert not parsed
+
+    # The scan is fixed: only the documents without a loan are read again
+    write_document(documents / "doc-06.png", 60)
+    result = batch_ingest.ingest_documents(str(documents), checkpoint_path=checkpoint, workers=2, retry_errors=True)
+    assert result == {"processed": 2, "saved": 1, "invalid": 1, "errors": 0, "skipped": 8}
+    assert sorted(path.rsplit("/", 1)[-1] for path in parsed) == ["doc-03.png", "doc-06.png"]
+    assert statuses(checkpoint)["doc-06.png"] == "ok"
+    assert mongo.loans.count_documents({}) == 9
@@ -0,0 +1,98 @@
+# tests/test_change_feed.py
+#
+# Live changes: matches_filter / sort_key place a loan where MongoDB's
+# own query would, and the polling feed turns bursts into one reset.
+
+import random
+from datetime import timedelta
+import pytest
+from utils import change_feed, data_handler
+from utils.data_handler import loan_filter, matches_filter, sort_key
+
+FILTERS = [
+    {},
+    loan_filter(risk_label="High"),
+    loan_filter(borrower="as"),
+    loan_filter(borrower="a.b"),
+    loan_filter(min_amount=5000),
+    loan_filter(risk_label="Low", min_amount=5000, max_amount=20000),
+]
+
+
+@pytest.fixture
+def loans(mongo):
+    rng = random.Random(7)
+    docs = []
+    for i in range(300):
+        loan = {
+            "loan_id": f"L{i:03}",
+            "borrower": rng.choice(["Asha", "asok", "a.b", "axb", "Bina", None, 3]),
+            "risk_label": rng.choice(["High", "Low", "Medium", None]),
+            "risk_score": rng.choice([rng.randint(0, 100), rng.random() * 100, None, "n/a"]),
+        }
+        amount = rng.choice([rng.randint(1, 25) * 1000, 12500.5, "700", None, "missing"])
+        if amount != "missing":
+            loan["amount"] = amount
+        docs.append(loan)
+    mongo.loans.insert_many(docs)
+    return list(mongo.loans.find())
+
+
+@pytest.mark.parametrize("query", FILTERS)
+def test_matches_filter_agrees_with_find(mongo, loans, query):
+    expected = {loan["_id"] for loan in mongo.loans.find(query)}
+    assert {loan["_id"] for loan in loans if matches_filter(loan, query)} == expected
+
+
+@pytest.mark.parametrize("field", ["_id", "borrower", "amount", "risk_score"])
+@pytest.mark.parametrize("direction", [1, -1])
+def test_sort_key_agrees_with_sorted_find(mongo, loans, field, direction):
+    order = [(field, direction)] + ([("_id", direction)] if field != "_id" else [])
+    expected = [loan["_id"] for loan in mongo.loans.find().sort(order)]
+    ordered = sorted(loans, key=lambda loan: sort_key(loan, field), reverse=direction < 0)
+    assert [loan["_id"] for loan in ordered] == expected
+
+
+@pytest.fixture
+def watcher(mongo):
+    batches = []
+    watcher = change_feed.LoanWatcher(batches.append, mode="poll")
+    watcher.batches = batches
+    return watcher
+
+
+def test_poll_delivers_list_fields_once(mongo, watcher):
+    watermark = data_handler.utcnow() - timedelta(seconds=1)
+    data_handler.save_loan({"loan_id": "a", "borrower": "Asha", "amount": 5000, "pan": "ABCDE1234F"})
+    seen = {}
+    changes, watermark = watcher._poll_once(watermark, seen)
+    assert [change["op"] for change in changes] == ["upsert"]
+    assert "pan" not in changes[0]["loan"]
+    assert changes[0]["loan"]["borrower"] == "Asha"
+
+    # Inside the overlap window, but already delivered
+    assert watcher._poll_once(watermark, seen)[0] == []
+
+    data_handler.delete_loan("a")
+    changes, _ = watcher._poll_once(watermark, seen)
+    assert changes == [{"op": "delete", "_id": changes[0]["_id"], "loan_id": "a"}]
+
+
+def test_poll_turns_a_burst_into_one_reset(mongo, watcher, monkeypatch):
+    monkeypatch.setattr(change_feed, "RESET_THRESHOLD", 10)
+    watermark = data_handler.utcnow() - timedelta(seconds=1)
+    data_handler.bulk_upsert_loans([{"loan_id": f"L{i}", "amount": i} for i in range(11)], reconcile_stats=False)
+    changes, watermark = watcher._poll_once(watermark, {})
+    assert changes == [{"op": "reset"}]
+
+
+def test_emit_resets_instead_of_splitting_a_burst(watcher, monkeypatch):
+    monkeypatch.setattr(change_feed, "RESET_THRESHOLD", 10)
+    monkeypatch.setattr(change_feed, "BATCH_SIZE", 4)
+    upserts = [{"op": "upsert", "_id": i, "loan": {"_id": i}} for i in range(11)]
+
+    watcher._emit(upserts[:10])
+    assert [len(batch) for batch in watcher.batches] == [4, 4, 2]
+    watcher.batches.clear()
+    watcher._emit(upserts)
+    assert watcher.batches == [[{"op": "reset"}]]
@@ -0,0 +1,50 @@
+# tests/test_features.py
+#
+# The columnar pipeline must build the same features the per-loan
+# prepare_features used to, one loan at a time.
+
+import numpy as np
+from utils.features import loan_features
+
+
+def per_loan_features(loan_data):
+    """prepare_features before the pipeline (one loan, plain Python)"""
+    loan_amount = float(loan_data.get('amount', 0))
+    annual_income = float(loan_data.get('annual_income', 0)) if loan_data.get('annual_income') else None
+    income_ratio = loan_amount / annual_income if annual_income and annual_income > 0 else 5.0
+    return [loan_amount / 100000, income_ratio, 1 if loan_data.get('pan') else 0]
+
+
+LOANS = [
+    {"amount": 350000, "annual_income": 900000, "pan": "ABCDE1234F", "risk_label": "Low"},
+    {"amount": "250000", "annual_income": "500000", "risk_label": "Medium"},
+    {"amount": 600000, "annual_income": 0, "pan": "", "risk_label": "High"},
+    {"amount": 75000.5, "annual_income": None, "pan": None},
+    {"amount": 120000, "risk_label": "Unknown"},
+    {},
+]
+
+
+def test_transform_matches_per_loan_features():
+    X = loan_features.transform(LOANS)
+    assert X.shape == (len(LOANS), len(loan_features.feature_names))
+    assert X.flags["C_CONTIGUOUS"]
+    np.testing.assert_allclose(X, [per_loan_features(loan) for loan in LOANS])
+
+
+def test_labels_and_chunks_match_transform():
+    X, y = loan_features.transform_with_labels(LOANS)
+    np.testing.assert_array_equal(X, loan_features.transform(LOANS))
+    # Missing labels count as Medium, anything else as High
+    assert y.tolist() == [0, 1, 2, 1, 2, 1]
+
+    chunks = list(loan_features.iter_chunks_with_labels(iter(LOANS), chunk_size=4))
+    assert [len(chunk_y) for _, chunk_y in chunks] == [4, 2]
+    np.testing.assert_array_equal(np.vstack([chunk_X for chunk_X, _ in chunks]), X)
+    np.testing.assert_array_equal(np.concatenate([chunk_y for _, chunk_y in chunks]), y)
+
+
+def test_float32_matrix():
+    X = loan_features.transform(LOANS, dtype=np.float32)
+    assert X.dtype == np.float32
+    np.testing.assert_allclose(X, loan_features.transform(LOANS), rtol=1e-6)
@@ -0,0 +1,114 @@
+# tests/test_loan_paging.py
+#
+# Keyset pages of the loan list against one sorted find(), with sort
+# fields holding numbers, text, null and nothing; amounts stored as numbers.
+
+import random
+import pytest
+from utils import data_handler
+
+SORTS = [
+    None, ("_id", -1),
+    ("amount", 1), ("amount", -1),
+    ("borrower", 1), ("borrower", -1),
+    ("risk_score", 1), ("risk_score", -1),
+]
+
+FILTERS = [
+    {},
+    data_handler.loan_filter(risk_label="High"),
+    data_handler.loan_filter(borrower="as"),
+    data_handler.loan_filter(min_amount=5000, max_amount=20000),
+]
+
+
+@pytest.fixture
+def mixed_loans(mongo):
+    """Loans inserted raw, as older versions stored them"""
+    rng = random.Random(1)
+    loans = []
+    for i in range(240):
+        loan = {
+            "loan_id": f"L{i:03}",
+            "borrower": rng.choice(["Asha", "asok", "Bina", "Ravi", None, 7]),
+            "risk_label": rng.choice(["High", "Low", "Medium"]),
+            "risk_score": rng.choice([rng.randint(0, 100), rng.random(), None]),
+        }
+        amount = rng.choice([rng.randint(1, 25) * 1000, str(rng.randint(1, 9) * 100), None, "n/a", "missing"])
+        if amount != "missing":
+            loan["amount"] = amount
+        loans.append(loan)
+    mongo.loans.insert_many(loans)
+    return mongo
+
+
+def sorted_find(db, sort, query):
+    field, direction = sort or ("_id", 1)
+    order = [(field, direction)] + ([("_id", direction)] if field != "_id" else [])
+    return [loan["loan_id"] for loan in db.loans.find(query).sort(order)]
+
+
+@pytest.mark.parametrize("sort", SORTS)
+@pytest.mark.parametrize("query", FILTERS)
+def test_pages_follow_a_single_sorted_find(mixed_loans, sort, query):
+    seen, after = [], None
+    while True:
+        loans, after = data_handler.page_loans(
+            after=after, limit=17, fields=["loan_id"], filter=query, sort=sort
+        )
+        assert all("_id" not in loan for loan in loans)
+        seen += [loan["loan_id"] for loan in loans]
+        if after is None:
+            break
+    assert seen == sorted_find(mixed_loans, sort, query)
+
+
+@pytest.mark.parametrize("text, number", [
+    ("3,50,000", 350000), ("₹ 1200.50", 1200.5), ("Rs. 500", 500), ("INR 75", 75), (" 42 ", 42),
+])
+def test_to_number_parses_amount_text(text, number):
+    assert data_handler.to_number(text) == number
+    assert type(data_handler.to_number(text)) is type(number)
+
+
+@pytest.mark.parametrize("value", ["abc", "nan", "inf", "", None, 7, 2.5])
+def test_to_number_keeps_everything_else(value):
+    assert data_handler.to_number(value) is value
+
+
+@pytest.fixture
+def rebuilds(monkeypatch):
+    """Counts portfolio aggregate rebuilds instead of running them"""
+    calls = []
+    monkeypatch.setattr(data_handler.portfolio_stats, "rebuild_portfolio_stats", lambda: calls.append(1))
+    return calls
+
+
+def test_writes_store_numbers(mongo, rebuilds):
+    data_handler.save_loan({"loan_id": "a", "amount": "3,50,000", "annual_income": "12,00,000"})
+    data_handler.bulk_upsert_loans([{"loan_id": "b", "amount": "₹ 1200.50"}])
+    data_handler.update_loan("a", {"amount": "Rs. 500"})
+    data_handler.bulk_update_loans([("b", {"annual_income": "90000"})])
+
+    loans = {loan["loan_id"]: loan for loan in mongo.loans.find()}
+    assert loans["a"]["amount"] == 500 and loans["a"]["annual_income"] == 1200000
+    assert loans["b"]["amount"] == 1200.5 and loans["b"]["annual_income"] == 90000
+
+
+def test_backfill_brings_text_amounts_into_range_filters(mongo, rebuilds):
+    mongo.loans.insert_many([
+        {"loan_id": "text", "amount": "3,50,000", "risk_label": "High"},
+        {"loan_id": "number", "amount": 400000, "risk_label": "High"},
+        {"loan_id": "junk", "amount": "n/a", "risk_label": "Low"},
+    ])
+    in_range = data_handler.loan_filter(min_amount=300000)
+    assert data_handler.count_loans(in_range) == 1
+
+    assert data_handler.normalize_stored_numbers() == 1
+    assert len(rebuilds) == 1
+    assert data_handler.count_loans(in_range) == 2
+    assert mongo.loans.find_one({"loan_id": "junk"})["amount"] == "n/a"
+    assert "updated_at" in mongo.loans.find_one({"loan_id": "text"})
+    # Nothing left to convert
+    assert data_handler.normalize_stored_numbers() == 0
+    assert len(rebuilds) == 1
@@ -0,0 +1,144 @@
+# tests/test_model_store.py
+#
+# ModelStore versions, CURRENT pointer and rollback, and how
+# LoanRiskMLModel publishes a trained version.
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+from utils.model_store import ModelStore
+from utils.ml_risk_model import LoanRiskMLModel, TrainingConfig
+
+
+def fitted(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(30, 3))
+    y = rng.integers(0, 3, size=30)
+    return DecisionTreeClassifier(random_state=seed).fit(X, y), StandardScaler().fit(X)
+
+
+def labelled_loans(count=60):
+    labels = ["Low", "Medium", "High"]
+    return [
+        {"amount": 50000 * (i + 1), "annual_income": 400000 + 1000 * i, "pan": "ABCDE1234F" if i % 2 else "",
+         "risk_label": labels[i % 3]}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ModelStore(root=str(tmp_path / "models"))
+
+
+def test_versions_are_content_addressed(store):
+    model, scaler = fitted(1)
+    first = store.save(model, scaler, {"training_size": 30})
+    again = store.save(model, scaler, {"training_size": 30})
+    other = store.save(*fitted(2))
+    assert first == again
+    assert other != first
+    assert len(store.list_versions()) == 2
+    # Saving does not promote
+    assert store.current_version() is None
+
+
+def test_promote_and_rollback(store):
+    v1 = store.save(*fitted(1))
+    v2 = store.save(*fitted(2))
+    v3 = store.save(*fitted(3))
+    with pytest.raises(ValueError):
+        store.promote("unknown")
+
+    for version in (v1, v2, v3):
+        store.promote(version)
+    assert store.current_version() == v3
+
+    assert store.rollback() == v2
+    assert store.current_version() == v2
+    # Repeated rollbacks keep going back
+    assert store.rollback() == v1
+    with pytest.raises(ValueError):
+        store.rollback()
+    assert store.current_version() == v1
+
+
+def test_rollback_skips_repeated_promotions(store):
+    v1 = store.save(*fitted(1))
+    v2 = store.save(*fitted(2))
+    store.promote(v1)
+    store.promote(v2)
+    store.promote(v2)
+    assert store.rollback() == v1
+
+
+def test_load_round_trip_and_mmap(store):
+    model, scaler = fitted(1)
+    version = store.save(model, scaler, {"mode": "full"})
+    X = np.random.default_rng(0).normal(size=(5, 3))
+    for mmap_mode in (None, "r"):
+        loaded, loaded_scaler, metadata = store.load(version, mmap_mode=mmap_mode)
+        assert metadata["mode"] == "full"
+        assert (loaded.predict(X) == model.predict(X)).all()
+        assert np.allclose(loaded_scaler.transform(X), scaler.transform(X))
+
+
+def test_model_reloads_on_promote_and_rollback(store):
+    config = TrainingConfig(n_estimators=5, n_jobs=1)
+    trainer = LoanRiskMLModel(store=store, config=config)
+    assert trainer.train(labelled_loans())
+    first = trainer.version
+    assert store.current_version() == first
+
+    # Another window or process: picks the promoted version up on first use
+    reader = LoanRiskMLModel(store=store, config=config)
+    assert reader.prediction_method().endswith(f"{first})")
+
+    assert trainer.train(labelled_loans(90))
+    second = trainer.version
+    assert second != first
+    reader.predict(labelled_loans(1)[0])
+    assert reader.version == second
+
+    store.rollback()
+    reader.predict(labelled_loans(1)[0])
+    assert reader.version == first
+
+
+def test_failed_save_keeps_serving_the_previous_version(store, monkeypatch):
+    model = LoanRiskMLModel(store=store, config=TrainingConfig(n_estimators=5, n_jobs=1))
+    assert model.train(labelled_loans())
+    version = model.version
+    served = model.model
+
+    def broken_save(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(store, "save", broken_save)
+
+    assert not model.train(labelled_loans(90))
+    assert model.version == version
+    assert model.model is served
+    assert store.current_version() == version
+
+
+def test_saving_the_same_model_again_updates_its_metadata(store):
+    model, scaler = fitted(1)
+    version = store.save(model, scaler, {"watermark": "old", "training_size": 30})
+    created = store.metadata(version)["created_at"]
+
+    assert store.save(model, scaler, {"watermark": "new"}) == version
+    metadata = store.metadata(version)
+    assert metadata["watermark"] == "new"
+    assert metadata["training_size"] == 30
+    assert metadata["created_at"] == created
+    assert "saved_again_at" in metadata
+
+
+@pytest.mark.parametrize("backend, metric", [("forest", "oob_accuracy"), ("sgd", "holdout_accuracy")])
+def test_full_fits_record_accuracy_on_unseen_loans(store, backend, metric):
+    model = LoanRiskMLModel(store=store, backend=backend, config=TrainingConfig(n_estimators=20, n_jobs=1))
+    assert model.train(labelled_loans(90))
+    assert 0 <= model.metadata()["metrics"][metric] <= 1
+    # The OOB arrays grow with the training set: not kept in the model
+    assert not hasattr(model.model, "oob_decision_function_")
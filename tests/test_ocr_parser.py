@@ -0,0 +1,133 @@
+# tests/test_ocr_parser.py
+#
+# FieldExtractor against the plain per-pattern loop.
+
+import random
+import re
+import pytest
+from utils import ocr_parser
+from utils.ocr_parser import DocumentParser, FieldMatcher, _clean_value
+
+
+def legacy_parse_text(patterns, text):
+    """One re.search per pattern over the whole text"""
+    extracted_data = {}
+    for field, field_patterns in patterns.items():
+        for pattern in field_patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                extracted_data[field] = _clean_value(field, match.group(1))
+                break
+    return extracted_data
+
+
+KEYWORDS = [
+    "applicant", "borrower", "name", "loan amount", "amount", "PAN", "pan",
+    "annual income", "yearly income", "credit score", "CIBIL",
+]
+SEPARATORS = [" ", ": ", ":", "\n", "  :  ", ""]
+VALUES = [
+    "Ravi Kumar", "ravi kumar", "Anita Devi Sharma", "₹ 3,50,000", "Rs. 12,000", "INR 9,00,000",
+    "350000", "ABCDE1234F", "abcde1234f", "ABCD1234F", "742", "74", "1,2,3",
+]
+NOISE = [
+    "the", "facility", "shall", "be", "repaid", "clause", "\n", ".", ",", "₹",
+    # Characters IGNORECASE folds onto ASCII letters
+    "ſ", "İ", "ı", "K",
+]
+
+
+def random_document(rng):
+    parts = []
+    for _ in range(rng.randint(0, 30)):
+        kind = rng.random()
+        if kind < 0.4:
+            keyword = rng.choice(KEYWORDS)
+            keyword = rng.choice([keyword, keyword.upper(), keyword.title(), keyword.lower()])
+            parts.append(keyword + rng.choice(SEPARATORS) + rng.choice(VALUES))
+        elif kind < 0.6:
+            parts.append(rng.choice(VALUES))
+        else:
+            parts.append(rng.choice(NOISE))
+    return rng.choice([" ", "\n", ""]).join(parts)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_parse_text_matches_legacy(seed):
+    parser = DocumentParser()
+    rng = random.Random(seed)
+    for _ in range(2000):
+        text = random_document(rng)
+        assert parser.parse_text(text) == legacy_parse_text(parser.patterns, text), text
+
+
+def test_priority_beats_position():
+    parser = DocumentParser()
+    # The second loan_amount pattern matches first in the text, but the
+    # first pattern matching anywhere wins
+    text = "Amount: INR 5,000\nLoan Amount: ₹ 7,000"
+    assert parser.parse_text(text)["loan_amount"] == "7000"
+    assert parser.parse_text(text) == legacy_parse_text(parser.patterns, text)
+
+
+def test_field_matcher_matches_parse_text_on_single_page():
+    parser = DocumentParser()
+    rng = random.Random(42)
+    for _ in range(500):
+        text = random_document(rng)
+        matcher = FieldMatcher(parser.extractor)
+        matcher.feed(text)
+        # FieldMatcher terminates every page with a newline
+        assert matcher.result() == parser.parse_text(text + "\n"), text
+
+
+def test_patterns_are_read_only():
+    parser = DocumentParser()
+    with pytest.raises(TypeError):
+        parser.patterns["pan"] = ()
+    assert parser.patterns is DocumentParser().patterns
+
+
+def test_image_fields_are_cached_per_ocr_settings(tmp_path, monkeypatch):
+    from utils import ocr_parser
+    from utils.ocr_cache import OCRCache
+
+    cache = OCRCache(path=str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(ocr_parser, "get_ocr_cache", lambda: cache)
+    image = tmp_path / "scan.png"
+    image.write_bytes(b"same content for both parsers")
+
+    default = DocumentParser()
+    numeric = DocumentParser(psm=7)
+    monkeypatch.setattr(default, "_ocr_image", lambda path: "Loan Amount: 1,000")
+    monkeypatch.setattr(numeric, "_ocr_image", lambda path: "Loan Amount: 7,000")
+
+    assert default.extract_from_image(str(image)) == {"loan_amount": "1000"}
+    # A warm cache must not hand the other parser's fields back
+    assert numeric.extract_from_image(str(image)) == {"loan_amount": "7000"}
+    assert default.extract_from_image(str(image)) == {"loan_amount": "1000"}
+
+
+def test_keyword_blocks_do_not_change_results(monkeypatch):
+    # Keywords across block boundaries, and blocks that lowercase longer
+    monkeypatch.setattr(ocr_parser, "KEYWORD_BLOCK", 7)
+    parser = DocumentParser()
+    rng = random.Random(11)
+    for _ in range(1000):
+        text = random_document(rng)
+        assert parser.parse_text(text) == legacy_parse_text(parser.patterns, text), text
+
+
+def test_pdf_extraction_stops_between_pages_when_cancelled(monkeypatch):
+    parser = DocumentParser()
+    read = []
+
+    def pages(*args, **kwargs):
+        for number in range(10):
+            read.append(number)
+            yield "the facility shall be repaid"
+    monkeypatch.setattr(parser, "iter_pdf_pages", pages)
+
+    with pytest.raises(ocr_parser.ParseCancelled):
+        parser.extract_from_pdf("loan.pdf", use_cache=False, cancelled=lambda: len(read) >= 3)
+    assert read == [0, 1, 2]
@@ -0,0 +1,152 @@
+# tests/test_portfolio_stats.py
+#
+# The $inc deltas written on every save / update / delete must leave the
+# stats document where a rebuild from the loans would put it. The bulk
+# writers reconcile with one rebuild per batch instead.
+
+import random
+import pytest
+from bson import ObjectId
+from utils import data_handler, portfolio_stats
+from utils.portfolio_stats import STATS_COLLECTION, STATS_ID
+
+LABELS = ["Low", "Medium", "High", None]
+
+
+def pipeline_rows(db):
+    """SUMMARY_PIPELINE evaluated in Python (mongomock has no $convert)"""
+    groups = {}
+    for loan in db.loans.find():
+        _id = loan["_id"]
+        month = _id.generation_time.strftime("%Y-%m") if isinstance(_id, ObjectId) else None
+        try:
+            amount = float(loan.get("amount") if loan.get("amount") is not None else 0)
+        except (TypeError, ValueError):
+            amount = 0
+        group = groups.setdefault((loan.get("risk_label"), month), {"count": 0, "amount": 0})
+        group["count"] += 1
+        group["amount"] += amount
+    return [
+        {"_id": {"label": label, "month": month}, **group}
+        for (label, month), group in groups.items()
+    ]
+
+
+@pytest.fixture
+def stats(mongo, monkeypatch):
+    monkeypatch.setattr(
+        portfolio_stats, "compute_portfolio_summary",
+        lambda: portfolio_stats.summary_from_rows(pipeline_rows(mongo))
+    )
+    portfolio_stats.rebuild_portfolio_stats()
+    return mongo[STATS_COLLECTION]
+
+
+def non_empty(doc):
+    """Stats fields without the zeroed buckets deltas leave behind"""
+    buckets = {label: bucket for label, bucket in doc["buckets"].items() if bucket["count"]}
+    months = {}
+    for month, labels in doc["months"].items():
+        labels = {label: bucket for label, bucket in labels.items() if bucket["count"]}
+        if labels:
+            months[month] = labels
+    return {"count": doc["count"], "amount": doc["amount"], "buckets": buckets, "months": months}
+
+
+def test_deltas_match_a_rebuild(mongo, stats):
+    rng = random.Random(5)
+    loan_ids = []
+    for step in range(400):
+        action = rng.random()
+        if action < 0.4 or not loan_ids:
+            loan = {"amount": rng.choice([rng.randint(1, 50) * 1000, "7,500", None]),
+                    "risk_label": rng.choice(LABELS)}
+            # Loans imported with their own _id have no month
+            if rng.random() < 0.1:
+                loan["_id"] = f"legacy-{step}"
+            data_handler.save_loan(loan)
+            loan_ids.append(loan["loan_id"])
+        elif action < 0.8:
+            updates = rng.choice([
+                {"amount": rng.randint(1, 50) * 1000},
+                {"risk_label": rng.choice(LABELS)},
+                {"amount": rng.randint(1, 50) * 1000, "risk_label": rng.choice(LABELS)},
+                {"borrower": "Asha"},
+            ])
+            data_handler.update_loan(rng.choice(loan_ids), updates)
+        else:
+            loan_id = loan_ids.pop(rng.randrange(len(loan_ids)))
+            data_handler.delete_loan(loan_id)
+
+    incremental = stats.find_one({"_id": STATS_ID})
+    portfolio_stats.rebuild_portfolio_stats()
+    rebuilt = stats.find_one({"_id": STATS_ID})
+
+    assert non_empty(incremental)["months"] and "Unknown" in incremental["buckets"]
+    assert non_empty(incremental) == non_empty(rebuilt)
+    assert incremental["count"] == data_handler.count_loans()
+    # Rebuilds keep the migration history the updates recorded
+    assert rebuilt["migrations"] == incremental["migrations"]
+
+
+def test_loans_without_an_objectid_count_in_totals_only():
+    summary = portfolio_stats.summary_from_rows([
+        {"_id": {"label": "High", "month": "2024-05"}, "count": 2, "amount": 300.0},
+        {"_id": {"label": "High", "month": None}, "count": 1, "amount": 50.0},
+    ])
+    assert summary.count("High") == 3
+    assert summary.amount("High") == 350.0
+    assert summary.months == {"2024-05": {"High": {"count": 2, "amount": 300.0}}}
+
+
+def buckets_of(loans):
+    """Count and exposure per risk label, straight from the loans"""
+    buckets = {}
+    for loan in loans:
+        bucket = buckets.setdefault(loan.get("risk_label") or "Unknown", {"count": 0, "amount": 0})
+        bucket["count"] += 1
+        bucket["amount"] += loan["amount"]
+    return buckets
+
+
+def test_bulk_writes_reconcile_the_stats(mongo, stats):
+    rng = random.Random(7)
+    loans = [
+        {"loan_id": f"B{i:03}", "amount": str(rng.randint(1, 50) * 1000), "risk_label": rng.choice(LABELS)}
+        for i in range(45)
+    ]
+    assert data_handler.bulk_upsert_loans(loans[:30], chunk_size=8) == {"inserted": 30, "modified": 0}
+    # Re-sent loans replace the stored ones, new ones are inserted
+    for loan in loans[20:30]:
+        loan["risk_label"] = "High"
+    assert data_handler.bulk_upsert_loans(loans[20:], chunk_size=8) == {"inserted": 15, "modified": 10}
+
+    updates = [(f"B{i:03}", {"amount": 5000 * i, "risk_label": "Low"}) for i in range(0, 45, 3)]
+    assert data_handler.bulk_update_loans(updates, chunk_size=4) == len(updates)
+
+    stored = list(mongo.loans.find())
+    assert len(stored) == 45
+    assert all(isinstance(loan["amount"], int) for loan in stored)
+    doc = stats.find_one({"_id": STATS_ID})
+    assert non_empty(doc)["buckets"] == buckets_of(stored)
+    assert doc["count"] == 45 and doc["amount"] == sum(loan["amount"] for loan in stored)
+
+
+def test_bulk_writes_can_defer_the_rebuild(mongo, stats, monkeypatch):
+    rebuilds = []
+    rebuild = portfolio_stats.rebuild_portfolio_stats
+    monkeypatch.setattr(portfolio_stats, "rebuild_portfolio_stats", lambda: rebuilds.append(1) or rebuild())
+
+    loans = [{"loan_id": f"D{i}", "amount": 1000 * (i + 1), "risk_label": "Medium"} for i in range(6)]
+    data_handler.bulk_upsert_loans(loans, reconcile_stats=False)
+    data_handler.bulk_update_loans([("D0", {"risk_label": "High"})], reconcile_stats=False)
+    assert not rebuilds
+    assert stats.find_one({"_id": STATS_ID})["count"] == 0
+
+    # Fields outside the aggregates never rebuild them
+    assert data_handler.bulk_update_loans([("D1", {"borrower": "Asha"})]) == 1
+    assert not rebuilds
+
+    portfolio_stats.rebuild_portfolio_stats()
+    doc = stats.find_one({"_id": STATS_ID})
+    assert non_empty(doc)["buckets"] == buckets_of(mongo.loans.find())
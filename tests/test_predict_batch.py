@@ -0,0 +1,70 @@
+# tests/test_predict_batch.py
+#
+# predict_batch must score every loan exactly as predict does, with the
+# trained model and with the rule-based fallback.
+
+import pytest
+from utils.ml_risk_model import LoanRiskMLModel, TrainingConfig
+from utils.model_store import ModelStore
+
+LABELS = ["Low", "Medium", "High"]
+
+
+def loans(count=120):
+    return [
+        {"amount": 25000 * (i % 30 + 1), "annual_income": 250000 + 7000 * i, "pan": "ABCDE1234F" if i % 3 else "",
+         "risk_label": LABELS[i % 3]}
+        for i in range(count)
+    ]
+
+
+# Loans as they come out of the forms and older documents
+ODD_LOANS = [
+    {"amount": "350000", "annual_income": "900000", "pan": "ABCDE1234F"},
+    {"amount": 600000},
+    {"amount": 250000, "annual_income": 0, "pan": None},
+    {"amount": 150000, "annual_income": None, "pan": ""},
+    {"amount": 1200000.5, "annual_income": 40000},
+    {},
+]
+
+
+@pytest.fixture
+def model(tmp_path):
+    config = TrainingConfig(n_estimators=10, n_jobs=1)
+    model = LoanRiskMLModel(store=ModelStore(root=str(tmp_path / "models")), config=config)
+    model.model_path = str(tmp_path / "risk_model.pkl")
+    model.scaler_path = str(tmp_path / "scaler.pkl")
+    return model
+
+
+def one_by_one(model, batch):
+    """predict per loan, each scored by the model rather than the cache"""
+    results = []
+    for loan in batch:
+        model.prediction_cache.clear()
+        results.append(model.predict(loan))
+    model.prediction_cache.clear()
+    return results
+
+
+def test_rule_based_batch_matches_predict(model):
+    batch = ODD_LOANS + loans(30)
+    assert not model.is_trained
+    assert model.predict_batch(batch) == one_by_one(model, batch)
+
+
+def test_trained_batch_matches_predict(model):
+    assert model.train(loans())
+    batch = ODD_LOANS + loans(200)
+    expected = one_by_one(model, batch)
+
+    assert model.predict_batch(batch) == expected
+    # Again, now answered from the prediction cache
+    assert model.predict_batch(batch) == expected
+    assert model.prediction_cache.stats()["hits"] == len(batch)
+
+
+def test_empty_batch(model):
+    assert model.predict_batch([]) == []
+    assert model.predict_batch(iter(())) == []
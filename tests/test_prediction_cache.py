@@ -0,0 +1,77 @@
+# tests/test_prediction_cache.py
+#
+# PredictionCache keys, time-to-live and least-recently-used eviction.
+
+import numpy as np
+import pytest
+from utils import prediction_cache
+from utils.prediction_cache import PredictionCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Stands in for time.monotonic; advance with clock[0] += seconds"""
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def features(*rows):
+    return np.array(rows, dtype=np.float64)
+
+
+def test_keys_follow_version_and_rounded_features():
+    keys = PredictionCache.keys("v1", features([3.5, 0.4, 1], [3.5, 0.4 + 1e-9, 1], [3.5, 0.5, 1]))
+    assert keys[0] == keys[1] != keys[2]
+    assert PredictionCache.keys("v2", features([3.5, 0.4, 1]))[0] != keys[0]
+    # float32 matrices key like float64 ones
+    assert PredictionCache.keys("v1", features([3.5, 0.5, 1]).astype(np.float32)) == keys[2:]
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = PredictionCache(max_entries=10, ttl=60)
+    cache.put_many(["a", "b"], [1, 2])
+    clock[0] += 30
+    cache.put_many(["b"], [3])
+    assert cache.get_many(["a", "b", "c"]) == [1, 3, None]
+
+    clock[0] += 31
+    # "a" expired, "b" was rewritten 31 s ago
+    assert cache.get_many(["a", "b"]) == [None, 3]
+    assert cache.stats()["entries"] == 1
+
+    clock[0] += 30
+    assert cache.get_many(["b"]) == [None]
+    assert cache.stats() == {
+        "entries": 0, "max_entries": 10, "hits": 3, "misses": 3, "evictions": 0, "hit_rate": 0.5,
+    }
+
+
+def test_zero_ttl_never_expires(clock):
+    cache = PredictionCache(max_entries=10, ttl=0)
+    cache.put_many(["a"], [1])
+    clock[0] += 10 ** 9
+    assert cache.get_many(["a"]) == [1]
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = PredictionCache(max_entries=3, ttl=60)
+    cache.put_many(["a", "b", "c"], [1, 2, 3])
+    # Reading "a" makes "b" the least recently used
+    assert cache.get_many(["a"]) == [1]
+    cache.put_many(["d"], [4])
+    assert cache.get_many(["b"]) == [None]
+
+    # Rewriting "c" moves it to the front: "a" then "d" go
+    cache.put_many(["c", "e", "f"], [30, 5, 6])
+    assert cache.get_many(["a", "d", "c", "e", "f"]) == [None, None, 30, 5, 6]
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["evictions"] == 3
+
+
+def test_batch_larger_than_the_cache_keeps_its_tail(clock):
+    cache = PredictionCache(max_entries=2, ttl=60)
+    cache.put_many(["a", "b", "c", "d"], [1, 2, 3, 4])
+    assert cache.get_many(["a", "b", "c", "d"]) == [None, None, 3, 4]
+    cache.clear()
+    assert cache.get_many(["c"]) == [None]
@@ -0,0 +1,165 @@
+# tests/test_retrain.py
+#
+# Scheduled/incremental retraining: watermarks, no implicit full refits,
+# one training run across clients sharing a model store.
+
+from datetime import timedelta
+import joblib
+import pytest
+from bson import ObjectId
+from sklearn.ensemble import RandomForestClassifier
+from utils import retrain
+from utils.data_handler import utcnow
+from utils.ml_risk_model import LoanRiskMLModel, TrainingConfig
+from utils.model_store import ModelStore
+
+LABELS = ["Low", "Medium", "High"]
+
+
+def stamp(**ago):
+    """utcnow() minus ago, at the millisecond precision MongoDB stores"""
+    now = utcnow() - timedelta(**ago)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def make_loans(count, start=0, updated_at=None):
+    updated_at = updated_at or stamp()
+    return [
+        {"_id": ObjectId(), "amount": 40000 * (i % 25 + 1), "annual_income": 300000 + 5000 * i,
+         "pan": "ABCDE1234F" if i % 2 else "", "risk_label": LABELS[i % 3], "updated_at": updated_at}
+        for i in range(start, start + count)
+    ]
+
+
+def fit(model, loans):
+    """Full fit with the watermark train_full would record"""
+    newest = max(loan["updated_at"] for loan in loans)
+    return model.train(loans, watermark=retrain.make_watermark(newest, loans))
+
+
+@pytest.fixture
+def model(tmp_path):
+    config = TrainingConfig(n_estimators=10, n_jobs=1, max_samples=20000)
+    model = LoanRiskMLModel(store=ModelStore(root=str(tmp_path / "models")), config=config)
+    # No pre-versioning pickles unless a test writes them
+    model.model_path = str(tmp_path / "risk_model.pkl")
+    model.scaler_path = str(tmp_path / "scaler.pkl")
+    return model
+
+
+@pytest.fixture
+def no_full_refit(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("train_new_loans must never start a full refit")
+    monkeypatch.setattr(retrain, "train_full", fail)
+
+
+def legacy_model(model, tmp_path, loans):
+    """A model as imported from data/risk_model.pkl: no watermark"""
+    trainer = LoanRiskMLModel(store=ModelStore(root=str(tmp_path / "scratch")), config=model.config)
+    assert trainer.train(loans)
+    joblib.dump(trainer.model, model.model_path)
+    joblib.dump(trainer.scaler, model.scaler_path)
+
+
+def test_legacy_model_gets_a_watermark_instead_of_a_full_refit(mongo, model, tmp_path, no_full_refit):
+    loans = make_loans(90)
+    mongo.loans.insert_many(loans)
+    legacy_model(model, tmp_path, loans)
+
+    result = retrain.train_new_loans(model=model, blocking=False)
+    assert result["mode"] == "seeded"
+    assert set(retrain.parse_watermark(model.watermark())[1]) == {str(loan["_id"]) for loan in loans}
+    assert len(model.store.list_versions()) == 1
+
+    # Nothing new since the seed
+    assert retrain.train_new_loans(model=model, min_new_loans=1)["mode"] == "skipped"
+
+
+def test_incremental_update_smaller_than_max_samples(mongo, model, no_full_refit):
+    old = make_loans(90, updated_at=stamp(hours=1))
+    mongo.loans.insert_many(old)
+    assert fit(model, old)
+    base = model.version
+
+    new = make_loans(12, start=90)
+    mongo.loans.insert_many(new)
+    result = retrain.train_new_loans(model=model, min_new_loans=10)
+    assert result == {"mode": "incremental", "trained": True, "loans": 12}
+
+    metadata = model.metadata()
+    assert metadata["base_version"] == base
+    assert metadata["watermark"]["updated_at"] == new[0]["updated_at"].isoformat()
+    assert set(metadata["watermark"]["seen"]) == {str(loan["_id"]) for loan in new}
+    assert metadata["new_loans"] == 12
+    assert 0 <= metadata["metrics"]["previous_model_accuracy_on_new_loans"] <= 1
+    assert len(model.model.estimators_) == 10 + 10
+
+
+def test_no_model_needs_an_explicit_full_refit(mongo, model, no_full_refit):
+    mongo.loans.insert_many(make_loans(60))
+    assert retrain.train_new_loans(model=model)["mode"] == "needs_full"
+
+
+def test_unseen_class_needs_an_explicit_full_refit(mongo, model, no_full_refit):
+    old = [loan for loan in make_loans(90, updated_at=stamp(hours=1)) if loan["risk_label"] != "High"]
+    mongo.loans.insert_many(old)
+    assert fit(model, old)
+
+    new = make_loans(30, start=90)
+    mongo.loans.insert_many(new)
+    result = retrain.train_new_loans(model=model, min_new_loans=10)
+    assert result["mode"] == "needs_full"
+    assert isinstance(model.model, RandomForestClassifier)
+
+
+def test_scheduled_run_skips_while_another_client_trains(mongo, model):
+    old = make_loans(60)
+    mongo.loans.insert_many(old)
+    assert fit(model, old)
+
+    assert model.store.try_lock(retrain.TRAINING_LOCK)
+    try:
+        assert retrain.train_new_loans(model=model, blocking=False)["mode"] == "busy"
+    finally:
+        model.store.unlock(retrain.TRAINING_LOCK)
+    assert retrain.train_new_loans(model=model, blocking=False)["mode"] == "skipped"
+
+
+def test_many_small_updates_keep_the_base_trees(mongo, model, no_full_refit):
+    old = make_loans(90, updated_at=stamp(hours=1))
+    mongo.loans.insert_many(old)
+    assert fit(model, old)
+    base_trees = list(model.model.estimators_)
+
+    start = 90
+    for _ in range(15):
+        new = make_loans(12, start=start)
+        start += 12
+        mongo.loans.insert_many(new)
+        assert retrain.train_new_loans(model=model, min_new_loans=10)["mode"] == "incremental"
+
+    estimators = model.model.estimators_
+    assert all(a is b for a, b in zip(estimators, base_trees))
+    # Incremental trees rotate and never outnumber the base trees
+    assert len(estimators) == 2 * len(base_trees)
+    assert model.metadata()["base_trees"] == len(base_trees)
+
+
+def test_loans_stamped_behind_the_watermark_are_not_lost(mongo, model, no_full_refit):
+    old = make_loans(90, updated_at=stamp(hours=1))
+    mongo.loans.insert_many(old)
+    assert fit(model, old)
+    assert retrain.train_new_loans(model=model, min_new_loans=1)["mode"] == "skipped"
+
+    # Written after training by a client whose clock runs 3 s late, with
+    # _ids lower than any loan the model has seen
+    late = make_loans(12, start=90, updated_at=stamp(hours=1, seconds=3))
+    for i, loan in enumerate(late):
+        loan["_id"] = ObjectId.from_datetime(old[0]["_id"].generation_time - timedelta(days=1, seconds=i))
+    mongo.loans.insert_many(late)
+    result = retrain.train_new_loans(model=model, min_new_loans=10)
+    assert result == {"mode": "incremental", "trained": True, "loans": 12}
+
+    # Already trained on: the overlap re-read skips them
+    assert retrain.train_new_loans(model=model, min_new_loans=1)["mode"] == "skipped"
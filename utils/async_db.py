@@ -0,0 +1,145 @@
+# utils/async_db.py
+#
+# asyncio mirror of utils/data_handler and utils/user_db on Motor.
+# Coroutines are meant to run on the worker loop in utils/qt_async so
+# the Qt GUI thread never blocks on MongoDB.
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from config import MONGO_URI, DB_NAME
+from utils.db import client_options, pool_metrics
+from utils.data_handler import (
+    STATS_FIELDS, TOMBSTONES, _projection, new_loan_id, normalize_numbers, page_query, page_projection,
+    page_cursor, tombstone, utcnow
+)
+from utils import portfolio_stats
+
+_client = None
+
+
+def get_async_client():
+    """
+    The process-wide Motor client, created on first use.
+    Must be first called from the event loop it will run on.
+
+    Motor cannot borrow the sockets of utils.db's synchronous client, so
+    this is the one other pool in the process (used only from the worker
+    loop). It takes the same client_options() and reports into the same
+    pool_metrics, so get_pool_stats() covers both pools.
+    """
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(MONGO_URI, event_listeners=[pool_metrics], **client_options())
+    return _client
+
+
+def get_async_collection(name):
+    return get_async_client()[DB_NAME][name]
+
+
+# ---------- LOANS ----------
+async def load_loans(fields=None, filter=None, batch_size=500):
+    cursor = get_async_collection("loans").find(
+        filter or {}, _projection(fields), batch_size=batch_size
+    )
+    return await cursor.to_list(length=None)
+
+
+async def page_loans(after=None, limit=50, fields=None, filter=None, sort=None):
+    """Async version of data_handler.page_loans"""
+    query, order = page_query(after, filter, sort)
+    projection, keep_id = page_projection(fields, sort)
+
+    cursor = get_async_collection("loans").find(query, projection).sort(order).limit(limit)
+    loans = await cursor.to_list(length=limit)
+
+    next_after = page_cursor(loans, limit, sort)
+    if not keep_id:
+        for loan in loans:
+            loan.pop("_id", None)
+    return loans, next_after
+
+
+async def get_loan(loan_id, fields=None):
+    return await get_async_collection("loans").find_one({"loan_id": loan_id}, _projection(fields))
+
+
+async def get_loans(loan_ids, fields=None):
+    cursor = get_async_collection("loans").find(
+        {"loan_id": {"$in": list(loan_ids)}}, _projection(fields and ["loan_id", *fields])
+    )
+    return {loan["loan_id"]: loan async for loan in cursor}
+
+
+async def count_loans(filter=None):
+    return await get_async_collection("loans").count_documents(filter or {})
+
+
+async def save_loan(loan):
+    loan.update(normalize_numbers(loan))
+    loan.setdefault("loan_id", new_loan_id())
+    loan["updated_at"] = utcnow()
+    await get_async_collection("loans").insert_one(loan)
+    await _apply_stats(portfolio_stats.insert_delta(loan))
+
+
+async def update_loan(loan_id, updates):
+    loans = get_async_collection("loans")
+    updates = {**normalize_numbers(updates), "updated_at": utcnow()}
+    if not STATS_FIELDS.intersection(updates):
+        await loans.update_one({"loan_id": loan_id}, {"$set": updates})
+        return
+
+    before = await loans.find_one_and_update(
+        {"loan_id": loan_id},
+        {"$set": updates},
+        projection={field: 1 for field in STATS_FIELDS},
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is not None:
+        await _apply_stats(portfolio_stats.update_delta(before, {**before, **updates}))
+
+
+async def delete_loan(loan_id):
+    deleted = await get_async_collection("loans").find_one_and_delete(
+        {"loan_id": loan_id},
+        projection={field: 1 for field in STATS_FIELDS}
+    )
+    if deleted is not None:
+        await get_async_collection(TOMBSTONES).insert_one(tombstone(deleted["_id"], loan_id))
+        await _apply_stats(portfolio_stats.delete_delta(deleted))
+
+
+# ---------- PORTFOLIO STATS ----------
+async def _apply_stats(inc):
+    if inc:
+        await get_async_collection(portfolio_stats.STATS_COLLECTION).update_one(
+            {"_id": portfolio_stats.STATS_ID}, {"$inc": inc}
+        )
+
+
+async def get_portfolio_summary():
+    """Async version of portfolio_stats.get_portfolio_summary"""
+    stats = get_async_collection(portfolio_stats.STATS_COLLECTION)
+    doc = await stats.find_one({"_id": portfolio_stats.STATS_ID})
+    if portfolio_stats.is_current(doc):
+        return portfolio_stats.summary_from_document(doc)
+
+    rows = await get_async_collection("loans").aggregate(
+        portfolio_stats.SUMMARY_PIPELINE
+    ).to_list(length=None)
+    summary = portfolio_stats.summary_from_rows(rows)
+    doc = await stats.find_one_and_update(
+        {"_id": portfolio_stats.STATS_ID},
+        portfolio_stats.rebuild_update(summary),
+        projection={"migrations": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    summary.migrations = doc.get("migrations", {})
+    return summary
+
+
+# ---------- USERS ----------
+async def get_user(username):
+    return await get_async_collection("users").find_one({"username": username}, {"_id": 0})
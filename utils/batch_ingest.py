@@ -0,0 +1,235 @@
+# utils/batch_ingest.py
+#
+# Batch OCR ingestion: walk a folder (or manifest) of scanned loan
+# applications, OCR them in a process pool and stream the validated
+# records into the loans collection.
+#
+#   python -m utils.batch_ingest /scans/2026-10 --checkpoint ingest.ckpt
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from utils.ocr_parser import DocumentParser
+from utils.ocr_cache import file_digest
+
+DOCUMENT_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff")
+
+# Parsed loans written to MongoDB per bulk batch
+INGEST_CHUNK_SIZE = 500
+
+# ---------- WORKER PROCESS ----------
+_parser = None
+
+
+def _init_worker():
+    global _parser
+    _parser = DocumentParser()
+
+
+def _parse_document(path):
+    """
+    Runs in a worker process.
+    Returns: (path, content_hash, result) - result has "error" on failure
+    """
+    try:
+        content_hash = file_digest(path)
+        if path.lower().endswith(".pdf"):
+            # Already one process per core: no nested page pool
+            result = _parser.extract_from_pdf(path, parallel=False)
+        else:
+            result = _parser.extract_from_image(path)
+    except Exception as e:
+        return path, None, {"error": str(e)}
+    return path, content_hash, result
+
+
+# ---------- INPUTS ----------
+def find_documents(source):
+    """
+    Documents to ingest, in a stable order.
+    source: a directory (walked recursively) or a manifest file with one
+    path per line or a JSON list of paths
+    """
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if name.lower().endswith(DOCUMENT_EXTENSIONS):
+                    paths.append(os.path.join(root, name))
+        return sorted(paths)
+
+    with open(source, encoding="utf-8") as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        return json.loads(content)
+    return [line.strip() for line in content.splitlines() if line.strip()]
+
+
+class Checkpoint:
+    """
+    Append-only JSON lines log of processed documents, so an interrupted
+    run can resume where it stopped. A document is only logged as "ok"
+    after its loan has been written.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.done = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.done[record["path"]] = record
+
+    def is_done(self, path, retry_errors=False):
+        record = self.done.get(path)
+        if record is None:
+            return False
+        return not (retry_errors and record["status"] != "ok")
+
+    def record(self, records):
+        for record in records:
+            self.done[record["path"]] = record
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+
+
+# ---------- RECORDS ----------
+def _to_number(value):
+    return float(value) if value not in (None, "") else None
+
+
+def to_loan(path, content_hash, fields):
+    """Map parser output to a loan document keyed by document content"""
+    loan = {
+        # Same document -> same loan_id, so re-ingesting upserts
+        "loan_id": f"doc-{content_hash[:24]}",
+        "borrower": fields["borrower_name"],
+        "amount": _to_number(fields["loan_amount"]),
+        "source_document": path,
+    }
+    if fields.get("pan"):
+        loan["pan"] = fields["pan"]
+    if fields.get("annual_income"):
+        loan["annual_income"] = _to_number(fields["annual_income"])
+    if fields.get("credit_score"):
+        loan["credit_score"] = int(fields["credit_score"])
+    return loan
+
+
+def _score(loans, model):
+    predictions = model.predict_batch(loans)
+    method = model.prediction_method()
+    for loan, (risk_score, risk_label, confidence) in zip(loans, predictions):
+        loan['risk_score'] = risk_score
+        loan['risk_label'] = risk_label
+        loan['ml_confidence'] = f"{confidence:.2%}"
+        loan['prediction_method'] = method
+        if model.version:
+            loan['model_version'] = model.version
+
+
+# ---------- PIPELINE ----------
+def ingest_documents(source, checkpoint_path=None, workers=None,
+                     chunk_size=INGEST_CHUNK_SIZE, retry_errors=False, progress=None):
+    """
+    OCR every document under source in a process pool and upsert the
+    valid ones into the loans collection in bulk batches.
+
+    workers: process count (default: all cores; Tesseract is CPU-bound)
+    progress: optional callback(processed, total)
+    Returns: {"processed", "saved", "invalid", "errors", "skipped"}
+    """
+    from utils.data_handler import bulk_upsert_loans
+    from utils.ml_risk_model import get_model
+    from utils.portfolio_stats import rebuild_portfolio_stats
+
+    checkpoint = Checkpoint(checkpoint_path)
+    all_paths = find_documents(source)
+    paths = [p for p in all_paths if not checkpoint.is_done(p, retry_errors)]
+    summary = {
+        "processed": 0, "saved": 0, "invalid": 0, "errors": 0,
+        "skipped": len(all_paths) - len(paths)
+    }
+    if not paths:
+        return summary
+
+    model = get_model().frozen()
+    validator = DocumentParser()
+    pending = []
+
+    def flush():
+        if not pending:
+            return
+        loans = [loan for loan, _ in pending]
+        _score(loans, model)
+        bulk_upsert_loans(loans, reconcile_stats=False)
+        checkpoint.record([record for _, record in pending])
+        summary["saved"] += len(pending)
+        pending.clear()
+
+    workers = workers or os.cpu_count() or 1
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            results = pool.map(_parse_document, paths, chunksize=max(1, min(16, len(paths) // (workers * 4))))
+            for path, content_hash, result in results:
+                summary["processed"] += 1
+
+                if "error" in result:
+                    summary["errors"] += 1
+                    checkpoint.record([{"path": path, "status": "error", "error": result["error"]}])
+                else:
+                    validation = validator.validate_extraction(result)
+                    if not validation["is_valid"]:
+                        summary["invalid"] += 1
+                        checkpoint.record([{
+                            "path": path,
+                            "status": "invalid",
+                            "missing_fields": validation["missing_fields"]
+                        }])
+                    else:
+                        try:
+                            loan = to_loan(path, content_hash, result)
+                        except ValueError as e:
+                            summary["errors"] += 1
+                            checkpoint.record([{"path": path, "status": "error", "error": str(e)}])
+                        else:
+                            pending.append((loan, {"path": path, "status": "ok", "loan_id": loan["loan_id"]}))
+                            if len(pending) >= chunk_size:
+                                flush()
+
+                if progress:
+                    progress(summary["processed"], len(paths))
+        flush()
+    finally:
+        if summary["saved"]:
+            rebuild_portfolio_stats()
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch OCR ingestion of loan documents")
+    parser.add_argument("source", help="directory of documents or manifest file")
+    parser.add_argument("--checkpoint", help="resumable checkpoint file (JSON lines)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE)
+    parser.add_argument("--retry-errors", action="store_true", help="re-process failed documents")
+    args = parser.parse_args()
+
+    result = ingest_documents(
+        args.source,
+        checkpoint_path=args.checkpoint,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        retry_errors=args.retry_errors,
+        progress=lambda done, total: print(f"\r{done}/{total} documents", end="", flush=True)
+    )
+    print(
+        f"\nSaved {result['saved']}, invalid {result['invalid']}, "
+        f"errors {result['errors']}, skipped {result['skipped']}"
+    )
@@ -0,0 +1,254 @@
+# utils/change_feed.py
+#
+# Live feed of changes to the loans collection, so open views can apply
+# deltas instead of reloading.
+#
+# On a replica set this is a MongoDB change stream. A standalone server
+# has no change streams, so the feed polls instead: loans whose
+# updated_at moved past the last watermark, plus the tombstones that
+# data_handler.delete_loan leaves behind.
+#
+# Changes are delivered in batches, each change a dict:
+#   {"op": "upsert", "_id": ..., "loan": {...}}    inserted or updated
+#   {"op": "delete", "_id": ..., "loan_id": ...}  loan_id may be None
+#   {"op": "reset"}                               changes were missed, or a
+#                                                 burst too large to apply
+#                                                 one by one: reload
+#
+# Polled loans carry FEED_FIELDS only; fetch the document for anything else.
+#
+#   CHANGE_FEED_MODE=auto|stream|poll (default auto)
+
+import os
+import threading
+import time
+from datetime import timedelta
+from pymongo.errors import OperationFailure, PyMongoError
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+from utils.db import get_collection
+from utils.data_handler import TOMBSTONES, utcnow
+
+CHANGE_FEED_MODE = os.getenv("CHANGE_FEED_MODE", "auto")
+POLL_INTERVAL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "2"))
+
+# Writers stamp updated_at with their own clock: every poll re-reads this
+# far behind the watermark so a slightly late stamp is not missed
+POLL_OVERLAP = timedelta(seconds=5)
+
+# Fields of polled loans: the loan list's columns (modules.loan_table.ROW_FIELDS)
+FEED_FIELDS = ["_id", "loan_id", "borrower", "amount", "risk_label", "risk_score", "updated_at"]
+
+# Changes per delivered batch, how long the stream waits for more events,
+# and for how long at most a burst is collected before it is delivered
+BATCH_SIZE = 500
+BATCH_WAIT_MS = 200
+BURST_SECONDS = 1.0
+
+# A burst of more changes than this (an import, a re-prediction run) is
+# delivered as one reset: reloading a page is cheaper than applying them
+RESET_THRESHOLD = 2000
+
+RETRY_SECONDS = 5
+
+# $changeStream on a standalone server
+_NOT_REPLICA_SET = 40573
+# Resume point no longer in the oplog
+_HISTORY_LOST = 286
+
+
+class ChangeStreamUnavailable(Exception):
+    pass
+
+
+def _from_event(event):
+    """Change stream event -> change dict (None for events to ignore)"""
+    op = event["operationType"]
+    if op in ("insert", "update", "replace"):
+        loan = event.get("fullDocument")
+        # None: deleted again before the lookup; its delete event follows
+        if loan is None:
+            return None
+        return {"op": "upsert", "_id": loan["_id"], "loan": loan}
+    if op == "delete":
+        return {"op": "delete", "_id": event["documentKey"]["_id"], "loan_id": None}
+    # drop, rename, invalidate: the stream can no longer be trusted
+    return {"op": "reset"}
+
+
+class LoanWatcher:
+    """
+    Watches the loans collection on a background thread and calls
+    on_batch(changes) from that thread.
+
+    mode: "stream", "poll", or "auto" (stream, polling if unsupported)
+    """
+
+    def __init__(self, on_batch, mode=CHANGE_FEED_MODE, poll_interval=POLL_INTERVAL_SECONDS):
+        self.on_batch = on_batch
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.active_mode = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="loan-change-feed", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _emit(self, changes, overflow=False):
+        if overflow or len(changes) > RESET_THRESHOLD:
+            self.on_batch([{"op": "reset"}])
+            return
+        for start in range(0, len(changes), BATCH_SIZE):
+            self.on_batch(changes[start:start + BATCH_SIZE])
+
+    def _run(self):
+        if self.mode != "poll":
+            try:
+                self.active_mode = "stream"
+                self._stream()
+                return
+            except ChangeStreamUnavailable as e:
+                if self.mode == "stream":
+                    print(f"Loan change feed stopped: {e}")
+                    return
+                print(f"Change streams unavailable ({e}); polling for loan changes")
+        self.active_mode = "poll"
+        self._poll()
+
+    # ---------- CHANGE STREAM ----------
+    def _stream(self):
+        resume_token = None
+        opened = False
+        while not self._stop.is_set():
+            try:
+                with get_collection("loans").watch(
+                    full_document="updateLookup",
+                    resume_after=resume_token,
+                    max_await_time_ms=BATCH_WAIT_MS
+                ) as stream:
+                    opened = True
+                    # Past RESET_THRESHOLD the burst only needs counting
+                    batch, overflow, started = [], False, None
+                    while stream.alive and not self._stop.is_set():
+                        event = stream.try_next()
+                        if event is not None:
+                            change = _from_event(event)
+                            if change is not None:
+                                started = started or time.monotonic()
+                                if not overflow:
+                                    batch.append(change)
+                                    if len(batch) > RESET_THRESHOLD:
+                                        batch, overflow = [], True
+                        resume_token = stream.resume_token
+                        # Deliver when the server has nothing more right now
+                        if started and (event is None or time.monotonic() - started >= BURST_SECONDS):
+                            self._emit(batch, overflow)
+                            batch, overflow, started = [], False, None
+                    if started:
+                        self._emit(batch, overflow)
+                    # Closed by an invalidate event: start over
+                    resume_token = None
+            except OperationFailure as e:
+                if not opened and (e.code == _NOT_REPLICA_SET or "replica set" in str(e)):
+                    raise ChangeStreamUnavailable(str(e))
+                if e.code == _HISTORY_LOST:
+                    resume_token = None
+                    self._emit([{"op": "reset"}])
+                else:
+                    print(f"Loan change stream failed: {e}")
+                    self._stop.wait(RETRY_SECONDS)
+            except PyMongoError as e:
+                # Resumes from resume_token once the server is back
+                print(f"Loan change stream interrupted: {e}")
+                self._stop.wait(RETRY_SECONDS)
+
+    # ---------- POLLING FALLBACK ----------
+    def _poll(self):
+        watermark = utcnow()
+        # _id -> updated_at already delivered inside the overlap window;
+        # pruned to the window, so it holds one entry per recent change
+        seen = {}
+        while not self._stop.wait(self.poll_interval):
+            try:
+                changes, watermark = self._poll_once(watermark, seen)
+            except PyMongoError as e:
+                print(f"Polling loan changes failed: {e}")
+                continue
+            if changes:
+                self._emit(changes)
+
+    def _poll_once(self, watermark, seen):
+        since = watermark - POLL_OVERLAP
+        changes = []
+        newest = watermark
+
+        # Stamps first: loans already delivered in the overlap window are
+        # not read again, and a burst past RESET_THRESHOLD is not read at all
+        loans = get_collection("loans")
+        changed = []
+        for loan in loans.find({"updated_at": {"$gte": since}}, {"updated_at": 1}).sort("updated_at", 1):
+            stamp = loan["updated_at"]
+            if seen.get(loan["_id"]) != stamp:
+                seen[loan["_id"]] = stamp
+                changed.append(loan["_id"])
+            newest = max(newest, stamp)
+        if len(changed) > RESET_THRESHOLD:
+            changes = [{"op": "reset"}]
+        elif changed:
+            found = {loan["_id"]: loan for loan in loans.find({"_id": {"$in": changed}}, FEED_FIELDS)}
+            # Gone since the first read: its tombstone follows below
+            changes = [{"op": "upsert", "_id": _id, "loan": found[_id]} for _id in changed if _id in found]
+
+        for dead in get_collection(TOMBSTONES).find({"deleted_at": {"$gte": since}}):
+            key = ("deleted", dead["_id"])
+            if seen.get(key) != dead["deleted_at"]:
+                seen[key] = dead["deleted_at"]
+                changes.append({"op": "delete", "_id": dead["_id"], "loan_id": dead.get("loan_id")})
+            newest = max(newest, dead["deleted_at"])
+
+        cutoff = newest - POLL_OVERLAP
+        for key in [key for key, stamp in seen.items() if stamp < cutoff]:
+            del seen[key]
+        return changes, newest
+
+
+class LoanChangeFeed(QObject):
+    """Qt adapter: changed(list of changes) is emitted on the GUI thread"""
+
+    changed = pyqtSignal(list)
+
+    def __init__(self, mode=CHANGE_FEED_MODE):
+        super().__init__()
+        # Emitting from the watcher thread queues delivery to the GUI thread
+        self.watcher = LoanWatcher(self.changed.emit, mode=mode)
+
+    def start(self):
+        self.watcher.start()
+
+    def stop(self):
+        self.watcher.stop()
+
+
+_feed = None
+
+
+def get_loan_feed():
+    """Shared, started feed; create it after the QApplication exists"""
+    global _feed
+    if _feed is None:
+        _feed = LoanChangeFeed()
+        _feed.start()
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_feed.stop)
+    return _feed
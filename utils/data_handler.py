@@ -1,20 +1,421 @@
 # utils/datahandler.py
 
+import csv
+import json
+import math
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from itertools import islice
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
 from utils.db import get_collection
+from utils import portfolio_stats
 
-loans_col = get_collection("loans")
+def _loans():
+    return get_collection("loans")
 
-def load_loans():
-    return list(loans_col.find({}, {"_id": 0}))
+# Deleted loans leave a tombstone here, so pollers of updated_at
+# (utils/change_feed.py) also see deletes
+TOMBSTONES = "loan_tombstones"
+
+# Loan fields that feed the running portfolio aggregates
+STATS_FIELDS = {"amount", "risk_label"}
+
+# Operations sent per bulk_write round trip
+BULK_CHUNK_SIZE = 1000
+
+# Stored as numbers, so range filters and sorts on them see every loan
+# (Origination, OCR and CSV tapes hand them over as text)
+NUMERIC_FIELDS = ("amount", "annual_income")
+
+_NUMBER_NOISE = re.compile(r"[,\s₹]|^(?:rs\.?|inr)", re.IGNORECASE)
+
+def to_number(value):
+    """
+    "3,50,000" / "₹ 1200.50" / "Rs. 500" -> 350000 / 1200.5 / 500.
+    Numbers, and strings that are not numbers, are returned unchanged.
+    """
+    if not isinstance(value, str):
+        return value
+    try:
+        number = float(_NUMBER_NOISE.sub("", value))
+    except ValueError:
+        return value
+    if not math.isfinite(number):
+        return value
+    return int(number) if number.is_integer() else number
+
+def normalize_numbers(loan):
+    """Copy of a loan (or $set fields) with NUMERIC_FIELDS as numbers"""
+    loan = dict(loan)
+    for field in NUMERIC_FIELDS:
+        if field in loan:
+            loan[field] = to_number(loan[field])
+    return loan
+
+def new_loan_id():
+    return uuid.uuid4().hex
+
+def utcnow():
+    """Naive UTC, the form MongoDB returns dates in"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _projection(fields):
+    """Build a Mongo projection; _id is dropped unless asked for"""
+    if fields is None:
+        return {"_id": 0}
+    projection = {field: 1 for field in fields}
+    projection.setdefault("_id", 0)
+    return projection
+
+def iter_loans(fields=None, filter=None, batch_size=500, sort=None):
+    """
+    Stream loans from MongoDB instead of materializing the whole collection.
+
+    fields: only return these fields (None = all fields)
+    filter: Mongo query evaluated on the server
+    batch_size: documents fetched per round trip
+    sort: optional list of (field, direction) pairs
+    """
+    cursor = _loans().find(filter or {}, _projection(fields), batch_size=batch_size)
+    if sort:
+        cursor = cursor.sort(sort)
+    yield from cursor
+
+# MongoDB sorts mixed types by bracket: missing/null, then numbers, then strings
+_TYPE_BRACKETS = [((type(None),), None), ((int, float), "number"), ((str,), "string")]
+
+def _bracket(value):
+    for index, (types, _) in enumerate(_TYPE_BRACKETS):
+        if isinstance(value, types) and not isinstance(value, bool):
+            return index
+    return len(_TYPE_BRACKETS)
+
+def _by_id(sort):
+    return sort is None or sort[0] == "_id"
+
+def _after_query(after, sort):
+    """Loans that come after the keyset cursor in the given sort order"""
+    field, direction = sort or ("_id", 1)
+    op = "$gt" if direction > 0 else "$lt"
+    if field == "_id":
+        return {"_id": {op: after}}
+
+    value, last_id = after
+    conditions = [{field: value, "_id": {op: last_id}}]
+    if value is not None:
+        conditions.append({field: {op: value}})
+
+    # Values of other types sort before / after the whole bracket
+    bracket = _bracket(value)
+    for index, (_, type_name) in enumerate(_TYPE_BRACKETS):
+        later = index > bracket if direction > 0 else index < bracket
+        if later:
+            conditions.append({field: None} if type_name is None else {field: {"$type": type_name}})
+    return {"$or": conditions}
+
+def page_query(after=None, filter=None, sort=None):
+    """
+    Query and sort spec for one keyset page (shared with utils.async_db).
+
+    sort: (field, direction) pair; ties are broken by _id
+    Returns: (query, sort list)
+    """
+    query = filter or {}
+    if after is not None:
+        after_query = _after_query(after, sort)
+        query = {"$and": [query, after_query]} if query else after_query
+
+    if _by_id(sort):
+        return query, [("_id", sort[1] if sort else 1)]
+    field, direction = sort
+    return query, [(field, direction), ("_id", direction)]
+
+def page_cursor(loans, limit, sort=None):
+    """Cursor for the page after the last of these loans (None on the last page)"""
+    if len(loans) < limit:
+        return None
+    last = loans[-1]
+    if _by_id(sort):
+        return last["_id"]
+    return (last.get(sort[0]), last["_id"])
+
+def page_projection(fields, sort=None):
+    """
+    Projection for a page, plus whether _id was asked for. The cursor
+    needs _id and the sort field even when the caller did not ask for them.
+    """
+    projection = _projection(fields)
+    keep_id = projection.pop("_id") != 0
+    if projection:
+        projection["_id"] = 1
+        if not _by_id(sort):
+            projection[sort[0]] = 1
+    return projection or None, keep_id
+
+def page_loans(after=None, limit=50, fields=None, filter=None, sort=None):
+    """
+    Fetch one page of loans using keyset pagination.
+
+    after: the cursor returned with the previous page (None = first page)
+    sort: (field, direction) pair, e.g. ("amount", -1); None = by _id
+    Returns: (loans, next_after) - next_after is None on the last page
+    """
+    query, order = page_query(after, filter, sort)
+    projection, keep_id = page_projection(fields, sort)
+
+    loans = list(_loans().find(query, projection).sort(order).limit(limit))
+
+    next_after = page_cursor(loans, limit, sort)
+    if not keep_id:
+        for loan in loans:
+            loan.pop("_id", None)
+    return loans, next_after
+
+def loan_filter(risk_label=None, min_amount=None, max_amount=None, borrower=None):
+    """
+    Mongo filter for the loan list. Unset arguments do not filter.
+
+    borrower: case-insensitive prefix of the borrower name
+    """
+    query = {}
+    if risk_label:
+        query["risk_label"] = risk_label
+    amount = {}
+    if min_amount is not None:
+        amount["$gte"] = min_amount
+    if max_amount is not None:
+        amount["$lte"] = max_amount
+    if amount:
+        query["amount"] = amount
+    if borrower:
+        query["borrower"] = {"$regex": f"^{re.escape(borrower)}", "$options": "i"}
+    return query
+
+_COMPARISONS = {
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+}
+
+def matches_filter(loan, query):
+    """
+    Evaluate a loan_filter() query against a loan dict the way MongoDB
+    would, to place a changed loan without asking the server.
+    """
+    for field, condition in query.items():
+        value = loan.get(field)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        for op, operand in condition.items():
+            if op == "$options":
+                continue
+            if op == "$regex":
+                flags = re.IGNORECASE if "i" in condition.get("$options", "") else 0
+                if not isinstance(value, str) or not re.search(operand, value, flags):
+                    return False
+            elif op in _COMPARISONS:
+                # Comparisons never match across type brackets
+                if _bracket(value) != _bracket(operand) or not _COMPARISONS[op](value, operand):
+                    return False
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+    return True
+
+def sort_key(loan, field):
+    """Key ordering loans like MongoDB sorts (field, _id)"""
+    value = loan.get(field)
+    bracket = _bracket(value)
+    if field == "_id":
+        return (0, value, None)
+    if bracket == 0 or bracket == len(_TYPE_BRACKETS):
+        value = 0
+    return (bracket, value, loan.get("_id"))
+
+def load_loans(fields=None, filter=None):
+    return list(iter_loans(fields=fields, filter=filter))
+
+def get_loan(loan_id, fields=None):
+    """One loan by loan_id (indexed point lookup), or None"""
+    return _loans().find_one({"loan_id": loan_id}, _projection(fields))
+
+def get_loans(loan_ids, fields=None):
+    """Loans with these loan_ids in one round trip, keyed by loan_id"""
+    cursor = _loans().find({"loan_id": {"$in": list(loan_ids)}}, _projection(fields and ["loan_id", *fields]))
+    return {loan["loan_id"]: loan for loan in cursor}
+
+def count_loans(filter=None):
+    return _loans().count_documents(filter or {})
 
 def save_loan(loan):
-    loans_col.insert_one(loan)
+    loan.update(normalize_numbers(loan))
+    loan.setdefault("loan_id", new_loan_id())
+    loan["updated_at"] = utcnow()
+    _loans().insert_one(loan)
+    portfolio_stats.record_insert(loan)
 
 def update_loan(loan_id, updates):
-    loans_col.update_one(
+    updates = {**normalize_numbers(updates), "updated_at": utcnow()}
+    if not STATS_FIELDS.intersection(updates):
+        _loans().update_one(
+            {"loan_id": loan_id},
+            {"$set": updates}
+        )
+        return
+
+    # Fields feeding the portfolio aggregates changed: keep them in step
+    before = _loans().find_one_and_update(
         {"loan_id": loan_id},
-        {"$set": updates}
+        {"$set": updates},
+        projection={field: 1 for field in STATS_FIELDS},
+        return_document=ReturnDocument.BEFORE
     )
+    if before is not None:
+        portfolio_stats.record_update(before, {**before, **updates})
 
 def delete_loan(loan_id):
-    loans_col.delete_one({"loan_id": loan_id})
+    deleted = _loans().find_one_and_delete(
+        {"loan_id": loan_id},
+        projection={field: 1 for field in STATS_FIELDS}
+    )
+    if deleted is not None:
+        get_collection(TOMBSTONES).insert_one(tombstone(deleted["_id"], loan_id))
+        portfolio_stats.record_delete(deleted)
+
+def tombstone(_id, loan_id):
+    return {"_id": _id, "loan_id": loan_id, "deleted_at": utcnow()}
+
+# ---------- BULK WRITES ----------
+def _chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+def bulk_upsert_loans(loans, chunk_size=BULK_CHUNK_SIZE, ordered=False, reconcile_stats=True):
+    """
+    Insert or replace loans keyed by loan_id with bulk_write batches.
+    Loans without a loan_id get a new one.
+    reconcile_stats: see bulk_update_loans
+    Returns: {"inserted": n, "modified": n}
+    """
+    inserted = modified = 0
+    for chunk in _chunks(loans, chunk_size):
+        ops = []
+        now = utcnow()
+        for loan in chunk:
+            loan = normalize_numbers({key: value for key, value in loan.items() if key != "_id"})
+            loan.setdefault("loan_id", new_loan_id())
+            loan["updated_at"] = now
+            ops.append(ReplaceOne({"loan_id": loan["loan_id"]}, loan, upsert=True))
+        result = _loans().bulk_write(ops, ordered=ordered)
+        inserted += result.upserted_count
+        modified += result.modified_count
+
+    # Replaced documents have no cheap before image, so reconcile the
+    # aggregates once for the whole batch
+    if reconcile_stats and (inserted or modified):
+        portfolio_stats.rebuild_portfolio_stats()
+    return {"inserted": inserted, "modified": modified}
+
+def bulk_update_loans(updates, chunk_size=BULK_CHUNK_SIZE, ordered=False, reconcile_stats=True):
+    """
+    Apply $set updates to many loans with bulk_write batches.
+    updates: iterable of (loan_id, fields) pairs
+    reconcile_stats: rebuild the portfolio aggregates afterwards; callers
+    issuing several batches can pass False and rebuild once at the end
+    Returns: number of modified loans
+    """
+    modified = 0
+    touches_stats = False
+    for chunk in _chunks(updates, chunk_size):
+        ops = []
+        now = utcnow()
+        for loan_id, fields in chunk:
+            touches_stats = touches_stats or bool(STATS_FIELDS.intersection(fields))
+            ops.append(UpdateOne({"loan_id": loan_id}, {"$set": {**normalize_numbers(fields), "updated_at": now}}))
+        modified += _loans().bulk_write(ops, ordered=ordered).modified_count
+
+    if reconcile_stats and modified and touches_stats:
+        portfolio_stats.rebuild_portfolio_stats()
+    return modified
+
+def backfill_loan_ids(chunk_size=BULK_CHUNK_SIZE):
+    """Give a loan_id to loans created before loan_id was assigned on save"""
+    missing = iter_loans(fields=["_id"], filter={"loan_id": {"$exists": False}})
+    count = 0
+    for chunk in _chunks(missing, chunk_size):
+        now = utcnow()
+        ops = [
+            UpdateOne({"_id": loan["_id"]}, {"$set": {"loan_id": new_loan_id(), "updated_at": now}})
+            for loan in chunk
+        ]
+        count += _loans().bulk_write(ops, ordered=False).modified_count
+    return count
+
+def normalize_stored_numbers(chunk_size=BULK_CHUNK_SIZE):
+    """
+    Convert NUMERIC_FIELDS stored as text by older versions to numbers,
+    then reconcile the portfolio aggregates. Text that is not a number
+    is left as it is.
+    Returns: number of modified loans
+    """
+    query = {"$or": [{field: {"$type": "string"}} for field in NUMERIC_FIELDS]}
+    fields = ["_id", *NUMERIC_FIELDS]
+    count = 0
+    for chunk in _chunks(iter_loans(fields=fields, filter=query), chunk_size):
+        now = utcnow()
+        ops = []
+        for loan in chunk:
+            numbers = {
+                field: value for field, value in normalize_numbers(loan).items()
+                if field in NUMERIC_FIELDS and isinstance(loan[field], str) and not isinstance(value, str)
+            }
+            if numbers:
+                ops.append(UpdateOne({"_id": loan["_id"]}, {"$set": {**numbers, "updated_at": now}}))
+        if ops:
+            count += _loans().bulk_write(ops, ordered=False).modified_count
+    if count:
+        portfolio_stats.rebuild_portfolio_stats()
+    return count
+
+# ---------- BULK IMPORT ----------
+def _read_loan_file(path):
+    """Yield loans from a .csv, .json (list) or .jsonl file"""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                # Empty cells mean "not provided"
+                yield {key: value for key, value in row.items() if value not in ("", None)}
+    elif path.lower().endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+
+def import_loans(path, chunk_size=BULK_CHUNK_SIZE, ordered=False):
+    """
+    Bulk import a loan tape from JSON/JSONL/CSV, upserting on loan_id.
+    Returns: {"inserted": n, "modified": n}
+    """
+    return bulk_upsert_loans(_read_loan_file(path), chunk_size=chunk_size, ordered=ordered)
+
+if __name__ == "__main__":
+    # python -m utils.data_handler import loans.csv
+    # python -m utils.data_handler normalize
+    if len(sys.argv) == 3 and sys.argv[1] == "import":
+        result = import_loans(sys.argv[2])
+        print(f"Imported loans: {result['inserted']} new, {result['modified']} updated")
+    elif sys.argv[1:] == ["normalize"]:
+        print(f"Converted text amounts to numbers on {normalize_stored_numbers()} loans")
+    else:
+        print("Usage: python -m utils.data_handler [import <loans.json|loans.jsonl|loans.csv> | normalize]")
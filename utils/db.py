@@ -1,10 +1,125 @@
 # utils/db.py
 
-from pymongo import MongoClient
+import os
+import threading
+from pymongo import MongoClient, monitoring
 from config import MONGO_URI, DB_NAME
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
+_client = None
+_client_lock = threading.Lock()
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts connection pool events for the shared client"""
+
+    def __init__(self):
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checked_in = 0
+        self.checkout_failed = 0
+
+    def snapshot(self):
+        return {
+            "open": self.created - self.closed,
+            "in_use": self.checked_out - self.checked_in,
+            "created": self.created,
+            "closed": self.closed,
+            "checkouts": self.checked_out,
+            "checkout_failures": self.checkout_failed,
+        }
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_closed(self, event):
+        self.closed += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_in += 1
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failed += 1
+
+    # Pool lifecycle events are not tracked
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+pool_metrics = PoolMetrics()
+
+
+def _int_env(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def client_options():
+    """
+    Connection pool settings shared by every client in the app.
+    Override through the MONGO_* environment variables (listed in
+    .env.example).
+    """
+    write_concern = os.getenv("MONGO_WRITE_CONCERN", "1")
+    options = {
+        "maxPoolSize": _int_env("MONGO_MAX_POOL_SIZE", 10),
+        "minPoolSize": _int_env("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": _int_env("MONGO_MAX_IDLE_TIME_MS", 60000),
+        "connectTimeoutMS": _int_env("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "serverSelectionTimeoutMS": _int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "readPreference": os.getenv("MONGO_READ_PREFERENCE", "primary"),
+        "w": int(write_concern) if write_concern.isdigit() else write_concern,
+    }
+    socket_timeout = _int_env("MONGO_SOCKET_TIMEOUT_MS", None)
+    if socket_timeout:
+        options["socketTimeoutMS"] = socket_timeout
+    return options
+
+
+def get_client():
+    """
+    The process-wide MongoClient, created on first use.
+    connect=False defers all network I/O until the first query.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(
+                    MONGO_URI,
+                    connect=False,
+                    event_listeners=[pool_metrics],
+                    **client_options()
+                )
+    return _client
+
+
+def get_db():
+    return get_client()[DB_NAME]
+
 
 def get_collection(name):
-    return db[name]
+    return get_db()[name]
+
+
+def get_pool_stats():
+    """Connection pool usage of the shared client (and the Motor client in utils.async_db)"""
+    return pool_metrics.snapshot()
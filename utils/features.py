@@ -0,0 +1,164 @@
+# utils/features.py
+
+import numpy as np
+from itertools import islice
+
+
+class FeaturePipeline:
+    """
+    Columnar feature engineering for loan documents.
+
+    Raw loan fields are pulled out of a list (or Mongo cursor) of loans in a
+    single pass and converted into NumPy column arrays. Features are then
+    computed from those columns with array operations, so adding a feature
+    only means registering a function of the columns it needs.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.features = []
+
+    def add_field(self, name, kind='number', default=None):
+        """
+        Declare a raw loan field used by the pipeline.
+
+        kind:
+        - number: parsed to float (strings allowed), missing -> default
+        - flag: 1.0 if the field is present and non-empty, else 0.0
+        - text: kept as an object array, missing -> default
+        """
+        self.fields[name] = (kind, default)
+
+    def feature(self, name, label, fields):
+        """Decorator registering a feature computed from field columns"""
+        def decorator(func):
+            self.features.append((name, label, list(fields), func))
+            return func
+        return decorator
+
+    @property
+    def feature_names(self):
+        return [name for name, _, _, _ in self.features]
+
+    @property
+    def feature_labels(self):
+        return [label for _, label, _, _ in self.features]
+
+    def extract_columns(self, loans, fields=None):
+        """
+        Read the requested fields out of every loan in one pass.
+        Returns: {field: np.ndarray}
+        """
+        fields = list(fields or self.fields)
+        defaults = [self.fields[name][1] for name in fields]
+        values = [[] for _ in fields]
+
+        for loan in loans:
+            for column, name, default in zip(values, fields, defaults):
+                column.append(loan.get(name, default))
+
+        return {
+            name: self._convert(name, column)
+            for name, column in zip(fields, values)
+        }
+
+    def _convert(self, name, column):
+        kind, default = self.fields[name]
+        raw = np.empty(len(column), dtype=object)
+        raw[:] = column
+
+        if kind == 'flag':
+            return raw.astype(bool).astype(np.float64)
+
+        if kind == 'text':
+            return raw
+
+        # Numeric: empty values fall back to the default (NaN if none given)
+        missing = (raw == None) | (raw == '')
+        fill = np.nan if default is None else float(default)
+        numbers = np.full(len(column), fill, dtype=np.float64)
+        numbers[~missing] = raw[~missing].astype(np.float64)
+        return numbers
+
+    def transform(self, loans, dtype=np.float64):
+        """
+        Convert loans into a contiguous (n_loans, n_features) matrix.
+        """
+        needed = {field for _, _, fields, _ in self.features for field in fields}
+        columns = self.extract_columns(loans, [f for f in self.fields if f in needed])
+        return self._stack(columns, dtype)
+
+    def transform_with_labels(self, loans, label_field='risk_label', dtype=np.float64):
+        """
+        Convert loans into a feature matrix and encoded risk labels.
+        Returns: (X, y)
+        """
+        needed = {field for _, _, fields, _ in self.features for field in fields}
+        needed.add(label_field)
+        columns = self.extract_columns(loans, [f for f in self.fields if f in needed])
+        return self._stack(columns, dtype), encode_risk_labels(columns[label_field])
+
+    def iter_chunks_with_labels(self, loans, chunk_size, label_field='risk_label', dtype=np.float64):
+        """
+        transform_with_labels over a large iterable (e.g. a Mongo cursor),
+        chunk_size loans at a time, so only one chunk of loan documents
+        is held in memory.
+        Yields: (X, y) per chunk
+        """
+        loans = iter(loans)
+        while True:
+            chunk = list(islice(loans, chunk_size))
+            if not chunk:
+                return
+            yield self.transform_with_labels(chunk, label_field, dtype)
+
+    def _stack(self, columns, dtype=np.float64):
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        X = np.empty((n_rows, len(self.features)), dtype=dtype)
+        for i, (_, _, fields, func) in enumerate(self.features):
+            X[:, i] = func(*(columns[field] for field in fields))
+        return X
+
+
+RISK_LABELS = np.array(['Low', 'Medium', 'High'])
+
+
+def encode_risk_labels(labels):
+    """
+    Convert risk labels to numeric classes (0=Low, 1=Medium, 2=High).
+    Anything that is not Low or Medium is treated as High.
+    """
+    labels = np.asarray(labels, dtype=object)
+    y = np.full(len(labels), 2, dtype=np.int64)
+    y[labels == 'Low'] = 0
+    y[labels == 'Medium'] = 1
+    return y
+
+
+# ---------- DEFAULT LOAN FEATURES ----------
+loan_features = FeaturePipeline()
+loan_features.add_field('amount', 'number', default=0)
+loan_features.add_field('annual_income', 'number')
+loan_features.add_field('pan', 'flag')
+loan_features.add_field('risk_label', 'text', default='Medium')
+
+
+@loan_features.feature('loan_amount', 'Loan Amount (Lakhs)', ['amount'])
+def loan_amount_lakhs(amount):
+    # Loan amount in lakhs for better scaling
+    return amount / 100000
+
+
+@loan_features.feature('income_ratio', 'Income Ratio', ['amount', 'annual_income'])
+def income_ratio(amount, annual_income):
+    # Loan to income ratio, default high ratio if income unknown
+    known = annual_income > 0
+    ratio = np.full(len(amount), 5.0)
+    ratio[known] = amount[known] / annual_income[known]
+    return ratio
+
+
+@loan_features.feature('has_pan', 'Has PAN', ['pan'])
+def has_pan(pan):
+    # Whether PAN documentation is provided
+    return pan
@@ -0,0 +1,127 @@
+# utils/indexes.py
+
+import sys
+from datetime import datetime
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+from utils.db import get_collection
+
+# collection -> [(keys, options)]
+INDEXES = {
+    "loans": [
+        # Loans saved before loan_id was assigned have none; keep them out
+        # of the unique index instead of colliding on null
+        ([("loan_id", ASCENDING)], {
+            "name": "loan_id_unique",
+            "unique": True,
+            "partialFilterExpression": {"loan_id": {"$exists": True}}
+        }),
+        ([("risk_label", ASCENDING), ("amount", ASCENDING)], {
+            "name": "risk_label_amount"
+        }),
+        # Sortable columns of the Monitoring loan list (keyset pages on field, _id)
+        ([("borrower", ASCENDING), ("_id", ASCENDING)], {
+            "name": "borrower_id"
+        }),
+        ([("amount", ASCENDING), ("_id", ASCENDING)], {
+            "name": "amount_id"
+        }),
+        ([("risk_score", ASCENDING), ("_id", ASCENDING)], {
+            "name": "risk_score_id"
+        }),
+        # Change feed polling fallback (utils/change_feed.py)
+        ([("updated_at", ASCENDING)], {
+            "name": "updated_at"
+        }),
+    ],
+    "loan_tombstones": [
+        # Pollers only look back seconds; keep a week for stopped clients
+        ([("deleted_at", ASCENDING)], {
+            "name": "deleted_at_ttl",
+            "expireAfterSeconds": 7 * 24 * 3600
+        }),
+    ],
+    "users": [
+        ([("username", ASCENDING)], {
+            "name": "username_unique",
+            "unique": True
+        }),
+    ],
+}
+
+# Queries the app runs on every click / screen open: (name, collection, filter, sort)
+HOT_QUERIES = [
+    ("loan by loan_id", "loans", {"loan_id": "example"}, None),
+    ("loans by risk label", "loans", {"risk_label": "High"}, [("amount", ASCENDING)]),
+    ("loan page", "loans", {}, [("_id", ASCENDING)]),
+    ("loan page by amount", "loans", {}, [("amount", ASCENDING), ("_id", ASCENDING)]),
+    ("loan page by borrower", "loans", {}, [("borrower", ASCENDING), ("_id", ASCENDING)]),
+    ("loans changed since", "loans", {"updated_at": {"$gte": datetime(2000, 1, 1)}}, [("updated_at", ASCENDING)]),
+    ("user by username", "users", {"username": "example"}, None),
+]
+
+
+def ensure_indexes():
+    """
+    Create the app's indexes. Safe to run on every startup:
+    create_index is a no-op when the index already exists.
+    """
+    for collection, indexes in INDEXES.items():
+        col = get_collection(collection)
+        for keys, options in indexes:
+            try:
+                col.create_index(keys, **options)
+            except PyMongoError as e:
+                print(f"Error creating index {options['name']} on {collection}: {e}")
+
+
+def _plan_stages(plan):
+    """All stage names in an explain() plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+def explain_hot_queries():
+    """
+    Run explain() on the app's hot queries.
+    Returns: [(name, stages, is_collscan)]
+    """
+    report = []
+    for name, collection, query, sort in HOT_QUERIES:
+        cursor = get_collection(collection).find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = _plan_stages(plan)
+        report.append((name, stages, "COLLSCAN" in stages))
+    return report
+
+
+if __name__ == "__main__":
+    # python -m utils.indexes [create]  -> create indexes
+    # python -m utils.indexes explain   -> flag hot queries doing COLLSCAN
+    #                                      (read-only: creates nothing)
+    command = sys.argv[1] if len(sys.argv) > 1 else "create"
+    if command == "explain":
+        collscans = 0
+        for name, stages, is_collscan in explain_hot_queries():
+            flag = "COLLSCAN ⚠️" if is_collscan else "ok"
+            print(f"{name}: {' > '.join(stages)} [{flag}]")
+            collscans += is_collscan
+        if collscans:
+            print("Run `python -m utils.indexes create` to add the missing indexes")
+        sys.exit(1 if collscans else 0)
+    elif command == "create":
+        ensure_indexes()
+        print("Indexes are up to date")
+    else:
+        print("Usage: python -m utils.indexes [create | explain]")
+        sys.exit(2)
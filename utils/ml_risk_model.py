@@ -1,130 +1,530 @@
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.base import clone
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
+import copy
 import joblib
 import os
+import time
+import threading
+import sklearn
+from utils.features import loan_features, RISK_LABELS
+from utils.model_store import ModelStore
+from utils.prediction_cache import PredictionCache
+
+# joblib.load mmap_mode for the saved model ('r' maps the fitted arrays
+# read-only instead of copying them into each process; unset = plain load).
+# Only effective for versions saved uncompressed (the ModelStore default).
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE") or None
+
+# Estimator for full training: "forest" (Random Forest) or "sgd" (linear
+# model trained with SGD, updated with partial_fit)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "forest")
+BACKEND_NAMES = {"forest": "Random Forest", "sgd": "SGD"}
+
+# Incremental forest updates: trees grown per update on the new loans, and
+# the size the forest is kept at. The base trees of the last full fit are
+# never dropped; only the oldest incremental trees are, and there are never
+# more incremental trees than base trees (they are grown on small batches)
+INCREMENT_TREES = 10
+MAX_TREES = 300
+
+# Share of the loans an SGD full fit is scored on (forests use OOB loans)
+HOLDOUT_FRACTION = 0.1
+
+# Rough fitting memory per training row and worker: bootstrap weights,
+# sample indices and per-node feature buffers inside sklearn's tree builder
+FIT_BYTES_PER_ROW_PER_JOB = 48
+
+
+def _number_env(name, default):
+    """int or float from the environment ("0.5" -> 0.5, "20000" -> 20000)"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    return float(value) if "." in value else int(value)
+
+
+def _max_samples_env(name="MODEL_MAX_SAMPLES"):
+    """
+    max_samples from the environment: a value up to 1 is a fraction of
+    the training set ("1" = all rows, "0.5" = half), a larger one is a
+    row count ("20000"). Unset = None (all rows).
+    """
+    value = os.getenv(name)
+    if not value:
+        return None
+    number = float(value)
+    return number if number <= 1 else int(number)
+
+
+def _bounded_max_samples(max_samples, n_rows):
+    """A max_samples count larger than the training set means all rows"""
+    if isinstance(max_samples, int) and max_samples > n_rows:
+        return None
+    return max_samples
+
+
+class TrainingConfig:
+    """
+    How full training uses CPU and memory. Defaults come from the
+    environment (listed in .env.example):
+
+    n_jobs (MODEL_N_JOBS): fitting workers, -1 = all cores
+    max_samples (MODEL_MAX_SAMPLES): rows bootstrapped per tree. Up to 1
+        it is a fraction (1 = every row, 0.5 = half), above 1 a row count
+        (20000); None = as many as the training set
+    float32 (MODEL_FLOAT32): build features as float32, the dtype the
+        tree builder works in, instead of float64 plus a converted copy
+    chunk_size (MODEL_TRAIN_CHUNK_SIZE): loans turned into features at a
+        time when training from a cursor
+    memory_budget_mb (MODEL_MEMORY_BUDGET_MB): cap on feature matrix plus
+        fitting buffers; larger histories are uniformly subsampled to fit
+    """
+
+    def __init__(self, n_estimators=100, max_depth=10, n_jobs=None, max_samples=None,
+                 float32=None, chunk_size=None, memory_budget_mb=None, random_state=42):
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.n_jobs = n_jobs if n_jobs is not None else _number_env("MODEL_N_JOBS", -1)
+        self.max_samples = max_samples if max_samples is not None else _max_samples_env()
+        self.float32 = float32 if float32 is not None else os.getenv("MODEL_FLOAT32", "1") != "0"
+        self.chunk_size = chunk_size or _number_env("MODEL_TRAIN_CHUNK_SIZE", 50000)
+        self.memory_budget_mb = (
+            memory_budget_mb if memory_budget_mb is not None
+            else _number_env("MODEL_MEMORY_BUDGET_MB", None)
+        )
+        self.random_state = random_state
+
+    @property
+    def dtype(self):
+        return np.float32 if self.float32 else np.float64
+
+    def max_rows(self, n_features):
+        """Training rows that fit the memory budget (None = unlimited)"""
+        if not self.memory_budget_mb:
+            return None
+        jobs = joblib.effective_n_jobs(self.n_jobs)
+        # Features (plus the scaled copy), label, per-worker fit buffers
+        row_bytes = 2 * n_features * np.dtype(self.dtype).itemsize + 8 + jobs * FIT_BYTES_PER_ROW_PER_JOB
+        return max(int(self.memory_budget_mb * 1024 * 1024 // row_bytes), 5)
+
+    def as_dict(self):
+        return {
+            "n_jobs": self.n_jobs,
+            "max_samples": self.max_samples,
+            "float32": self.float32,
+            "chunk_size": self.chunk_size,
+            "memory_budget_mb": self.memory_budget_mb,
+        }
+
 
 class LoanRiskMLModel:
     """
     Machine Learning model for loan risk prediction.
-    Uses Random Forest to classify loans into Low/Medium/High risk.
+    Uses Random Forest (or SGD, see MODEL_BACKEND) to classify loans into
+    Low/Medium/High risk.
+    
+    Trained models are kept as versions in a ModelStore (data/models).
+    The promoted version is loaded on first use, and reloaded when the
+    store's CURRENT pointer changes (training, promote or rollback in
+    another window or process). Use get_model() to share one instance.
     """
     
-    def __init__(self):
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42
-        )
+    def __init__(self, mmap_mode=MODEL_MMAP_MODE, store=None, backend=MODEL_BACKEND, config=None):
+        self.backend = backend
+        self.config = config or TrainingConfig()
+        self.model = self._new_model()
         self.scaler = StandardScaler()
-        self.is_trained = False
+        self.features = loan_features
+        self.store = store or ModelStore()
+        self.version = None
+        self.prediction_cache = PredictionCache()
+        self.mmap_mode = mmap_mode
+        
+        # Pre-versioning pickles, imported into the store on first load
         self.model_path = "data/risk_model.pkl"
         self.scaler_path = "data/scaler.pkl"
         
-        # Load existing model if available
-        self.load_model()
+        self._trained = False
+        self._loaded_stamp = None  # _saved_stamp() of the loaded model
+        self._frozen = False
+        self._lock = threading.RLock()
+    
+    def _new_model(self):
+        config = self.config
+        if self.backend == "sgd":
+            return SGDClassifier(loss="log_loss", n_jobs=config.n_jobs, random_state=config.random_state)
+        return RandomForestClassifier(
+            n_estimators=config.n_estimators,
+            max_depth=config.max_depth,
+            n_jobs=config.n_jobs,
+            max_samples=config.max_samples,
+            random_state=config.random_state
+        )
+    
+    def _backend_of(self, model):
+        return "forest" if isinstance(model, RandomForestClassifier) else "sgd"
+    
+    def _saved_stamp(self):
+        """Changes whenever a different model is promoted; None if none is saved"""
+        stamp = self.store.current_mtime()
+        if stamp is None and os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
+            return "legacy"
+        return stamp
+    
+    def _ensure_loaded(self):
+        """Load the saved model on first use, or again if it changed on disk"""
+        if self._frozen:
+            return
+        stamp = self._saved_stamp()
+        if stamp is not None and stamp != self._loaded_stamp:
+            with self._lock:
+                if self._saved_stamp() != self._loaded_stamp:
+                    self.load_model()
+    
+    def _current(self):
+        """(model, scaler, version) or None - consistent for one prediction"""
+        self._ensure_loaded()
+        with self._lock:
+            if not self._trained:
+                return None
+            return self.model, self.scaler, self.version
+    
+    @property
+    def is_trained(self):
+        """True if a trained model is loaded or saved (without loading it)"""
+        stamp = self._saved_stamp()
+        if stamp is not None and stamp == self._loaded_stamp:
+            return self._trained
+        return self._trained or stamp is not None
+    
+    def frozen(self):
+        """
+        Copy pinned to the version loaded now (no hot reload), so a long
+        batch run scores every loan with the same model.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            pinned = LoanRiskMLModel.__new__(LoanRiskMLModel)
+            pinned.__dict__.update(self.__dict__)
+        pinned._lock = threading.RLock()
+        pinned._frozen = True
+        return pinned
+    
+    def prediction_method(self):
+        """Value stored in a loan's prediction_method field"""
+        self._ensure_loaded()
+        if self._trained:
+            return f"ML Model ({BACKEND_NAMES[self._backend_of(self.model)]} {self.version})"
+        return 'Rule-based (fallback)'
+    
+    def metadata(self):
+        """Metadata of the loaded version ({} if none)"""
+        self._ensure_loaded()
+        if not self._trained or not self.version:
+            return {}
+        return self.store.metadata(self.version)
+    
+    def watermark(self):
+        """
+        Where incremental training picks up for the loaded version: the
+        JSON value utils.retrain recorded (None if none)
+        """
+        return self.metadata().get("watermark")
+    
+    def seed_watermark(self, watermark):
+        """
+        Record watermark on the loaded version, for a model trained
+        without one: incremental training starts from the loans after it.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if self._trained and self.version:
+                self.store.update_metadata(self.version, {"watermark": watermark})
     
     def prepare_features(self, loan_data):
         """
         Convert loan data into features for ML model.
         
-        Features:
+        Features (see utils/features.py):
         - loan_amount: Amount of loan
         - income_ratio: loan_amount / annual_income (if available)
         - has_pan: Whether PAN is provided (1/0)
         """
-        features = []
+        return self.features.transform([loan_data])
+    
+    def train(self, loans_data, watermark=None, progress=None):
+        """
+        Train the model on existing loan data.
+        Uses existing risk_labels as ground truth.
+        Accepts a list or a cursor of loans; a cursor is read in chunks
+        (see TrainingConfig) so the loan documents never all sit in memory.
         
-        loan_amount = float(loan_data.get('amount', 0))
-        annual_income = float(loan_data.get('annual_income', 0)) if loan_data.get('annual_income') else None
-        has_pan = 1 if loan_data.get('pan') else 0
+        watermark: JSON value recorded so incremental training can pick
+        up from there (see utils.retrain)
+        progress: optional callback(loans_read)
+        """
+        started = time.perf_counter()
         
-        # Feature 1: Loan amount (in lakhs for better scaling)
-        features.append(loan_amount / 100000)
+        # Prepare training data (risk_label -> 0=Low, 1=Medium, 2=High)
+        X, y, rows_seen = self._training_matrix(loans_data, progress)
         
-        # Feature 2: Income ratio (loan to income)
-        if annual_income and annual_income > 0:
-            income_ratio = loan_amount / annual_income
-        else:
-            income_ratio = 5.0  # Default high ratio if income unknown
-        features.append(income_ratio)
+        if len(y) < 5:
+            print("Not enough data to train. Need at least 5 loans.")
+            return False
+        
+        # Fit fresh objects so predictions keep using the old model meanwhile
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        del X
+        model = self._new_model()
+        if isinstance(model, RandomForestClassifier):
+            model.set_params(max_samples=_bounded_max_samples(model.max_samples, len(y)), oob_score=True)
+        model.fit(X_scaled, y)
+        quality = self._quality_metrics(model, X_scaled, y)
         
-        # Feature 3: Has PAN documentation
-        features.append(has_pan)
+        metadata = self._training_metadata(model, y, watermark)
+        metadata["metrics"].update(quality)
+        if isinstance(model, RandomForestClassifier):
+            metadata["base_trees"] = len(model.estimators_)
+        metadata.update({
+            "mode": "full",
+            "training_size": int(len(y)),
+            "loans_seen": int(rows_seen),
+            "training_config": self.config.as_dict(),
+            "fit_seconds": round(time.perf_counter() - started, 3),
+        })
+        
+        # The old model keeps serving if the new one cannot be stored
+        if not self._publish(model, scaler, metadata):
+            return False
         
-        return np.array(features).reshape(1, -1)
+        print(f"Model trained on {len(y)} loans")
+        return True
     
-    def train(self, loans_data):
+    def _training_matrix(self, loans_data, progress=None):
         """
-        Train the model on existing loan data.
-        Uses existing risk_labels as ground truth.
+        Feature matrix and labels built chunk by chunk.
+        When the history exceeds the memory budget, a uniform sample of
+        max_rows loans is kept (reservoir sampling), so memory stays fixed
+        however large the collection grows.
+        Returns: (X, y, loans_seen)
         """
-        if len(loans_data) < 5:
-            print("Not enough data to train. Need at least 5 loans.")
-            return False
+        config = self.config
+        max_rows = config.max_rows(len(self.features.features))
+        rng = np.random.default_rng(config.random_state)
         
-        X = []
-        y = []
-        
-        # Prepare training data
-        for loan in loans_data:
-            features = self.prepare_features(loan)
-            X.append(features[0])
-            
-            # Convert risk_label to numeric (0=Low, 1=Medium, 2=High)
-            label = loan.get('risk_label', 'Medium')
-            if label == 'Low':
-                y.append(0)
-            elif label == 'Medium':
-                y.append(1)
+        chunks_X, chunks_y = [], []
+        X_sample = y_sample = None
+        seen = 0
+        
+        for X, y in self.features.iter_chunks_with_labels(loans_data, config.chunk_size, dtype=config.dtype):
+            if X_sample is None:
+                chunks_X.append(X)
+                chunks_y.append(y)
+                if max_rows and seen + len(y) > max_rows:
+                    # Budget reached: switch to a fixed-size sample
+                    X_all, y_all = np.concatenate(chunks_X), np.concatenate(chunks_y)
+                    chunks_X, chunks_y = [], []
+                    keep = np.sort(rng.choice(len(y_all), max_rows, replace=False))
+                    X_sample, y_sample = X_all[keep], y_all[keep]
+                    del X_all, y_all
             else:
-                y.append(2)
+                # Row number i replaces a random slot in [0, i] if it is < max_rows
+                slots = rng.integers(0, seen + np.arange(1, len(y) + 1))
+                chosen = slots < max_rows
+                X_sample[slots[chosen]] = X[chosen]
+                y_sample[slots[chosen]] = y[chosen]
+            seen += len(y)
+            if progress:
+                progress(seen)
         
-        X = np.array(X)
-        y = np.array(y)
+        if X_sample is not None:
+            return X_sample, y_sample, seen
+        if not chunks_y:
+            return np.empty((0, len(self.features.features)), dtype=config.dtype), np.empty(0, dtype=np.int64), 0
+        return np.concatenate(chunks_X), np.concatenate(chunks_y), seen
+    
+    def train_incremental(self, loans_data, extra_loans=(), watermark=None):
+        """
+        Update the loaded model with newly added loans instead of refitting
+        on the whole book, so the cost grows with the new data only.
         
-        # Scale features
-        X_scaled = self.scaler.fit_transform(X)
+        - forest: INCREMENT_TREES more trees grown on the new loans
+          (warm_start); the base trees of the last full fit are kept and
+          the oldest incremental trees make room (see MAX_TREES)
+        - sgd: one partial_fit pass over the new loans
+        The scaler is kept as is, so the existing trees/weights stay valid.
         
-        # Train model
-        self.model.fit(X_scaled, y)
-        self.is_trained = True
+        extra_loans: older loans fitted along with the new ones (so a forest
+            update sees every class) without counting as new
+        watermark: JSON value recorded for the next update (see utils.retrain)
+        Returns: False if a full train() is needed instead
+        """
+        current = self._current()
+        if current is None:
+            return False
+        model, scaler, base_version = current
+        base = self.store.metadata(base_version) if base_version else {}
         
-        # Save model
-        self.save_model()
+        new_loans = list(loans_data)
+        X_new, y_new = self.features.transform_with_labels(new_loans)
+        if len(y_new) == 0:
+            return False
+        X_new = scaler.transform(X_new)
+        # Accuracy of the current model on loans it has not seen yet
+        previous_accuracy = float(model.score(X_new, y_new))
+        
+        X_scaled, y = X_new, y_new
+        extra_loans = list(extra_loans)
+        if extra_loans:
+            X_extra, y_extra = self.features.transform_with_labels(extra_loans)
+            X_scaled = np.concatenate([X_new, scaler.transform(X_extra)])
+            y = np.concatenate([y_new, y_extra])
+        classes = np.unique(y)
+        
+        if isinstance(model, RandomForestClassifier):
+            # New trees must be trained on the same set of classes
+            if not np.array_equal(classes, model.classes_):
+                return False
+            # Versions from before base_trees was recorded: all base
+            base_trees = int(base.get("base_trees", len(model.estimators_)))
+            estimators = list(model.estimators_)
+            incremental = estimators[base_trees:]
+            room = min(MAX_TREES - base_trees, base_trees) - INCREMENT_TREES
+            updated = copy.copy(model)
+            updated.estimators_ = estimators[:base_trees] + (incremental[-room:] if room > 0 else [])
+            updated.set_params(
+                warm_start=True,
+                n_estimators=len(updated.estimators_) + INCREMENT_TREES,
+                max_samples=_bounded_max_samples(self.config.max_samples, len(y))
+            )
+            updated.fit(X_scaled, y)
+        else:
+            if not set(classes) <= set(model.classes_):
+                return False
+            updated = copy.deepcopy(model)
+            updated.partial_fit(X_scaled, y)
+        
+        metadata = self._training_metadata(updated, y, watermark)
+        if isinstance(updated, RandomForestClassifier):
+            metadata["base_trees"] = base_trees
+        metadata.update({
+            "mode": "incremental",
+            "base_version": base_version,
+            "new_loans": len(new_loans),
+            "training_size": int(base.get("training_size", 0)) + len(new_loans),
+        })
+        metadata["metrics"]["previous_model_accuracy_on_new_loans"] = previous_accuracy
+        
+        if not self._publish(updated, scaler, metadata):
+            return False
         
-        print(f"Model trained on {len(loans_data)} loans")
+        print(f"Model updated with {len(new_loans)} new loans")
         return True
     
+    def _quality_metrics(self, model, X, y):
+        """
+        Accuracy on loans the fitted model did not learn from, for
+        comparing versions: a forest's out-of-bag score (its OOB arrays,
+        one row per loan, are dropped afterwards), or for SGD the score
+        of a copy fitted without HOLDOUT_FRACTION of the loans
+        """
+        if isinstance(model, RandomForestClassifier):
+            accuracy = float(model.oob_score_)
+            del model.oob_score_, model.oob_decision_function_
+            # Incremental updates fit other loans: no OOB for them
+            model.set_params(oob_score=False)
+            return {"oob_accuracy": accuracy}
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=HOLDOUT_FRACTION, random_state=self.config.random_state
+        )
+        holdout = clone(model).fit(X_train, y_train)
+        return {"holdout_accuracy": float(holdout.score(X_test, y_test))}
+    
+    def _training_metadata(self, model, y, watermark):
+        metadata = {
+            "backend": self._backend_of(model),
+            "features": self.features.feature_names,
+            "params": model.get_params(),
+            "sklearn_version": sklearn.__version__,
+            "metrics": {
+                "class_counts": {
+                    str(label): int(count)
+                    for label, count in zip(RISK_LABELS, np.bincount(y, minlength=len(RISK_LABELS)))
+                },
+            },
+        }
+        if watermark is not None:
+            metadata["watermark"] = watermark
+        return metadata
+    
     def predict(self, loan_data):
         """
         Predict risk for a new loan.
         Returns: (risk_score, risk_label, confidence)
         """
-        if not self.is_trained:
+        current = self._current()
+        if current is None:
             # Fallback to rule-based if model not trained
             return self._rule_based_prediction(loan_data)
         
-        # Prepare features
-        features = self.prepare_features(loan_data)
-        features_scaled = self.scaler.transform(features)
+        return self._predict_features(current, self.prepare_features(loan_data))[0]
+    
+    def predict_batch(self, loans_data):
+        """
+        Predict risk for many loans at once.
+        Builds a single feature matrix and runs one transform and one
+        predict_proba call for the loans not already in the prediction cache.
+        Returns: list of (risk_score, risk_label, confidence)
+        """
+        loans_data = list(loans_data)
+        if not loans_data:
+            return []
+        
+        current = self._current()
+        if current is None:
+            # Fallback to rule-based if model not trained
+            return self._rule_based_prediction_batch(loans_data)
         
-        # Predict
-        prediction = self.model.predict(features_scaled)[0]
-        probabilities = self.model.predict_proba(features_scaled)[0]
+        return self._predict_features(current, self.features.transform(loans_data))
+    
+    def _predict_features(self, current, features):
+        """Predictions for a feature matrix, from the cache where possible"""
+        model, scaler, version = current
+        keys = self.prediction_cache.keys(version, features)
+        results = self.prediction_cache.get_many(keys)
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            scored = self._score(model, scaler, features[missing])
+            for i, result in zip(missing, scored):
+                results[i] = result
+            self.prediction_cache.put_many([keys[i] for i in missing], scored)
+        return results
+    
+    def _score(self, model, scaler, features):
+        features_scaled = scaler.transform(features)
         
-        # Convert to label
-        labels = ['Low', 'Medium', 'High']
-        risk_label = labels[prediction]
+        # Predict (label is the most probable class)
+        probabilities = model.predict_proba(features_scaled)
+        best = probabilities.argmax(axis=1)
+        predictions = model.classes_[best].astype(int)
+        confidences = probabilities[np.arange(len(best)), best]
         
         # Risk score (0-100 scale)
-        risk_score = int((prediction * 33) + (probabilities[prediction] * 33))
-        risk_score = min(100, max(0, risk_score))
+        risk_scores = ((predictions * 33) + (confidences * 33)).astype(int)
+        risk_scores = np.clip(risk_scores, 0, 100)
         
-        # Confidence
-        confidence = float(probabilities[prediction])
+        risk_labels = RISK_LABELS[predictions]
         
-        return risk_score, risk_label, confidence
+        return [
+            (int(score), str(label), float(conf))
+            for score, label, conf in zip(risk_scores, risk_labels, confidences)
+        ]
     
     def _rule_based_prediction(self, loan_data):
         """
@@ -140,46 +540,113 @@ class LoanRiskMLModel:
         else:
             return 25, 'Low', 0.7
     
-    def save_model(self):
-        """Save trained model to disk"""
+    def _rule_based_prediction_batch(self, loans_data):
+        """
+        Vectorized version of _rule_based_prediction.
+        """
+        amounts = self.features.extract_columns(loans_data, ['amount'])['amount']
+        
+        scores = np.select([amounts > 500000, amounts > 200000], [75, 50], default=25)
+        labels = np.select([amounts > 500000, amounts > 200000], ['High', 'Medium'], default='Low')
+        
+        return [(int(score), str(label), 0.7) for score, label in zip(scores, labels)]
+    
+    def save_model(self, metadata=None):
+        """Save the loaded model as a new version and promote it"""
+        with self._lock:
+            model, scaler = self.model, self.scaler
+        return self._publish(model, scaler, metadata)
+    
+    def _publish(self, model, scaler, metadata):
+        """
+        Save model/scaler as a new version, promote it, then serve it.
+        Nothing changes (and False is returned) if saving fails, so
+        predictions are never recorded against an unsaved model.
+        """
         try:
-            os.makedirs('data', exist_ok=True)
-            joblib.dump(self.model, self.model_path)
-            joblib.dump(self.scaler, self.scaler_path)
-            print("Model saved successfully")
+            version = self.store.save(model, scaler, metadata)
+            with self._lock:
+                self.store.promote(version)
+                self.model, self.scaler, self.version = model, scaler, version
+                self._trained = True
+                self.prediction_cache.clear()
+                # Our own save is not a change to reload
+                self._loaded_stamp = self._saved_stamp()
         except Exception as e:
             print(f"Error saving model: {e}")
+            return False
+        print(f"Model saved successfully (version {version})")
+        return True
     
     def load_model(self):
-        """Load trained model from disk"""
-        try:
-            if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
-                self.model = joblib.load(self.model_path)
-                self.scaler = joblib.load(self.scaler_path)
-                self.is_trained = True
-                print("Model loaded successfully")
-            else:
-                print("No saved model found. Will use rule-based prediction.")
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            self.is_trained = False
+        """Load the promoted model version from disk"""
+        with self._lock:
+            stamp = self._saved_stamp()
+            try:
+                if stamp == "legacy":
+                    self._import_legacy()
+                    stamp = self._saved_stamp()
+                if stamp is not None:
+                    version = self.store.current_version()
+                    model, scaler, _ = self.store.load(version, mmap_mode=self.mmap_mode)
+                    self.model, self.scaler, self.version = model, scaler, version
+                    self._trained = True
+                    self.prediction_cache.clear()
+                    print(f"Model loaded successfully (version {version})")
+                else:
+                    print("No saved model found. Will use rule-based prediction.")
+            except Exception as e:
+                print(f"Error loading model: {e}")
+                self._trained = False
+            # Do not retry a broken file until it changes again
+            self._loaded_stamp = stamp
     
-    def retrain_on_new_data(self, loans_data):
+    def _import_legacy(self):
+        """Store data/risk_model.pkl + data/scaler.pkl as the first version"""
+        model = joblib.load(self.model_path)
+        scaler = joblib.load(self.scaler_path)
+        version = self.store.save(model, scaler, {"source": self.model_path})
+        self.store.promote(version)
+    
+    def retrain_on_new_data(self, loans_data, watermark=None):
         """
-        Retrain model when new loans are added.
-        Should be called periodically as more data comes in.
+        Update the model with loans added since it was trained.
+        Should be called periodically as more data comes in
+        (utils/retrain.py does this on a schedule).
+        Returns False if a full train() is needed instead.
         """
-        return self.train(loans_data)
+        return self.train_incremental(loans_data, watermark=watermark)
     
     def get_feature_importance(self):
         """
         Get which features matter most for predictions.
         Useful for explaining decisions.
         """
-        if not self.is_trained:
+        current = self._current()
+        if current is None:
             return None
         
-        feature_names = ['Loan Amount (Lakhs)', 'Income Ratio', 'Has PAN']
-        importances = self.model.feature_importances_
+        model = current[0]
+        feature_names = self.features.feature_labels
+        if isinstance(model, RandomForestClassifier):
+            importances = model.feature_importances_
+        else:
+            # Linear model on scaled features: relative weight magnitudes
+            weights = np.abs(model.coef_).mean(axis=0)
+            importances = weights / weights.sum() if weights.sum() else weights
         
-        return {name: float(imp) for name, imp in zip(feature_names, importances)}
\ No newline at end of file
+        return {name: float(imp) for name, imp in zip(feature_names, importances)}
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Process-wide shared model; nothing is read from disk until first use"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = LoanRiskMLModel()
+    return _model
@@ -0,0 +1,211 @@
+# utils/ocr_cache.py
+#
+# Persistent cache of OCR output, keyed by document content.
+#
+# Two layers, so a pattern change does not throw away the expensive part:
+# - text:   raw page text, keyed by content hash + OCR engine/config
+# - parsed: extracted fields, keyed by content hash + parser version
+#
+# Entries live in one SQLite file bounded by size; the least recently
+# used entries are evicted first.
+#
+#   python -m utils.ocr_cache stats
+#   python -m utils.ocr_cache clear
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ocr_cache.sqlite"
+)
+DEFAULT_MAX_MB = 256
+
+# Bump when the cached value format or field cleaning changes
+CACHE_FORMAT = 1
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# A hit only rewrites last_used when the stored one is older than this.
+# Eviction order is accurate to the hour, and repeated reads of the same
+# entries (e.g. a batch ingest re-run) stay read-only instead of taking
+# the write lock and committing on every hit.
+TOUCH_INTERVAL_SECONDS = 3600
+
+
+def file_digest(path):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def patterns_version(patterns):
+    """Changes whenever the field patterns do"""
+    payload = json.dumps([CACHE_FORMAT, patterns], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class OCRCache:
+    """
+    Size-bounded LRU cache in a SQLite file.
+
+    Safe to share between threads; every process (e.g. batch ingest
+    workers) opens its own connection.
+    """
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or os.getenv("OCR_CACHE_PATH", DEFAULT_CACHE_PATH)
+        if max_bytes is None:
+            max_bytes = int(os.getenv("OCR_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        # A connection inherited through fork is not usable in the child
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _get(self, key):
+        # A broken or locked cache is only a miss: parsing still works
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute("SELECT value, last_used FROM entries WHERE key = ?", (key,)).fetchone()
+                now = time.time()
+                if row is not None and now - row[1] > TOUCH_INTERVAL_SECONDS:
+                    conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+                    conn.commit()
+        except sqlite3.Error as e:
+            print(f"OCR cache read failed: {e}")
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def _put(self, key, value):
+        encoded = json.dumps(value)
+        size = len(encoded.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, encoded, size, time.time())
+                )
+                self._evict(conn)
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"OCR cache write failed: {e}")
+
+    def _evict(self, conn):
+        """Drop least recently used entries until the cache fits"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            stale.append((key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    # ---------- TEXT LAYER ----------
+    def get_text(self, content_hash, ocr_key):
+        """
+        Returns: {"pages": [str], "complete": bool} or None
+        complete is False when extraction stopped early.
+        """
+        return self._get(f"text:{ocr_key}:{content_hash}")
+
+    def put_text(self, content_hash, ocr_key, pages, complete):
+        self._put(f"text:{ocr_key}:{content_hash}", {"pages": list(pages), "complete": complete})
+
+    # ---------- PARSE LAYER ----------
+    def get_fields(self, content_hash, version):
+        return self._get(f"parsed:{version}:{content_hash}")
+
+    def put_fields(self, content_hash, version, fields):
+        self._put(f"parsed:{version}:{content_hash}", fields)
+
+    # ---------- MAINTENANCE ----------
+    def stats(self):
+        with self._lock:
+            conn = self._connection()
+            layers = {
+                layer: {"entries": count, "bytes": size}
+                for layer, count, size in conn.execute(
+                    "SELECT substr(key, 1, instr(key, ':') - 1), COUNT(*), SUM(size) "
+                    "FROM entries GROUP BY 1"
+                )
+            }
+        return {
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "layers": layers,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache():
+    """Shared cache instance, created on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = OCRCache()
+    return _cache
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = get_ocr_cache()
+    if command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.path}")
+    elif command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    else:
+        print("Usage: python -m utils.ocr_cache [stats|clear]")
+        sys.exit(2)
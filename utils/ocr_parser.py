@@ -3,67 +3,390 @@ from PIL import Image
 import pdfplumber
 import re
 import json
+import os
+import multiprocessing
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor
+from utils.ocr_cache import get_ocr_cache, file_digest, patterns_version
+from utils.image_preprocess import ImagePreprocessor, tesseract_config
 
-class DocumentParser:
-    def __init__(self):
-        # Common field patterns in loan documents
-        self.patterns = {
-            'borrower_name': [
-                r'(?:applicant|borrower|name)[\s:]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)',
-                r'name[\s:]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)'
-            ],
-            'loan_amount': [
-                r'(?:loan amount|amount)[\s:]+₹?\s*(\d+(?:,\d+)*)',
-                r'(?:loan amount|amount)[\s:]+(?:Rs\.?|INR)?\s*(\d+(?:,\d+)*)'
-            ],
-            'pan': [
-                r'PAN[\s:]+([A-Z]{5}\d{4}[A-Z])',
-                r'(?:PAN|pan)[\s:]*([A-Z]{5}\d{4}[A-Z])'
-            ],
-            'annual_income': [
-                r'(?:annual income|yearly income)[\s:]+₹?\s*(\d+(?:,\d+)*)',
-            ],
-            'credit_score': [
-                r'(?:credit score|CIBIL)[\s:]+(\d{3})',
-            ]
+# Characters of the previous page kept when matching the next one, so a
+# field split across a page break is still found
+PAGE_OVERLAP = 256
+
+# PDFs with at least this many pages are extracted by a process pool.
+# Starting workers costs a few hundred ms, so short files stay serial.
+PARALLEL_PAGE_THRESHOLD = 64
+PAGES_PER_BATCH = 8
+
+
+def _extract_page_range(pdf_path, start, stop):
+    """Runs in a worker process: text of pages [start, stop)"""
+    with pdfplumber.open(pdf_path) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages[start:stop]]
+
+
+class ParseCancelled(Exception):
+    """The cancelled() callback of extract_from_pdf returned True"""
+
+
+def _until_cancelled(pages, cancelled):
+    """Yield pages, checking cancelled() (if given) before each one"""
+    for page_text in pages:
+        if cancelled is not None and cancelled():
+            raise ParseCancelled()
+        yield page_text
+
+
+def _clean_value(field, value):
+    value = value.strip()
+    # Clean amount values (remove commas)
+    if 'amount' in field or 'income' in field:
+        value = value.replace(',', '')
+    return value
+
+
+# Characters IGNORECASE matches to ASCII letters that str.lower() leaves
+# alone (or lengthens), folded before looking for keywords
+_KEYWORD_FOLD = str.maketrans({"İ": "i", "ı": "i", "ſ": "s", "K": "k"})
+
+# Text lowercased at a time while looking for keywords; each block is
+# twice the size of the previous one
+KEYWORD_BLOCK = 1024
+
+
+def _keyword_positions(text, keywords):
+    """
+    Earliest position of any of each field's keywords in text, ignoring
+    case, or None if the text has none of them. Text is lowercased a block
+    at a time, so keywords near the start cost little in a long document.
+    keywords: {field: (lowercase keyword, ...)}
+    """
+    positions = {}
+    pending = dict(keywords)
+    overlap = max((len(word) for words in keywords.values() for word in words), default=1) - 1
+    start, size = 0, KEYWORD_BLOCK
+    while pending and start < len(text):
+        block = text[start:start + size + overlap]
+        folded = block.translate(_KEYWORD_FOLD).lower()
+        for field, words in list(pending.items()):
+            found = [index for index in (folded.find(word) for word in words) if index >= 0]
+            if found:
+                # Lowercasing changed the length: only the block is known
+                positions[field] = start + (min(found) if len(folded) == len(block) else 0)
+                del pending[field]
+        start, size = start + size, size * 2
+    return positions
+
+
+class FieldExtractor:
+    """
+    Every field pattern compiled once, searched one after another in
+    priority order (the first pattern matching anywhere wins, at its
+    earliest match).
+
+    keywords: {field: words} every match of that field's patterns starts
+    with, in any case. A field none of whose keywords is in the text is
+    not searched at all, and the search starts at the first keyword, so
+    the regex engine skips the text before it. Fields without keywords
+    are searched from the start.
+
+    patterns is stored read-only, as {field: (pattern, ...)}.
+    """
+
+    def __init__(self, patterns, keywords=None):
+        self.patterns = MappingProxyType({
+            field: tuple(field_patterns) for field, field_patterns in patterns.items()
+        })
+        self.compiled = {
+            field: [re.compile(pattern, re.IGNORECASE) for pattern in field_patterns]
+            for field, field_patterns in self.patterns.items()
+        }
+        self.keywords = {
+            field: tuple(word.lower() for word in words)
+            for field, words in (keywords or {}).items() if field in self.patterns
         }
+
+    def search(self, text, limits=None):
+        """
+        Best match per field.
+
+        limits: {field: n} only consider that field's first n patterns
+        Returns: {field: (priority, match)}
+        """
+        limits = limits or {}
+        fields = [
+            field for field, field_patterns in self.patterns.items()
+            if limits.get(field, len(field_patterns)) > 0
+        ]
+        keywords = {field: self.keywords[field] for field in fields if field in self.keywords}
+        positions = _keyword_positions(text, keywords) if keywords else {}
+
+        best = {}
+        for field in fields:
+            if field in keywords and field not in positions:
+                continue
+            pos = positions.get(field, 0)
+            for priority, compiled in enumerate(self.compiled[field][:limits.get(field)]):
+                match = compiled.search(text, pos)
+                if match:
+                    best[field] = (priority, match)
+                    break
+        return best
+
+
+class FieldMatcher:
+    """
+    Incremental version of DocumentParser.parse_text for text that
+    arrives page by page.
+
+    A field is final once its highest-priority pattern has matched (the
+    earliest page wins, as in a search over the full text). Lower
+    priority matches are kept as fallbacks until then, and so are matches
+    running into the end of the text seen so far, since the next page
+    could still extend them.
+    """
+
+    def __init__(self, extractor, overlap=PAGE_OVERLAP):
+        self.extractor = extractor
+        self.patterns = extractor.patterns
+        self.overlap = overlap
+        self.found = {}  # field -> (priority, value, is_open)
+        self.tail = ""
+
+    @property
+    def complete(self):
+        return len(self.found) == len(self.patterns) and all(
+            priority == 0 and not is_open
+            for priority, _, is_open in self.found.values()
+        )
+
+    def feed(self, page_text):
+        """Match one more page. Returns True once every field is final."""
+        window = self.tail + page_text + "\n"
+
+        # Only patterns that could beat what we already have
+        limits = {}
+        for field, (priority, _, is_open) in self.found.items():
+            limits[field] = priority + 1 if is_open else priority
+
+        for field, (priority, match) in self.extractor.search(window, limits).items():
+            is_open = not window[match.end():].strip()
+            self.found[field] = (priority, _clean_value(field, match.group(1)), is_open)
+
+        self.tail = window[-self.overlap:]
+        return self.complete
+
+    def result(self):
+        return {field: value for field, (_, value, _) in self.found.items()}
+
+
+class DocumentParser:
+    # Common field patterns in loan documents, in priority order per field
+    PATTERNS = {
+        'borrower_name': [
+            r'(?:applicant|borrower|name)[\s:]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)',
+            r'name[\s:]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)'
+        ],
+        'loan_amount': [
+            r'(?:loan amount|amount)[\s:]+₹?\s*(\d+(?:,\d+)*)',
+            r'(?:loan amount|amount)[\s:]+(?:Rs\.?|INR)?\s*(\d+(?:,\d+)*)'
+        ],
+        'pan': [
+            r'PAN[\s:]+([A-Z]{5}\d{4}[A-Z])',
+            r'(?:PAN|pan)[\s:]*([A-Z]{5}\d{4}[A-Z])'
+        ],
+        'annual_income': [
+            r'(?:annual income|yearly income)[\s:]+₹?\s*(\d+(?:,\d+)*)',
+        ],
+        'credit_score': [
+            r'(?:credit score|CIBIL)[\s:]+(\d{3})',
+        ]
+    }
+    
+    # Words every match of a field's patterns starts with (FieldExtractor)
+    KEYWORDS = {
+        'borrower_name': ('applicant', 'borrower', 'name'),
+        'loan_amount': ('loan amount', 'amount'),
+        'pan': ('pan',),
+        'annual_income': ('annual income', 'yearly income'),
+        'credit_score': ('credit score', 'cibil'),
+    }
+    
+    # Compiled once for every parser instance
+    extractor = FieldExtractor(PATTERNS, KEYWORDS)
+    
+    # Cache keys: parsed fields are invalidated by a pattern change, raw
+    # text only by a change in how it is produced
+    version = patterns_version(PATTERNS)
+    PDF_TEXT_KEY = "pdfplumber"
+    
+    def __init__(self, preprocessor=None, psm=None):
+        """
+        preprocessor: ImagePreprocessor applied before OCR
+            (None: default settings, False: raw image)
+        psm: Tesseract page segmentation mode
+        """
+        self.preprocessor = ImagePreprocessor() if preprocessor is None else preprocessor
+        self.ocr_config = tesseract_config(psm=psm)
+    
+    @property
+    def patterns(self):
+        """Read-only view of the compiled PATTERNS"""
+        return self.extractor.patterns
+    
+    @property
+    def image_text_key(self):
+        preprocessing = self.preprocessor.signature if self.preprocessor else "raw"
+        return f"tesseract:{self.ocr_config}:{preprocessing}"
+    
+    @property
+    def image_fields_version(self):
+        """Parsed fields of an image depend on the OCR settings too"""
+        return f"{self.version}:{self.image_text_key}"
     
-    def extract_from_image(self, image_path):
+    def extract_from_image(self, image_path, use_cache=True):
         """Extract text from image file using OCR"""
         try:
-            img = Image.open(image_path)
-            text = pytesseract.image_to_string(img)
-            return self.parse_text(text)
+            if not use_cache:
+                return self.parse_text(self._ocr_image(image_path))
+            
+            cache = get_ocr_cache()
+            content_hash = file_digest(image_path)
+            fields = cache.get_fields(content_hash, self.image_fields_version)
+            if fields is not None:
+                return fields
+            
+            cached = cache.get_text(content_hash, self.image_text_key)
+            if cached is not None:
+                text = cached["pages"][0]
+            else:
+                text = self._ocr_image(image_path)
+                cache.put_text(content_hash, self.image_text_key, [text], True)
+            
+            fields = self.parse_text(text)
+            cache.put_fields(content_hash, self.image_fields_version, fields)
+            return fields
         except Exception as e:
             return {"error": f"Image parsing failed: {str(e)}"}
     
-    def extract_from_pdf(self, pdf_path):
-        """Extract text from PDF file"""
+    def _ocr_image(self, image_path):
+        img = Image.open(image_path)
+        if self.preprocessor:
+            img = self.preprocessor.process(img)
+        return pytesseract.image_to_string(img, config=self.ocr_config)
+    
+    def extract_from_pdf(self, pdf_path, max_pages=None, parallel=None, use_cache=True, cancelled=None):
+        """
+        Extract fields from a PDF file page by page.
+        Stops reading as soon as every field has been found.
+        
+        max_pages: only look at the first N pages (not cached)
+        parallel: extract pages in worker processes (default: large files only)
+        use_cache: reuse fields / page text of a previously seen identical file
+        cancelled: optional callable checked between pages; ParseCancelled
+            is raised (and nothing cached) once it returns True
+        """
         try:
-            text = ""
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() + "\n"
-            return self.parse_text(text)
+            if use_cache and not max_pages:
+                return self._extract_from_pdf_cached(pdf_path, parallel, cancelled)
+            
+            matcher = FieldMatcher(self.extractor)
+            pages = self.iter_pdf_pages(pdf_path, max_pages, parallel)
+            try:
+                for page_text in _until_cancelled(pages, cancelled):
+                    if matcher.feed(page_text):
+                        break
+            finally:
+                pages.close()
+            return matcher.result()
+        except ParseCancelled:
+            raise
         except Exception as e:
             return {"error": f"PDF parsing failed: {str(e)}"}
     
-    def parse_text(self, text):
-        """Extract loan details from text using patterns"""
-        extracted_data = {}
+    def _extract_from_pdf_cached(self, pdf_path, parallel, cancelled=None):
+        """
+        extract_from_pdf through the cache. Cached page text is matched
+        first; if it was cut short by an earlier early stop and the new
+        patterns need more, extraction resumes after the cached pages.
+        """
+        cache = get_ocr_cache()
+        content_hash = file_digest(pdf_path)
+        fields = cache.get_fields(content_hash, self.version)
+        if fields is not None:
+            return fields
         
-        for field, patterns in self.patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    value = match.group(1).strip()
-                    # Clean amount values (remove commas)
-                    if 'amount' in field or 'income' in field:
-                        value = value.replace(',', '')
-                    extracted_data[field] = value
-                    break
+        cached = cache.get_text(content_hash, self.PDF_TEXT_KEY) or {"pages": [], "complete": False}
+        seen = []
+        matcher = FieldMatcher(self.extractor)
+        done = False
+        
+        for page_text in _until_cancelled(cached["pages"], cancelled):
+            seen.append(page_text)
+            if matcher.feed(page_text):
+                done = True
+                break
         
-        return extracted_data
+        complete = cached["complete"]
+        if not done and not complete:
+            pages = self.iter_pdf_pages(pdf_path, parallel=parallel, start=len(cached["pages"]))
+            try:
+                for page_text in _until_cancelled(pages, cancelled):
+                    seen.append(page_text)
+                    if matcher.feed(page_text):
+                        done = True
+                        break
+            finally:
+                pages.close()
+            complete = not done
+            cache.put_text(content_hash, self.PDF_TEXT_KEY, seen, complete)
+        
+        fields = matcher.result()
+        cache.put_fields(content_hash, self.version, fields)
+        return fields
+    
+    def iter_pdf_pages(self, pdf_path, max_pages=None, parallel=None, start=0):
+        """Yield the text of each page in order, from page index start"""
+        with pdfplumber.open(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+            if max_pages:
+                page_count = min(page_count, max_pages)
+            if parallel is None:
+                parallel = page_count - start >= PARALLEL_PAGE_THRESHOLD
+            
+            if not parallel:
+                for page in pdf.pages[start:page_count]:
+                    yield page.extract_text() or ""
+                return
+        
+        # Large file: batches of pages in worker processes, consumed in
+        # order; batches not yet started are cancelled on early exit.
+        # spawn, not fork: this may run inside the threaded Qt app.
+        batches = [
+            (first, min(first + PAGES_PER_BATCH, page_count))
+            for first in range(start, page_count, PAGES_PER_BATCH)
+        ]
+        executor = ProcessPoolExecutor(
+            max_workers=min(os.cpu_count() or 1, len(batches)),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            futures = [
+                executor.submit(_extract_page_range, pdf_path, first, stop)
+                for first, stop in batches
+            ]
+            for future in futures:
+                yield from future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def parse_text(self, text):
+        """Extract loan details from text"""
+        return {
+            field: _clean_value(field, match.group(1))
+            for field, (_, match) in self.extractor.search(text).items()
+        }
     
     def validate_extraction(self, data):
         """Check if required fields are present"""
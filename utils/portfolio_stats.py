@@ -0,0 +1,282 @@
+# utils/portfolio_stats.py
+
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import ReturnDocument
+from utils.db import get_collection
+
+# Running aggregates live in a single document of this collection
+STATS_COLLECTION = "portfolio_stats"
+STATS_ID = "loans"
+
+# Bump when the document layout changes; older documents are rebuilt
+STATS_FORMAT = 2
+
+# Worse risk has a higher rank (risk migration direction)
+RISK_RANK = {"Low": 0, "Medium": 1, "High": 2}
+
+# Month a loan was added (saved or imported), from its ObjectId; null
+# for other _ids, which the monthly series skip (see _month)
+MONTH_OF_ID = {"$dateToString": {"format": "%Y-%m", "date": {"$convert": {
+    "input": {"$cond": [{"$eq": [{"$type": "$_id"}, "objectId"]}, "$_id", None]},
+    "to": "date", "onError": None, "onNull": None
+}}}}
+
+# Loan amounts are stored as numbers or numeric strings
+AMOUNT_AS_NUMBER = {
+    "$convert": {"input": "$amount", "to": "double", "onError": 0, "onNull": 0}
+}
+
+
+class PortfolioSummary:
+    """
+    Loan counts and exposure per risk bucket, plus monthly series.
+    buckets: {risk_label: {"count": int, "amount": float}}
+    months: {"YYYY-MM": {risk_label: {"count": int, "amount": float}}} by month added
+    migrations: {"YYYY-MM": {"Low>High": int}} risk label changes by month of change
+    """
+
+    def __init__(self, buckets=None, months=None, migrations=None):
+        self.buckets = buckets or {}
+        self.months = months or {}
+        self.migrations = migrations or {}
+
+    @property
+    def total_loans(self):
+        return sum(bucket["count"] for bucket in self.buckets.values())
+
+    @property
+    def total_amount(self):
+        return sum(bucket["amount"] for bucket in self.buckets.values())
+
+    def count(self, risk_label):
+        return self.buckets.get(risk_label, {}).get("count", 0)
+
+    def amount(self, risk_label):
+        return self.buckets.get(risk_label, {}).get("amount", 0)
+
+    def exposure_by_month(self, risk_labels, last=12):
+        """
+        Returns: (months, {risk_label: [amount per month]}) for the
+        latest `last` months loans were added in
+        """
+        months = sorted(self.months)[-last:]
+        return months, {
+            label: [self.months[month].get(label, {}).get("amount", 0) for month in months]
+            for label in risk_labels
+        }
+
+    def migration_by_month(self, last=12):
+        """Returns: (months, [loans worsened], [loans improved]) per month"""
+        months = sorted(self.migrations)[-last:]
+        worsened, improved = [], []
+        for month in months:
+            up = down = 0
+            for transition, count in self.migrations[month].items():
+                before, _, after = transition.partition(">")
+                if before not in RISK_RANK or after not in RISK_RANK:
+                    continue
+                if RISK_RANK[after] > RISK_RANK[before]:
+                    up += count
+                else:
+                    down += count
+            worsened.append(up)
+            improved.append(down)
+        return months, worsened, improved
+
+
+# Counts and exposure per risk label and month added, computed
+# on the server
+SUMMARY_PIPELINE = [
+    {"$group": {
+        "_id": {"label": "$risk_label", "month": MONTH_OF_ID},
+        "count": {"$sum": 1},
+        "amount": {"$sum": AMOUNT_AS_NUMBER}
+    }}
+]
+
+
+def summary_from_rows(rows):
+    """Build a PortfolioSummary from SUMMARY_PIPELINE output"""
+    buckets = {}
+    months = {}
+    for row in rows:
+        label = row["_id"]["label"] or "Unknown"
+        bucket = buckets.setdefault(label, {"count": 0, "amount": 0})
+        bucket["count"] += row["count"]
+        bucket["amount"] += row["amount"]
+        month = row["_id"].get("month")
+        if month is None:
+            # _id is not an ObjectId: in the totals only
+            continue
+        months.setdefault(month, {})[label] = {
+            "count": row["count"],
+            "amount": row["amount"]
+        }
+    return PortfolioSummary(buckets, months)
+
+
+def summary_from_document(doc):
+    return PortfolioSummary(doc.get("buckets", {}), doc.get("months", {}), doc.get("migrations", {}))
+
+
+def stats_document(summary):
+    """
+    Everything derivable from the loans. Migrations are history, so
+    rebuilds leave them in place.
+    """
+    return {
+        "_id": STATS_ID,
+        "format": STATS_FORMAT,
+        "count": summary.total_loans,
+        "amount": summary.total_amount,
+        "buckets": summary.buckets,
+        "months": summary.months
+    }
+
+
+def is_current(doc):
+    return doc is not None and doc.get("format") == STATS_FORMAT
+
+
+def compute_portfolio_summary():
+    """
+    Compute counts and exposure per risk label on the server
+    with a single aggregation pipeline.
+    """
+    return summary_from_rows(get_collection("loans").aggregate(SUMMARY_PIPELINE))
+
+
+def get_portfolio_summary():
+    """
+    Read the running aggregates (a single document lookup).
+    Builds them from the loans collection the first time.
+    """
+    doc = get_collection(STATS_COLLECTION).find_one({"_id": STATS_ID})
+    if not is_current(doc):
+        return rebuild_portfolio_stats()
+    return summary_from_document(doc)
+
+
+def rebuild_update(summary):
+    """Update writing a rebuilt summary over the stats document"""
+    fields = stats_document(summary)
+    del fields["_id"]
+    return {"$set": fields}
+
+
+def rebuild_portfolio_stats():
+    """Recompute the running aggregates from scratch to reconcile drift"""
+    summary = compute_portfolio_summary()
+    stats = get_collection(STATS_COLLECTION)
+    doc = stats.find_one_and_update(
+        {"_id": STATS_ID},
+        rebuild_update(summary),
+        projection={"migrations": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    summary.migrations = doc.get("migrations", {})
+    return summary
+
+
+# ---------- INCREMENTAL UPDATES ----------
+def _amount(loan):
+    try:
+        return float(loan.get("amount") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _month(loan):
+    _id = loan.get("_id")
+    return _id.generation_time.strftime("%Y-%m") if isinstance(_id, ObjectId) else None
+
+
+def _current_month():
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def _delta(loan, sign):
+    """$inc fields adding (sign=1) or removing (sign=-1) one loan"""
+    amount = _amount(loan) * sign
+    label = loan.get("risk_label") or "Unknown"
+    inc = {
+        "count": sign,
+        "amount": amount,
+        f"buckets.{label}.count": sign,
+        f"buckets.{label}.amount": amount
+    }
+    month = _month(loan)
+    if month:
+        inc[f"months.{month}.{label}.count"] = sign
+        inc[f"months.{month}.{label}.amount"] = amount
+    return inc
+
+
+def migration_delta(transitions):
+    """$inc fields recording risk label changes: {(before, after): count}"""
+    month = _current_month()
+    return {
+        f"migrations.{month}.{before or 'Unknown'}>{after or 'Unknown'}": count
+        for (before, after), count in transitions.items()
+        if before != after and count
+    }
+
+
+def _nonzero(inc):
+    return {key: value for key, value in inc.items() if value != 0}
+
+
+def insert_delta(loan):
+    return _nonzero(_delta(loan, 1))
+
+
+def delete_delta(loan):
+    return _nonzero(_delta(loan, -1))
+
+
+def update_delta(before, after):
+    inc = _delta(before, -1)
+    for key, value in _delta(after, 1).items():
+        inc[key] = inc.get(key, 0) + value
+    inc.update(migration_delta({(before.get("risk_label"), after.get("risk_label")): 1}))
+    return _nonzero(inc)
+
+
+def _apply(inc):
+    # Only maintain an existing stats document; a missing one is
+    # rebuilt in full on the next read.
+    if inc:
+        get_collection(STATS_COLLECTION).update_one({"_id": STATS_ID}, {"$inc": inc})
+
+
+def record_insert(loan):
+    _apply(insert_delta(loan))
+
+
+def record_delete(loan):
+    _apply(delete_delta(loan))
+
+
+def record_update(before, after):
+    _apply(update_delta(before, after))
+
+
+def record_migrations(transitions):
+    """
+    Record label changes from bulk re-scoring, which has no per-loan
+    before image: transitions is {(before, after): count}
+    """
+    _apply(migration_delta(Counter(transitions)))
+
+
+if __name__ == "__main__":
+    # python -m utils.portfolio_stats rebuild
+    if sys.argv[1:] == ["rebuild"]:
+        summary = rebuild_portfolio_stats()
+        print(f"Portfolio stats rebuilt: {summary.total_loans} loans, ₹{summary.total_amount}")
+    else:
+        print("Usage: python -m utils.portfolio_stats rebuild")
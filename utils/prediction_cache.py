@@ -0,0 +1,92 @@
+# utils/prediction_cache.py
+#
+# In-memory cache of risk predictions. A prediction depends only on the
+# model version and the loan's feature vector, so that pair is the key:
+# re-scoring an unchanged loan with the same model is a dict lookup.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_SIZE", "100000"))
+DEFAULT_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+
+# Feature values are rounded to this many decimals for the key, so float
+# noise from parsing does not defeat the cache
+KEY_DECIMALS = 6
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with a time-to-live.
+
+    max_entries: least recently used entries are dropped beyond this
+    ttl: seconds an entry stays valid (0 = no expiry)
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def keys(version, features):
+        """
+        One key per row of a feature matrix: the version followed by the
+        row's rounded float64 bytes (plain bytes keys are cheap to build
+        and are not tracked by the garbage collector)
+        """
+        raw = np.ascontiguousarray(features.round(KEY_DECIMALS), dtype=np.float64).tobytes()
+        prefix = f"{version}:".encode()
+        width = features.shape[1] * 8
+        return [prefix + raw[start:start + width] for start in range(0, len(raw), width)]
+
+    def get_many(self, keys):
+        """Cached values in key order, None where missing or expired"""
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and (not self.ttl or entry[0] > now):
+                    self._entries.move_to_end(key)
+                    values.append(entry[1])
+                    self.hits += 1
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    values.append(None)
+                    self.misses += 1
+        return values
+
+    def put_many(self, keys, values):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            overflow = len(self._entries) - self.max_entries
+            for _ in range(max(overflow, 0)):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,70 @@
+# utils/qt_async.py
+
+import asyncio
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class AsyncWorker(QObject):
+    """
+    Runs coroutines on a background asyncio loop and hands results back
+    to the Qt GUI thread through a queued signal.
+    """
+
+    # (on_result, on_error, result, error)
+    _finished = pyqtSignal(object, object, object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever,
+            name="async-db",
+            daemon=True
+        )
+        self.thread.start()
+        self._finished.connect(self._deliver)
+
+    def submit(self, coro, on_result=None, on_error=None):
+        """
+        Schedule a coroutine. on_result(result) / on_error(exception)
+        are called on the GUI thread once it completes.
+        Returns: concurrent.futures.Future
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        future.add_done_callback(
+            lambda f: self._on_done(f, on_result, on_error)
+        )
+        return future
+
+    def _on_done(self, future, on_result, on_error):
+        # Runs on the asyncio thread: only emit, never touch widgets here
+        if future.cancelled():
+            return
+        error = future.exception()
+        result = None if error else future.result()
+        self._finished.emit(on_result, on_error, result, error)
+
+    def _deliver(self, on_result, on_error, result, error):
+        if error is not None:
+            if on_error:
+                on_error(error)
+            else:
+                print(f"Background query failed: {error}")
+        elif on_result:
+            on_result(result)
+
+
+_worker = None
+
+
+def get_async_worker():
+    """Shared worker; create it after the QApplication exists"""
+    global _worker
+    if _worker is None:
+        _worker = AsyncWorker()
+    return _worker
+
+
+def run_async(coro, on_result=None, on_error=None):
+    return get_async_worker().submit(coro, on_result, on_error)
@@ -0,0 +1,238 @@
+# utils/retrain.py
+#
+# Keeps the risk model current as loans come in.
+#
+# Every trained version records a watermark: the newest updated_at it has
+# seen, plus the loans already trained on within WATERMARK_OVERLAP of it.
+# Incremental retraining only reads loans stamped since (an updated_at
+# range scan), so its cost follows the number of new or changed loans,
+# not the size of the book.
+#
+# updated_at and ObjectIds both come from the writing client's clock, so
+# a loan can land behind a watermark already recorded. Like the change
+# feed's poll, each run re-reads WATERMARK_OVERLAP behind the watermark
+# and skips the loans it lists as trained on.
+#
+# Full refits only run when asked for: the scheduler never starts one.
+#
+#   python -m utils.retrain            # incremental
+#   python -m utils.retrain full
+
+import os
+import sys
+import threading
+from datetime import datetime
+from itertools import islice
+from bson import ObjectId
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from utils.change_feed import POLL_OVERLAP
+from utils.data_handler import load_loans, iter_loans, count_loans, utcnow
+from utils.ml_risk_model import get_model
+from utils.tasks import get_task_runner
+
+TRAINING_FIELDS = ["_id", "amount", "annual_income", "pan", "risk_label"]
+
+# Fewer new loans than this are left for the next run
+MIN_NEW_LOANS = int(os.getenv("RETRAIN_MIN_NEW_LOANS", "50"))
+
+# Background incremental retrain period (0 disables the schedule)
+RETRAIN_INTERVAL_MINUTES = int(os.getenv("RETRAIN_INTERVAL_MINUTES", "30"))
+
+# How far behind the watermark each run re-reads (late client clocks)
+WATERMARK_OVERLAP = POLL_OVERLAP
+
+# Older loans per missing class added to a forest update
+CLASS_SEED_LOANS = 5
+
+CLASS_FILTERS = [
+    {"risk_label": "Low"},
+    {"risk_label": "Medium"},
+    {"risk_label": {"$nin": ["Low", "Medium"]}},
+]
+
+# One training run at a time per process
+_training_lock = threading.Lock()
+
+# ... and one scheduled run at a time across every client sharing the
+# model store (ModelStore.try_lock)
+TRAINING_LOCK = "training"
+
+
+def _report(task, percent, message):
+    if task is not None:
+        task.check_cancelled()
+        task.report(percent, message)
+
+
+def make_watermark(stamp, loans=()):
+    """
+    Watermark recorded with a version: stamp plus the loans (with
+    updated_at) trained on within WATERMARK_OVERLAP of it
+    """
+    cutoff = stamp - WATERMARK_OVERLAP
+    return {
+        "updated_at": stamp.isoformat(),
+        "seen": {
+            str(loan["_id"]): loan["updated_at"].isoformat()
+            for loan in loans if loan.get("updated_at") and loan["updated_at"] >= cutoff
+        },
+    }
+
+
+def current_watermark():
+    """Watermark covering every loan written so far"""
+    stamp = utcnow()
+    recent = iter_loans(fields=["_id", "updated_at"], filter={"updated_at": {"$gte": stamp - WATERMARK_OVERLAP}})
+    return make_watermark(stamp, recent)
+
+
+def parse_watermark(watermark):
+    """
+    Returns: (updated_at, {str(_id): updated_at isoformat})
+    Versions trained before updated_at watermarks recorded an _id.
+    """
+    if isinstance(watermark, str):
+        return ObjectId(watermark).generation_time.replace(tzinfo=None), {}
+    return datetime.fromisoformat(watermark["updated_at"]), watermark.get("seen", {})
+
+
+def train_full(task=None, model=None):
+    """
+    Refit on every loan.
+    task: optional utils.tasks.Task for progress and cancellation
+    Returns: {"mode", "trained", "loans"}
+    """
+    model = model or get_model()
+    with _training_lock:
+        _report(task, 5, "Loading loans...")
+        # Fix the watermark first: loans written while training are
+        # stamped after it and picked up by the next update
+        watermark = current_watermark()
+        total = count_loans()
+        if not total:
+            return {"mode": "full", "trained": False, "loans": 0}
+
+        cursor = iter_loans(fields=TRAINING_FIELDS[1:], batch_size=min(model.config.chunk_size, 10000))
+        trained = model.train(
+            cursor,
+            watermark=watermark,
+            progress=lambda seen: _report(task, 5 + int(45 * seen / max(total, 1)), f"Read {seen}/{total} loans...")
+        )
+        _report(task, 100, "Done")
+        return {"mode": "full", "trained": trained, "loans": total}
+
+
+def _class_seed_loans(new_loans, since):
+    """A few older loans (stamped before since) of each class missing from new_loans"""
+    present = {loan.get("risk_label", "Medium") for loan in new_loans}
+    present = {label if label in ("Low", "Medium") else "High" for label in present}
+    seeds = []
+    for label, query in zip(("Low", "Medium", "High"), CLASS_FILTERS):
+        if label not in present:
+            query = {"$and": [query, {"updated_at": {"$not": {"$gte": since}}}]}
+            seeds.extend(islice(iter_loans(fields=TRAINING_FIELDS, filter=query), CLASS_SEED_LOANS))
+    return seeds
+
+
+def train_new_loans(task=None, model=None, min_new_loans=MIN_NEW_LOANS, blocking=True):
+    """
+    Update the model with loans added or changed since its watermark. Never falls
+    back to a full refit: train_full only runs when asked for (Monitoring's
+    Train button, `python -m utils.retrain full`).
+
+    - a model without a watermark (imported from the pre-versioning
+      pickles) is not retrained; its watermark is seeded with the current
+      time, and later runs train on the loans written after it
+    - "needs_full": there is no model yet, or the update is not possible
+      (e.g. a class the model has never seen)
+
+    blocking: False returns {"mode": "busy"} if a training run is active in
+        this process or, through the model store's lock file, in any other
+        client sharing the store (how the scheduler calls it)
+    Returns: {"mode": "incremental" | "seeded" | "skipped" | "needs_full" | "busy", "trained", "loans"}
+    """
+    model = model or get_model()
+    busy = {"mode": "busy", "trained": False, "loans": 0}
+    if not _training_lock.acquire(blocking=blocking):
+        return busy
+
+    store_locked = False
+    try:
+        if not blocking:
+            store_locked = model.store.try_lock(TRAINING_LOCK)
+            if not store_locked:
+                return busy
+
+        # Read after taking the lock: another client may just have
+        # promoted an update (picked up here by the hot reload)
+        if not model.is_trained:
+            return {"mode": "needs_full", "trained": False, "loans": 0}
+        watermark = model.watermark()
+        if watermark is None:
+            model.seed_watermark(current_watermark())
+            return {"mode": "seeded", "trained": False, "loans": 0}
+
+        stamp, seen = parse_watermark(watermark)
+        since = stamp - WATERMARK_OVERLAP
+        _report(task, 5, "Loading new loans...")
+        loans = load_loans(fields=TRAINING_FIELDS + ["updated_at"], filter={"updated_at": {"$gte": since}})
+        new_loans = [loan for loan in loans if seen.get(str(loan["_id"])) != loan["updated_at"].isoformat()]
+        if len(new_loans) < min_new_loans:
+            return {"mode": "skipped", "trained": False, "loans": len(new_loans)}
+
+        _report(task, 40, f"Updating model with {len(new_loans)} loans...")
+        seeds = _class_seed_loans(new_loans, since) if model.backend == "forest" else []
+        newest = make_watermark(max(stamp, max(loan["updated_at"] for loan in new_loans)), loans)
+        if not model.train_incremental(new_loans, seeds, watermark=newest):
+            return {"mode": "needs_full", "trained": False, "loans": len(new_loans)}
+        _report(task, 100, "Done")
+        return {"mode": "incremental", "trained": True, "loans": len(new_loans)}
+    finally:
+        if store_locked:
+            model.store.unlock(TRAINING_LOCK)
+        _training_lock.release()
+
+
+class RetrainScheduler(QObject):
+    """
+    Runs train_new_loans on the task runner every interval_minutes.
+    Incremental updates only; when several clients run one, the store's
+    lock file lets one of them train and the others skip.
+    """
+
+    retrained = pyqtSignal(object)  # train_new_loans result
+
+    def __init__(self, interval_minutes=RETRAIN_INTERVAL_MINUTES, parent=None):
+        super().__init__(parent)
+        self.interval_minutes = interval_minutes
+        self.active_task = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.run_now)
+
+    def start(self):
+        if self.interval_minutes > 0:
+            self.timer.start(self.interval_minutes * 60 * 1000)
+
+    def stop(self):
+        self.timer.stop()
+
+    def run_now(self):
+        if self.active_task is not None:
+            return
+        self.active_task = get_task_runner().submit(
+            train_new_loans,
+            blocking=False,
+            on_result=self.retrained.emit,
+            on_error=lambda e: print(f"Scheduled retrain failed: {e}"),
+            on_finished=self._finished
+        )
+
+    def _finished(self):
+        self.active_task = None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "full":
+        print(train_full())
+    else:
+        print(train_new_loans())
@@ -0,0 +1,127 @@
+# utils/tasks.py
+
+import threading
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task when it has been cancelled"""
+
+
+class TaskSignals(QObject):
+    progress = pyqtSignal(int, str)   # percent, message
+    result = pyqtSignal(object)
+    error = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    finished = pyqtSignal()
+
+
+class Task(QRunnable):
+    """
+    Runs fn(task, *args, **kwargs) on a pool thread.
+
+    fn gets the task itself so it can call task.report(percent, message)
+    for progress and cancellation checks. fn must not touch widgets;
+    results are delivered to the GUI thread through task.signals.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise TaskCancelled()
+
+    def report(self, percent, message=""):
+        """Emit progress; also the point where cancellation takes effect"""
+        self.check_cancelled()
+        self.signals.progress.emit(int(percent), message)
+
+    def run(self):
+        try:
+            self.check_cancelled()
+            result = self.fn(self, *self.args, **self.kwargs)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.error.emit(e)
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+class TaskRunner(QObject):
+    """
+    QThreadPool front end that tracks queued/running tasks.
+    queue_changed carries the number of unfinished tasks.
+    """
+
+    queue_changed = pyqtSignal(int)
+
+    def __init__(self, max_threads=None):
+        super().__init__()
+        self.pool = QThreadPool()
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self.tasks = []
+
+    @property
+    def pending(self):
+        return len(self.tasks)
+
+    def submit(self, fn, *args, on_result=None, on_error=None,
+               on_progress=None, on_cancelled=None, on_finished=None, **kwargs):
+        """Queue fn(task, *args, **kwargs). Callbacks run on the GUI thread."""
+        task = Task(fn, *args, **kwargs)
+        if on_result:
+            task.signals.result.connect(on_result)
+        if on_error:
+            task.signals.error.connect(on_error)
+        else:
+            task.signals.error.connect(lambda e: print(f"Background task failed: {e}"))
+        if on_progress:
+            task.signals.progress.connect(on_progress)
+        if on_cancelled:
+            task.signals.cancelled.connect(on_cancelled)
+        if on_finished:
+            task.signals.finished.connect(on_finished)
+        task.signals.finished.connect(lambda: self._task_done(task))
+
+        self.tasks.append(task)
+        self.pool.start(task)
+        self.queue_changed.emit(self.pending)
+        return task
+
+    def cancel_all(self):
+        for task in self.tasks:
+            task.cancel()
+
+    def _task_done(self, task):
+        if task in self.tasks:
+            self.tasks.remove(task)
+        self.queue_changed.emit(self.pending)
+
+
+_runner = None
+
+
+def get_task_runner():
+    """Shared runner; create it after the QApplication exists"""
+    global _runner
+    if _runner is None:
+        _runner = TaskRunner()
+    return _runner
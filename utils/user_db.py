@@ -1,17 +1,15 @@
 # utils/userdb.py
 
-from pymongo import MongoClient
-from config import MONGO_URI, DB_NAME
 from datetime import datetime
+from utils.db import get_collection
 from utils.security import hash_password, verify_password
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-users_col = db["users"]
+def _users():
+    return get_collection("users")
 
 class UserDatabase:
     def get_user(self, username):
-        return users_col.find_one({"username": username}, {"_id": 0})
+        return _users().find_one({"username": username}, {"_id": 0})
 
     def create_user(self, username, password_hash, fullname, role="user"):
         if self.get_user(username):
@@ -23,16 +21,16 @@ class UserDatabase:
             "role": role,
             "created_at": datetime.now().isoformat()
         }
-        users_col.insert_one(new_user)
+        _users().insert_one(new_user)
         return True
 
     def update_user(self, username, **kwargs):
-        result = users_col.update_one(
+        result = _users().update_one(
             {"username": username},
             {"$set": kwargs}
         )
         return result.modified_count > 0
 
     def delete_user(self, username):
-        users_col.delete_one({"username": username})
+        _users().delete_one({"username": username})
         return True
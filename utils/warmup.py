@@ -0,0 +1,59 @@
+# utils/warmup.py
+#
+# Background warm-up after login. The dashboard imports each screen only
+# when its card is opened; this imports them (with sklearn, matplotlib,
+# pdfplumber, ...) on a background thread while the user looks at the
+# dashboard, so the first click does not pay for it.
+#
+#   STARTUP_WARMUP=0 turns it off (e.g. on thin clients short of memory)
+
+import importlib
+import os
+import threading
+import time
+from PyQt5.QtCore import QObject, pyqtSignal
+
+WARMUP_ENABLED = os.getenv("STARTUP_WARMUP", "1") != "0"
+
+# Let the dashboard paint before the imports compete for the CPU
+WARMUP_DELAY_MS = int(os.getenv("STARTUP_WARMUP_DELAY_MS", "500"))
+
+# Screens most likely to be opened first come first
+WARMUP_MODULES = [
+    "modules.origination",
+    "modules.monitoring",
+    "modules.analytics",
+    "modules.executive_summary",
+    "utils.retrain",
+]
+
+
+class Warmup(QObject):
+    """finished is emitted on the GUI thread once every module is imported"""
+
+    finished = pyqtSignal()
+
+    def __init__(self, modules=WARMUP_MODULES, enabled=WARMUP_ENABLED):
+        super().__init__()
+        self.modules = list(modules)
+        self.enabled = enabled
+        self._thread = None
+
+    def start(self):
+        if not self.enabled:
+            self.finished.emit()
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="startup-warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        start = time.perf_counter()
+        for name in self.modules:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                # The screen will raise the real error when it is opened
+                print(f"Warm-up import of {name} failed: {e}")
+        print(f"Warm-up finished in {time.perf_counter() - start:.1f}s")
+        self.finished.emit()